@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django import forms
-from .models import Course, Lesson, UserLessonTrajectory, LessonAttachment
+from django.db.models import Count
+from .forms import GroupLessonTrajectoryForm
+from .models import Course, Lesson, UserLessonTrajectory, GroupLessonTrajectory, LessonAttachment
+from .services import materialize_group_trajectory
 
 
 
@@ -65,17 +68,28 @@ class LessonAdmin(admin.ModelAdmin):
     search_fields = ['title']
     filter_horizontal = ['courses']
     inlines = [LessonAttachmentInline]
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            # В списке уроков HTML содержимое не нужно
+            queryset = queryset.listing().prefetch_related('courses').annotate(
+                attachments_count=Count('attachments')
+            )
+        return queryset
     
     def get_courses(self, obj):
         """Отображает список курсов для урока"""
         courses = obj.courses.all()
-        if courses.exists():
+        if courses:
             return ', '.join([course.title for course in courses])
         return 'Без курсов'
     get_courses.short_description = 'Курсы'
     
     def get_attachments_count(self, obj):
         """Отображает количество прикреплённых файлов"""
+        if hasattr(obj, 'attachments_count'):
+            return obj.attachments_count
         return obj.attachments.count()
     get_attachments_count.short_description = 'Файлов'
 
@@ -88,3 +102,39 @@ class LessonAttachmentAdmin(admin.ModelAdmin):
     list_filter = ['lesson', 'uploaded_at']
     search_fields = ['name', 'lesson__title']
     readonly_fields = ['uploaded_at']
+
+
+
+
+@admin.register(GroupLessonTrajectory)
+class GroupLessonTrajectoryAdmin(admin.ModelAdmin):
+    form = GroupLessonTrajectoryForm
+    list_display = ['group', 'course', 'get_lessons_count']
+    list_filter = ['group', 'course']
+    search_fields = ['group__name', 'course__title']
+    autocomplete_fields = ['group', 'course']
+    filter_horizontal = ['lessons']
+    list_select_related = ['group', 'course']
+    actions = ['materialize']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(lessons_count=Count('lessons'))
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        # На странице изменения показываем только уроки курса этой траектории
+        if db_field.name == 'lessons' and request.resolver_match:
+            object_id = request.resolver_match.kwargs.get('object_id')
+            if object_id:
+                kwargs['queryset'] = Lesson.objects.listing().filter(
+                    courses__grouplessontrajectory__pk=object_id
+                )
+        return super().formfield_for_manytomany(db_field, request, **kwargs)
+
+    def get_lessons_count(self, obj):
+        return obj.lessons_count
+    get_lessons_count.short_description = 'Уроков'
+
+    @admin.action(description='Создать личные траектории участникам группы')
+    def materialize(self, request, queryset):
+        created = sum(materialize_group_trajectory(template) for template in queryset)
+        self.message_user(request, f'Создано личных траекторий: {created}')
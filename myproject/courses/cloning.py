@@ -0,0 +1,169 @@
+from django.db import transaction
+
+from quizzes.models import Quiz, Question, Answer
+from .models import Course, Lesson, LessonAttachment, GroupLessonTrajectory
+
+
+CourseLesson = Lesson.courses.through
+CourseQuiz = Course.quizzes.through
+CourseGroup = Course.assigned_groups.through
+GroupTrajectoryLesson = GroupLessonTrajectory.lessons.through
+
+# Размер пачки INSERT при копировании строк
+CLONE_BATCH_SIZE = 1000
+
+
+def _unique_title(title, author):
+    """Название копии, уникальное в пределах автора (ограничение unique_course_per_author)"""
+    base = f'{title} (копия)'[:190]
+    taken = set(
+        Course.objects.filter(author=author, title__startswith=base).values_list('title', flat=True)
+    )
+    candidate, counter = base, 2
+    while candidate in taken:
+        candidate = f'{base} {counter}'
+        counter += 1
+    return candidate
+
+
+def _copy_rows(objects, **overrides):
+    """Копии объектов без первичного ключа: значения всех конкретных полей, кроме переопределённых"""
+    copies = []
+    for obj in objects:
+        values = {
+            field.attname: getattr(obj, field.attname)
+            for field in obj._meta.concrete_fields
+            if not field.primary_key and field.attname not in overrides
+        }
+        values.update({key: value(obj) if callable(value) else value for key, value in overrides.items()})
+        copies.append(type(obj)(**values))
+    return copies
+
+
+def _clone_quizzes(quizzes, name_suffix):
+    """
+    Копирует тесты вместе с вопросами и ответами: по одному bulk_create на таблицу.
+    Возвращает словарь {старый ID теста: новый ID}.
+    """
+    quizzes = list(quizzes)
+    if not quizzes:
+        return {}
+
+    # Результаты тестов привязаны к названию теста, поэтому копия получает своё название
+    new_quizzes = Quiz.objects.bulk_create(
+        _copy_rows(quizzes, name=lambda quiz: f'{quiz.name} — {name_suffix}'[:300], search_vector=None),
+        batch_size=CLONE_BATCH_SIZE,
+    )
+    quiz_map = {old.pk: new.pk for old, new in zip(quizzes, new_quizzes)}
+
+    questions = list(Question.objects.filter(quiz_id__in=quiz_map).order_by('pk'))
+    new_questions = Question.objects.bulk_create(
+        _copy_rows(questions, quiz_id=lambda question: quiz_map[question.quiz_id]),
+        batch_size=CLONE_BATCH_SIZE,
+    )
+    question_map = {old.pk: new.pk for old, new in zip(questions, new_questions)}
+
+    Answer.objects.bulk_create(
+        _copy_rows(
+            Answer.objects.filter(question_id__in=question_map).order_by('pk'),
+            question_id=lambda answer: question_map[answer.question_id],
+        ),
+        batch_size=CLONE_BATCH_SIZE,
+    )
+    return quiz_map
+
+
+def deep_clone_course(course, author, title=None, copy_groups=False):
+    """
+    Глубокое копирование курса в одной транзакции.
+
+    Уникальные уроки и тесты курса (course_only) копируются вместе с вложениями,
+    вопросами и ответами; общие материалы базы знаний только привязываются к копии.
+    Файлы вложений и изображение курса не дублируются: копия ссылается на те же файлы.
+
+    Args:
+        course (Course): исходный курс.
+        author (User): автор копии.
+        title (str): название копии; по умолчанию «<название> (копия)».
+        copy_groups (bool): перенести назначения группам и групповые траектории.
+
+    Returns:
+        Course: созданная копия.
+    """
+    with transaction.atomic():
+        new_course = Course(
+            title=title or _unique_title(course.title, author),
+            description=course.description,
+            image=course.image.name if course.image else None,
+            author=author,
+            directory_id=course.directory_id,
+        )
+        new_course.save()
+
+        # Уроки: уникальные копируем, общие привязываем
+        lessons = list(course.lessons.order_by('order', 'pk'))
+        own_lessons = [lesson for lesson in lessons if lesson.course_only]
+        new_lessons = Lesson.objects.bulk_create(
+            _copy_rows(own_lessons, search_vector=None),
+            batch_size=CLONE_BATCH_SIZE,
+        )
+        lesson_map = {lesson.pk: lesson.pk for lesson in lessons if not lesson.course_only}
+        lesson_map.update({old.pk: new.pk for old, new in zip(own_lessons, new_lessons)})
+
+        CourseLesson.objects.bulk_create(
+            [CourseLesson(course_id=new_course.pk, lesson_id=lesson_id) for lesson_id in lesson_map.values()],
+            batch_size=CLONE_BATCH_SIZE,
+        )
+
+        # Вложения ссылаются на тот же файл в хранилище
+        LessonAttachment.objects.bulk_create(
+            _copy_rows(
+                LessonAttachment.objects.filter(lesson_id__in=[lesson.pk for lesson in own_lessons]),
+                lesson_id=lambda attachment: lesson_map[attachment.lesson_id],
+            ),
+            batch_size=CLONE_BATCH_SIZE,
+        )
+
+        # Тесты: уникальные копируем (включая финальный), общие привязываем
+        quizzes = list(course.quizzes.all())
+        own_quizzes = [quiz for quiz in quizzes if quiz.course_only]
+        final_quiz = course.final_quiz
+        if final_quiz and final_quiz.course_only and final_quiz not in own_quizzes:
+            own_quizzes.append(final_quiz)
+        quiz_map = {quiz.pk: quiz.pk for quiz in quizzes if not quiz.course_only}
+        quiz_map.update(_clone_quizzes(own_quizzes, new_course.title))
+
+        CourseQuiz.objects.bulk_create(
+            [
+                CourseQuiz(course_id=new_course.pk, quiz_id=quiz_map[quiz.pk])
+                for quiz in quizzes
+            ],
+            batch_size=CLONE_BATCH_SIZE,
+        )
+        if final_quiz:
+            new_course.final_quiz_id = quiz_map.get(final_quiz.pk, final_quiz.pk)
+            new_course.save(update_fields=['final_quiz'])
+
+        if copy_groups:
+            group_ids = list(course.assigned_groups.values_list('id', flat=True))
+            CourseGroup.objects.bulk_create(
+                [CourseGroup(course_id=new_course.pk, group_id=group_id) for group_id in group_ids]
+            )
+            templates = list(GroupLessonTrajectory.objects.filter(course=course))
+            new_templates = GroupLessonTrajectory.objects.bulk_create(
+                _copy_rows(templates, course_id=new_course.pk)
+            )
+            template_map = {old.pk: new.pk for old, new in zip(templates, new_templates)}
+            GroupTrajectoryLesson.objects.bulk_create(
+                [
+                    GroupTrajectoryLesson(
+                        grouplessontrajectory_id=template_map[row.grouplessontrajectory_id],
+                        lesson_id=lesson_map[row.lesson_id],
+                    )
+                    for row in GroupTrajectoryLesson.objects.filter(grouplessontrajectory_id__in=template_map)
+                    if row.lesson_id in lesson_map
+                ],
+                batch_size=CLONE_BATCH_SIZE,
+            )
+
+    return new_course
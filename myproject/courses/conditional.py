@@ -0,0 +1,136 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+
+from myapp import cache as cache_tools
+from myapp.learning_state import CONTENT_NAMESPACE, user_namespace
+from .models import Course, Lesson
+
+
+def _can_use_validators(request):
+    """
+    Условные ответы только для GET учеников и только без ожидающих сообщений:
+    страница staff зависит от назначений других пользователей,
+    а сообщения выводятся один раз и не должны теряться в 304.
+    """
+    user = request.user
+    return (
+        request.method in ('GET', 'HEAD')
+        and user.is_authenticated
+        and not user.is_staff
+        and not get_messages(request)
+    )
+
+
+def _user_versions(user_id, course_id):
+    """
+    Версии из кэша одним обращением: прогресс пользователя, его траектории
+    и состав материалов (массовые привязки не меняют updated_at).
+    """
+    namespaces = [CONTENT_NAMESPACE, user_namespace(user_id), f'trajectory:user:{user_id}']
+    if course_id:
+        namespaces.append(f'trajectory:course:{course_id}')
+    return cache_tools.namespace_versions(*namespaces)
+
+
+def _etag(request, *parts):
+    # CSRF-cookie входит в ETag: после её смены в форме страницы нужен новый токен
+    raw = '|'.join(map(str, (request.user.pk, request.META.get('CSRF_COOKIE', ''), *parts)))
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _last_modified(timestamps, versions):
+    # Версии — метки time.time_ns() момента последнего изменения состояния пользователя
+    moments = [ts for ts in timestamps if ts]
+    moments += [
+        datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+        for version in versions.values() if isinstance(version, int)
+    ]
+    return max(moments) if moments else None
+
+
+def _course_state(slug):
+    """Одна короткая агрегирующая выборка: время изменения курса и его материалов"""
+    return Course.objects.filter(slug=slug).values('pk').annotate(
+        course_updated=Max('updated_at'),
+        lessons_updated=Max('lessons__updated_at'),
+        quizzes_updated=Max('quizzes__updated_at'),
+        final_quiz_updated=Max('final_quiz__updated_at'),
+        lessons_total=Count('lessons', distinct=True),
+        quizzes_total=Count('quizzes', distinct=True),
+    ).first()
+
+
+def _course_validators(request, slug):
+    if not _can_use_validators(request):
+        return None
+    if not hasattr(request, '_course_validators'):
+        state = _course_state(slug)
+        versions = _user_versions(request.user.pk, state['pk']) if state else {}
+        if state is None or None in versions.values():
+            # Кэш недоступен: без версий прогресс не меняет валидаторы — отдаём полный ответ
+            request._course_validators = None
+        else:
+            request._course_validators = (
+                _etag(request, 'course', *state.values(), *versions.values()),
+                _last_modified(
+                    [state['course_updated'], state['lessons_updated'],
+                     state['quizzes_updated'], state['final_quiz_updated']],
+                    versions,
+                ),
+            )
+    return request._course_validators
+
+
+def course_detail_etag(request, slug):
+    validators = _course_validators(request, slug)
+    return validators[0] if validators else None
+
+
+def course_detail_last_modified(request, slug):
+    validators = _course_validators(request, slug)
+    return validators[1] if validators else None
+
+
+def _lesson_state(lesson_id, course_slug):
+    queryset = Lesson.objects.filter(pk=lesson_id)
+    if course_slug:
+        queryset = queryset.filter(courses__slug=course_slug)
+    return queryset.values('pk').annotate(
+        lesson_updated=Max('updated_at'),
+        attachments_updated=Max('attachments__updated_at'),
+        attachments_total=Count('attachments', distinct=True),
+        courses_updated=Max('courses__updated_at'),
+        course_id=Max('courses__id'),
+    ).first()
+
+
+def _lesson_validators(request, course_slug, lesson_id):
+    if not lesson_id or not _can_use_validators(request):
+        return None
+    if not hasattr(request, '_lesson_validators'):
+        state = _lesson_state(lesson_id, course_slug)
+        versions = _user_versions(request.user.pk, state['course_id']) if state else {}
+        if state is None or None in versions.values():
+            request._lesson_validators = None
+        else:
+            request._lesson_validators = (
+                _etag(request, 'lesson', course_slug, *state.values(), *versions.values()),
+                _last_modified(
+                    [state['lesson_updated'], state['attachments_updated'], state['courses_updated']],
+                    versions,
+                ),
+            )
+    return request._lesson_validators
+
+
+def lesson_detail_etag(request, course_slug=None, lesson_id=None):
+    validators = _lesson_validators(request, course_slug, lesson_id)
+    return validators[0] if validators else None
+
+
+def lesson_detail_last_modified(request, course_slug=None, lesson_id=None):
+    validators = _lesson_validators(request, course_slug, lesson_id)
+    return validators[1] if validators else None
@@ -0,0 +1,170 @@
+import base64
+import binascii
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http.request import split_domain_port, validate_host
+
+
+# Время жизни закэшированного HTML урока (сек.)
+LESSON_CONTENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Увеличивается при изменении правил постобработки, чтобы не отдавать старый HTML
+LESSON_CONTENT_PIPELINE_VERSION = 3
+
+_IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[a-z][^>]*>', re.IGNORECASE)
+_SCRIPT_RE = re.compile(r'<script\b[^>]*>.*?</script\s*>', re.IGNORECASE | re.DOTALL)
+_EVENT_ATTR_RE = re.compile(r'\s+on[a-z]+\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+)', re.IGNORECASE)
+_EMPTY_PARAGRAPH_RE = re.compile(r'<p>(?:\s|&nbsp;|<br\s*/?>)*</p>', re.IGNORECASE)
+_DATA_URI_RE = re.compile(
+    r'data:image/(?P<subtype>[a-z0-9.+-]+);base64,(?P<data>[a-z0-9+/=\s]+)',
+    re.IGNORECASE
+)
+
+# Папка хранилища для изображений, извлечённых из HTML
+INLINE_IMAGES_DIR = 'inline_images'
+
+# SVG не извлекается: внутри <img> data: SVG инертен, а отдельный файл
+# с того же origin выполнит встроенный скрипт при открытии напрямую
+_IMAGE_EXTENSIONS = {
+    'jpeg': 'jpg',
+    'jpg': 'jpg',
+    'png': 'png',
+    'gif': 'gif',
+    'webp': 'webp',
+    'bmp': 'bmp',
+}
+
+_SRC_RE = re.compile(
+    r'(?P<prefix>\ssrc\s*=\s*["\'])https?://(?P<host>[^/"\']+)(?P<path>' + re.escape(settings.MEDIA_URL) + r')',
+    re.IGNORECASE
+)
+
+
+def _lesson_content_key(lesson_id):
+    return f'lesson_content:{lesson_id}'
+
+
+def lesson_attachments_fragment_key(lesson_id):
+    """Ключ фрагментного кэша блока вложений урока (см. lesson_detail.html)"""
+    return make_template_fragment_key('lesson_attachments', [lesson_id])
+
+
+def _content_revision(content):
+    """Ревизия содержимого урока: короткий хэш HTML и версии обработки"""
+    digest = hashlib.md5((content or '').encode('utf-8')).hexdigest()[:16]
+    return f'{LESSON_CONTENT_PIPELINE_VERSION}:{digest}'
+
+
+def _own_media_hosts():
+    return settings.MEDIA_HOSTS or [host for host in settings.ALLOWED_HOSTS if host != '*']
+
+
+def _relative_media_src(match):
+    # Ссылки на чужие хосты остаются как есть: /media/ там — не наши файлы
+    host = split_domain_port(match.group('host'))[0]
+    if not host or not validate_host(host, _own_media_hosts()):
+        return match.group(0)
+    return match.group('prefix') + match.group('path')
+
+
+def _process_img_tag(match):
+    tag = match.group(0)
+    # Абсолютные ссылки на собственные медиафайлы делаем относительными,
+    # чтобы картинка открывалась на любом хосте (CKEditor сохраняет полный URL)
+    tag = _SRC_RE.sub(_relative_media_src, tag)
+    if not re.search(r'\sloading\s*=', tag, re.IGNORECASE):
+        tag = tag[:4] + ' loading="lazy"' + tag[4:]
+    if not re.search(r'\sdecoding\s*=', tag, re.IGNORECASE):
+        tag = tag[:4] + ' decoding="async"' + tag[4:]
+    return tag
+
+
+def _strip_event_attrs(match):
+    return _EVENT_ATTR_RE.sub('', match.group(0))
+
+
+def process_lesson_html(content):
+    """
+    Постобработка HTML из CKEditor перед выводом на странице урока:
+    удаляет скрипты и обработчики событий, пустые абзацы,
+    добавляет ленивую загрузку изображениям.
+    """
+    if not content:
+        return ''
+    html = _SCRIPT_RE.sub('', content)
+    # Обработчики удаляются только внутри тегов: текст вида «on = ...» не трогаем
+    html = _TAG_RE.sub(_strip_event_attrs, html)
+    html = _EMPTY_PARAGRAPH_RE.sub('', html)
+    html = _IMG_TAG_RE.sub(_process_img_tag, html)
+    return html
+
+
+def get_rendered_lesson_content(lesson):
+    """
+    Возвращает обработанный HTML урока из кэша.
+    Запись хранит ревизию содержимого, поэтому изменённый урок
+    не получит устаревший HTML даже без явной инвалидации.
+    """
+    key = _lesson_content_key(lesson.pk)
+    revision = _content_revision(lesson.content)
+    cached = cache.get(key)
+    if cached and cached.get('revision') == revision:
+        return cached['html']
+
+    html = process_lesson_html(lesson.content)
+    cache.set(key, {'revision': revision, 'html': html}, LESSON_CONTENT_CACHE_TIMEOUT)
+    return html
+
+
+def invalidate_lesson_content(lesson_id):
+    """Сбрасывает кэш HTML урока"""
+    cache.delete(_lesson_content_key(lesson_id))
+
+
+def invalidate_lesson_attachments(lesson_id):
+    """Сбрасывает фрагментный кэш блока вложений урока"""
+    cache.delete(lesson_attachments_fragment_key(lesson_id))
+
+
+def _store_inline_image(match):
+    ext = _IMAGE_EXTENSIONS.get(match.group('subtype').lower())
+    if not ext:
+        return match.group(0)
+    try:
+        data = base64.b64decode(re.sub(r'\s+', '', match.group('data')), validate=True)
+    except (binascii.Error, ValueError):
+        return match.group(0)
+
+    # Имя файла — хэш содержимого: одинаковые картинки сохраняются один раз
+    name = f'{INLINE_IMAGES_DIR}/{hashlib.sha256(data).hexdigest()}.{ext}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return default_storage.url(name)
+
+
+def extract_inline_images(html):
+    """
+    Находит в HTML изображения, вставленные как data: URI (base64),
+    сохраняет их в медиахранилище и заменяет на обычные ссылки.
+    Возвращает (новый HTML, количество замен). Неподдерживаемые типы
+    и повреждённые данные остаются в HTML и в количество не входят.
+    """
+    if not html or 'data:image/' not in html:
+        return html, 0
+    replaced = 0
+
+    def replace(match):
+        nonlocal replaced
+        url = _store_inline_image(match)
+        if url != match.group(0):
+            replaced += 1
+        return url
+
+    return _DATA_URI_RE.sub(replace, html), replaced
@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.models import Group
-from .models import Course, Lesson, UserLessonTrajectory, Quiz, LessonAttachment
+from .models import Course, Lesson, UserLessonTrajectory, GroupLessonTrajectory, Quiz, LessonAttachment
 from django_ckeditor_5.fields import CKEditor5Widget
+from knowledge_base.forms import DirectoryChoiceField
 # from captcha.fields import CaptchaField
 import re
 
@@ -19,6 +20,7 @@ class CourseForm(forms.ModelForm):
     class Meta:
         model = Course
         fields = ['title', 'description', 'image', 'slug', 'directory', 'final_quiz', 'assigned_groups']
+        field_classes = {'directory': DirectoryChoiceField}
         quizzes = forms.ModelMultipleChoiceField(
             queryset=Quiz.objects.all(),
             required=False,
@@ -86,32 +88,29 @@ class CourseForm(forms.ModelForm):
         # ВАЖНО: Сохраняем старые группы ДО вызова super().save(),
         # потому что после него ManyToMany связи уже будут обновлены
         if self.instance and self.instance.pk:
-            old_groups = set(self.instance.assigned_groups.all())
+            old_group_ids = set(self.instance.assigned_groups.values_list('id', flat=True))
         else:
-            old_groups = set()
-        
-        # Получаем выбранные группы из формы
-        assigned_groups = self.cleaned_data.get('assigned_groups', [])
-        new_groups = set(assigned_groups)
+            old_group_ids = set()
         
         # Находим новые группы (которые были добавлены)
-        added_groups = new_groups - old_groups
+        assigned_groups = self.cleaned_data.get('assigned_groups', [])
+        added_groups = [group for group in assigned_groups if group.pk not in old_group_ids]
         
         # Сохраняем курс
         course = super().save(commit=commit)
         
+        # Назначение пользователям групп может затронуть тысячи строк —
+        # выполняется фоновой задачей (см. courses/jobs.py)
+        self.assignment_job = None
         if commit and added_groups:
-            # Назначаем курс пользователям из новых групп
-            from myapp.models import UserCourse
-            from django.contrib.auth.models import User
-            
-            for group in added_groups:
-                users_in_group = User.objects.filter(groups=group)
-                for user in users_in_group:
-                    UserCourse.objects.get_or_create(
-                        user=user,
-                        course=course
-                    )
+            from jobs.registry import enqueue
+            self.assignment_job = enqueue(
+                'courses.assign_groups',
+                {'course_id': course.pk, 'group_ids': [group.pk for group in added_groups]},
+                user=self.user,
+                description=f'Назначение курса «{course.title}» группам: '
+                            + ', '.join(group.name for group in added_groups),
+            )
         
         return course
 
@@ -119,6 +118,7 @@ class LessonForm(forms.ModelForm):
     class Meta:
         model = Lesson
         fields = ['title', 'content', 'video_id', 'courses', 'directory', 'order']
+        field_classes = {'directory': DirectoryChoiceField}
         widgets = {
             'content': CKEditor5Widget(
                 attrs={'class': 'django_ckeditor_5'}, 
@@ -224,6 +224,26 @@ class UserLessonTrajectoryForm(forms.ModelForm):
         return cleaned_data
 
 
+class GroupLessonTrajectoryForm(forms.ModelForm):
+    class Meta:
+        model = GroupLessonTrajectory
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        course = cleaned_data.get('course')
+        lessons = cleaned_data.get('lessons')
+
+        if course and lessons:
+            # Одним запросом находим уроки, которых нет в выбранном курсе
+            foreign = lessons.exclude(courses=course).values_list('title', flat=True)
+            if foreign:
+                raise forms.ValidationError(
+                    "Уроки не принадлежат выбранному курсу: " + ', '.join(foreign)
+                )
+        return cleaned_data
+
+
 class LessonAttachmentForm(forms.ModelForm):
     """Форма для прикрепления файла к уроку"""
     class Meta:
@@ -0,0 +1,40 @@
+from django.core.files.storage import default_storage
+
+from jobs.registry import job_handler
+
+from .models import Course, LessonAttachment
+from .services import assign_courses_to_users, users_in_groups
+
+
+@job_handler('courses.assign_groups')
+def assign_course_to_groups_job(job, course_id, group_ids):
+    """Фоновое назначение курса всем пользователям выбранных групп"""
+    if not Course.objects.filter(pk=course_id).exists():
+        return {'assigned': 0}
+
+    users = users_in_groups(group_ids)
+    job.set_progress(0, users.count())
+    assigned = assign_courses_to_users(users, [course_id], on_batch=job.set_progress)
+    return {'assigned': assigned}
+
+
+@job_handler('courses.delete_orphaned_files')
+def delete_orphaned_files_job(job, names):
+    """
+    Удаляет из хранилища файлы удалённых курсов и уроков. Копии курсов
+    ссылаются на те же файлы, поэтому файл, на который ещё есть ссылка, остаётся.
+    """
+    names = sorted(set(names))
+    referenced = set(
+        Course.objects.filter(image__in=names).values_list('image', flat=True)
+    ) | set(
+        LessonAttachment.objects.filter(file__in=names).values_list('file', flat=True)
+    )
+    job.set_progress(0, len(names))
+    deleted = 0
+    for done, name in enumerate(names, start=1):
+        if name not in referenced and default_storage.exists(name):
+            default_storage.delete(name)
+            deleted += 1
+        job.set_progress(done)
+    return {'deleted': deleted, 'kept': len(names) - deleted}
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from courses.content import extract_inline_images, invalidate_lesson_content
+from courses.models import Course, Lesson
+
+
+class Command(BaseCommand):
+    """
+    Разовая миграция: выносит base64-изображения из Lesson.content
+    и Course.description в медиахранилище и переписывает HTML на ссылки.
+    """
+    help = 'Извлекает встроенные base64-изображения из уроков и курсов в файлы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, сколько записей будет изменено',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        targets = [
+            (Lesson, 'content'),
+            (Course, 'description'),
+        ]
+
+        for model, field in targets:
+            queryset = model.objects.filter(**{f'{field}__contains': 'data:image/'}).only('pk', field)
+            updated = 0
+            images = 0
+
+            for obj in queryset.iterator(chunk_size=100):
+                if dry_run:
+                    updated += 1
+                    continue
+                original = getattr(obj, field)
+                html, count = extract_inline_images(original)
+                if not count or html == original:
+                    continue
+                # update() не вызывает save() и сигналы: slug, order и т.п. не трогаем,
+                # но updated_at меняем — от него зависят ETag страниц
+                model.objects.filter(pk=obj.pk).update(**{field: html, 'updated_at': timezone.now()})
+                if model is Lesson:
+                    invalidate_lesson_content(obj.pk)
+                updated += 1
+                images += count
+
+            verbose_name = model._meta.verbose_name_plural
+            if dry_run:
+                self.stdout.write(f'{verbose_name}: к обработке {updated}')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{verbose_name}: обновлено {updated}, изображений извлечено {images}'
+                ))
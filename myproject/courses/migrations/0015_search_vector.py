@@ -0,0 +1,80 @@
+# Generated manually for full-text search (tsvector + GIN + triggers)
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+LESSON_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION courses_lesson_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER courses_lesson_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content, search_vector ON courses_lesson
+    FOR EACH ROW EXECUTE FUNCTION courses_lesson_search_vector_update();
+
+UPDATE courses_lesson SET search_vector = NULL;
+"""
+
+LESSON_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS courses_lesson_search_vector_trigger ON courses_lesson;
+DROP FUNCTION IF EXISTS courses_lesson_search_vector_update();
+"""
+
+COURSE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION courses_course_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER courses_course_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector ON courses_course
+    FOR EACH ROW EXECUTE FUNCTION courses_course_search_vector_update();
+
+UPDATE courses_course SET search_vector = NULL;
+"""
+
+COURSE_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS courses_course_search_vector_trigger ON courses_course;
+DROP FUNCTION IF EXISTS courses_course_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_lesson_course_only'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='course_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='lesson_search_vector_idx'),
+        ),
+        migrations.RunSQL(LESSON_TRIGGER_SQL, LESSON_TRIGGER_REVERSE_SQL),
+        migrations.RunSQL(COURSE_TRIGGER_SQL, COURSE_TRIGGER_REVERSE_SQL),
+    ]
@@ -0,0 +1,22 @@
+# Generated manually for trigram autocomplete of lessons
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['title'], name='lesson_title_trgm_idx', opclasses=['gin_trgm_ops']
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated manually for group-level lesson trajectories
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('courses', '0016_lesson_title_trgm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupLessonTrajectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.course', verbose_name='Курс')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='auth.group', verbose_name='Группа')),
+                ('lessons', models.ManyToManyField(to='courses.lesson', verbose_name='Уроки в траектории')),
+            ],
+            options={
+                'verbose_name': 'Траектория уроков группы',
+                'verbose_name_plural': 'Траектории уроков групп',
+                'unique_together': {('group', 'course')},
+            },
+        ),
+    ]
@@ -1,12 +1,30 @@
 from django.db import models
-from django.db.models import Max
+from django.db.models import Count, Max
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User, Group
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.text import slugify
 from django_ckeditor_5.fields import CKEditor5Field
 
 from unidecode import unidecode
 
 from quizzes.models import Quiz
+from .content import extract_inline_images
+
+class CourseQuerySet(models.QuerySet):
+    """Запросы курсов для списков и карточек"""
+
+    def cards(self):
+        """
+        Курсы для карточек и списков: без тяжёлого HTML описания,
+        с количеством уроков и тестов (lessons_count, quizzes_count).
+        """
+        return self.defer('description', 'search_vector').annotate(
+            lessons_count=Count('lessons', distinct=True),
+            quizzes_count=Count('quizzes', distinct=True),
+        )
+
 
 class Course(models.Model):
     """
@@ -22,6 +40,7 @@ class Course(models.Model):
     description = CKEditor5Field('Описание курса', config_name='noTablesImages')
     author = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Автор")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
     image = models.ImageField(upload_to='course_images/', blank=True, null=True, verbose_name="Изображение курса")
     slug = models.SlugField(max_length=200, unique=True, blank=True)
     directory = models.ForeignKey(
@@ -52,6 +71,10 @@ class Course(models.Model):
         verbose_name="Назначить группам",
         help_text="Пользователям из выбранных групп будет автоматически назначен этот курс"
     )
+    # Заполняется триггером БД (миграция 0015_search_vector): название — вес A, описание — вес B
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = CourseQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Курс'
@@ -62,9 +85,15 @@ class Course(models.Model):
                 name='unique_course_per_author'
             )
         ]
+        indexes = [
+            GinIndex(fields=['search_vector'], name='course_search_vector_idx'),
+        ]
 
 
     def save(self, *args, **kwargs):
+        # Вставленные base64-картинки выносим в файлы
+        if 'description' not in self.get_deferred_fields():
+            self.description, _ = extract_inline_images(self.description)
         if not self.slug:  # Генерируем slug только если он пустой
             transliterated_slug = unidecode(self.title)
             self.slug = slugify(transliterated_slug, allow_unicode=True)
@@ -80,6 +109,17 @@ class Course(models.Model):
         return self.title
     
 
+class LessonQuerySet(models.QuerySet):
+    """Запросы уроков для списков"""
+
+    def listing(self):
+        """
+        Уроки для списков, где нужен только заголовок: без HTML содержимого,
+        сразу с категорией.
+        """
+        return self.defer('content', 'search_vector').select_related('directory')
+
+
 class Lesson(models.Model):
     """
     Класс отвечающий за таблицу уроков в БД.
@@ -115,13 +155,27 @@ class Lesson(models.Model):
         verbose_name="Только для курса",
         help_text="Урок существует только внутри курса и не отображается в базе знаний"
     )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+    # Заполняется триггером БД (миграция 0015_search_vector): название — вес A, содержимое — вес B
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = LessonQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Урок'
         verbose_name_plural = 'Уроки'
         ordering = ['order']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='lesson_search_vector_idx'),
+            GinIndex(fields=['title'], name='lesson_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            # title__icontains компилируется в UPPER(title) LIKE UPPER(...) — нужен индекс по выражению
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='lesson_title_upper_trgm_idx'),
+        ]
 
     def save(self, *args, **kwargs):
+        # Вставленные base64-картинки выносим в файлы
+        if 'content' not in self.get_deferred_fields():
+            self.content, _ = extract_inline_images(self.content)
         # Автоматически вычисляем order, если он не указан или равен 0
         if not self.order or self.order == 0:
             if self.directory:
@@ -179,6 +233,27 @@ class UserLessonTrajectory(models.Model):
         return f"Траектория {self.user.username} для {self.course.title}"
 
 
+class GroupLessonTrajectory(models.Model):
+    """
+    Шаблон траектории курса для группы пользователей.
+    Участники группы видят только уроки шаблона; строки на каждого
+    пользователя не создаются. Личная траектория (UserLessonTrajectory)
+    имеет приоритет над групповой. См. courses/trajectories.py.
+    """
+
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, verbose_name="Группа")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, verbose_name="Курс")
+    lessons = models.ManyToManyField(Lesson, verbose_name="Уроки в траектории")
+
+    class Meta:
+        verbose_name = 'Траектория уроков группы'
+        verbose_name_plural = 'Траектории уроков групп'
+        unique_together = ('group', 'course')
+
+    def __str__(self):
+        return f"Траектория группы {self.group.name} для {self.course.title}"
+
+
 class LessonAttachment(models.Model):
     """
     Модель для хранения файлов, прикреплённых к уроку.
@@ -202,6 +277,10 @@ class LessonAttachment(models.Model):
         auto_now_add=True,
         verbose_name="Дата загрузки"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
 
     class Meta:
         verbose_name = 'Прикреплённый файл'
@@ -0,0 +1,303 @@
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from myapp.learning_state import bump_content_version, bump_user_learning_state
+from myapp.models import UserCourse
+from quizzes.models import Quiz
+from users.stats import mark_stats_stale
+from .models import Course, Lesson, UserLessonTrajectory
+from .trajectories import invalidate_course_trajectories
+
+
+CourseLesson = Lesson.courses.through
+CourseQuiz = Course.quizzes.through
+UserGroup = User.groups.through
+CourseGroup = Course.assigned_groups.through
+UserTrajectoryLesson = UserLessonTrajectory.lessons.through
+
+# Размер пачки INSERT при массовом назначении курсов
+ASSIGNMENT_BATCH_SIZE = 1000
+
+
+def parse_ids(values):
+    """Преобразует список строк из POST в множество целых ID, пропуская мусор"""
+    return {int(value) for value in values if str(value).strip().isdigit()}
+
+
+def _attach(through, owner_field, course_field, course_id, candidate_ids):
+    """
+    Одна выборка новых связей и одна вставка в промежуточную таблицу.
+    Конфликты (связь появилась параллельно) игнорируются.
+    """
+    existing = through.objects.filter(**{course_field: course_id}).values(owner_field)
+    new_ids = list(candidate_ids.exclude(id__in=existing).values_list('id', flat=True))
+    through.objects.bulk_create(
+        [through(**{owner_field: owner_id, course_field: course_id}) for owner_id in new_ids],
+        ignore_conflicts=True,
+    )
+    return len(new_ids)
+
+
+def attach_materials(course, lesson_ids, quiz_ids):
+    """
+    Массово добавляет уроки и тесты в курс. Уникальные материалы других курсов
+    (course_only) не добавляются.
+
+    Returns:
+        dict: количество добавленных и пропущенных уроков и тестов.
+    """
+    lesson_ids, quiz_ids = parse_ids(lesson_ids), parse_ids(quiz_ids)
+    with transaction.atomic():
+        lessons_added = _attach(
+            CourseLesson, 'lesson_id', 'course_id', course.id,
+            Lesson.objects.filter(id__in=lesson_ids, course_only=False),
+        ) if lesson_ids else 0
+        quizzes_added = _attach(
+            CourseQuiz, 'quiz_id', 'course_id', course.id,
+            Quiz.objects.filter(id__in=quiz_ids, course_only=False),
+        ) if quiz_ids else 0
+        # Промежуточные таблицы заполняются bulk_create без m2m_changed
+        if lessons_added or quizzes_added:
+            bump_content_version()
+    return {
+        'lessons_added': lessons_added,
+        'lessons_skipped': len(lesson_ids) - lessons_added,
+        'quizzes_added': quizzes_added,
+        'quizzes_skipped': len(quiz_ids) - quizzes_added,
+    }
+
+
+def detach_materials(course, lesson_ids, quiz_ids):
+    """
+    Массово убирает уроки и тесты из курса одним DELETE на таблицу.
+    Уникальные материалы курса (course_only) не отвязываются — их нужно удалять.
+
+    Returns:
+        dict: количество отвязанных и пропущенных уроков и тестов.
+    """
+    lesson_ids, quiz_ids = parse_ids(lesson_ids), parse_ids(quiz_ids)
+    with transaction.atomic():
+        lessons_removed, _ = CourseLesson.objects.filter(
+            course_id=course.id, lesson_id__in=lesson_ids, lesson__course_only=False
+        ).delete() if lesson_ids else (0, None)
+        quizzes_removed, _ = CourseQuiz.objects.filter(
+            course_id=course.id, quiz_id__in=quiz_ids, quiz__course_only=False
+        ).delete() if quiz_ids else (0, None)
+        if lessons_removed or quizzes_removed:
+            bump_content_version()
+    return {
+        'lessons_removed': lessons_removed,
+        'lessons_skipped': len(lesson_ids) - lessons_removed,
+        'quizzes_removed': quizzes_removed,
+        'quizzes_skipped': len(quiz_ids) - quizzes_removed,
+    }
+
+
+def move_materials(source, target, lesson_ids, quiz_ids):
+    """
+    Переносит уроки и тесты из одного курса в другой в одной транзакции.
+    Переносятся только материалы, которые действительно есть в исходном курсе;
+    уникальные материалы курса переносятся вместе со своей привязкой.
+
+    Returns:
+        dict: количество перенесённых и пропущенных уроков и тестов.
+    """
+    lesson_ids, quiz_ids = parse_ids(lesson_ids), parse_ids(quiz_ids)
+    result = {}
+    with transaction.atomic():
+        for kind, through, owner_field, ids in (
+            ('lessons', CourseLesson, 'lesson_id', lesson_ids),
+            ('quizzes', CourseQuiz, 'quiz_id', quiz_ids),
+        ):
+            links = through.objects.filter(course_id=source.id, **{f'{owner_field}__in': ids})
+            moving = list(links.values_list(owner_field, flat=True))
+            through.objects.bulk_create(
+                [through(**{owner_field: owner_id, 'course_id': target.id}) for owner_id in moving],
+                ignore_conflicts=True,
+            )
+            links.delete()
+            result[f'{kind}_moved'] = len(moving)
+            result[f'{kind}_skipped'] = len(ids) - len(moving)
+        if result['lessons_moved'] or result['quizzes_moved']:
+            bump_content_version()
+    return result
+
+
+def _missing_assignments(users, course_ids):
+    """
+    Генератор недостающих назначений: для каждого курса в SQL выбираются
+    только пользователи, у которых этого курса ещё нет.
+    """
+    for course_id in course_ids:
+        user_ids = users.exclude(
+            id__in=UserCourse.objects.filter(course_id=course_id).values('user_id')
+        ).values_list('id', flat=True).order_by()
+        for user_id in user_ids.iterator(chunk_size=ASSIGNMENT_BATCH_SIZE):
+            yield UserCourse(user_id=user_id, course_id=course_id)
+
+
+def assign_courses_to_users(users, course_ids, batch_size=ASSIGNMENT_BATCH_SIZE, on_batch=None):
+    """
+    Назначает курсы пользователям пачками bulk_create(ignore_conflicts=True).
+    Существующие назначения не трогаются, поэтому повторный запуск безопасен
+    и общая транзакция не нужна: каждая пачка фиксируется отдельно.
+
+    Args:
+        users (QuerySet): пользователи, которым назначаются курсы.
+        course_ids (Iterable[int]): ID назначаемых курсов.
+        batch_size (int): размер одной пачки INSERT.
+        on_batch (callable): вызывается после каждой пачки с числом созданных назначений.
+
+    Returns:
+        int: количество созданных назначений.
+    """
+    created = 0
+    pending = _missing_assignments(users, list(course_ids))
+    while True:
+        batch = list(islice(pending, batch_size))
+        if not batch:
+            break
+        UserCourse.objects.bulk_create(batch, ignore_conflicts=True)
+        # bulk_create не вызывает post_save — версии состояния обучения и статистику меняем явно
+        user_ids = {assignment.user_id for assignment in batch}
+        bump_user_learning_state(*user_ids)
+        mark_stats_stale(*user_ids, activity=False)
+        created += len(batch)
+        if on_batch:
+            on_batch(created)
+    return created
+
+
+def users_in_groups(group_ids):
+    """Пользователи из указанных групп без дублей (через подзапрос, без DISTINCT)"""
+    return User.objects.filter(
+        id__in=UserGroup.objects.filter(group_id__in=group_ids).values('user_id')
+    )
+
+
+def assign_course_to_groups(course, groups):
+    """Назначает курс всем пользователям выбранных групп. Возвращает число новых назначений"""
+    group_ids = [group.pk for group in groups]
+    if not group_ids:
+        return 0
+    return assign_courses_to_users(users_in_groups(group_ids), [course.pk])
+
+
+def assign_group_courses_to_user(user, group_ids):
+    """Назначает пользователю все курсы, закреплённые за группами. Возвращает число новых назначений"""
+    course_ids = Course.assigned_groups.through.objects.filter(
+        group_id__in=group_ids
+    ).values_list('course_id', flat=True).distinct()
+    return assign_courses_to_users(User.objects.filter(pk=user.pk), course_ids)
+
+
+def assign_group_courses_to_users(user_ids, batch_size=ASSIGNMENT_BATCH_SIZE):
+    """
+    Назначает каждому пользователю курсы всех его групп за один проход:
+    членства, курсы групп и имеющиеся назначения выбираются тремя запросами,
+    новые назначения вставляются пачками bulk_create. Используется при массовом
+    импорте пользователей, когда m2m_changed по группам не отправляется.
+
+    Returns:
+        int: количество созданных назначений (без уже существовавших).
+    """
+    user_groups = list(UserGroup.objects.filter(user_id__in=user_ids).values_list('user_id', 'group_id'))
+    group_courses = {}
+    for group_id, course_id in CourseGroup.objects.filter(
+        group_id__in={group_id for _, group_id in user_groups}
+    ).values_list('group_id', 'course_id'):
+        group_courses.setdefault(group_id, set()).add(course_id)
+
+    pairs = {
+        (user_id, course_id)
+        for user_id, group_id in user_groups
+        for course_id in group_courses.get(group_id, ())
+    }
+    # Уже существующие назначения не считаются созданными — как в _attach
+    if pairs:
+        pairs -= set(UserCourse.objects.filter(user_id__in=user_ids).values_list('user_id', 'course_id'))
+    UserCourse.objects.bulk_create(
+        [UserCourse(user_id=user_id, course_id=course_id) for user_id, course_id in pairs],
+        ignore_conflicts=True,
+        batch_size=batch_size,
+    )
+    assigned_user_ids = {user_id for user_id, _ in pairs}
+    bump_user_learning_state(*assigned_user_ids)
+    mark_stats_stale(*assigned_user_ids, activity=False)
+    return len(pairs)
+
+
+def update_course_assignments(course, add_user_ids, remove_user_ids):
+    """
+    Применяет изменения назначений курса: один bulk_create для добавленных
+    пользователей и один DELETE для снятых, в одной транзакции.
+    ID, попавшие в оба списка, считаются добавленными.
+
+    Returns:
+        dict: количество добавленных и снятых назначений.
+    """
+    add_user_ids, remove_user_ids = parse_ids(add_user_ids), parse_ids(remove_user_ids)
+    remove_user_ids -= add_user_ids
+    added = removed = 0
+    with transaction.atomic():
+        if add_user_ids:
+            existing = UserCourse.objects.filter(course_id=course.pk).values('user_id')
+            new_ids = list(
+                User.objects.filter(id__in=add_user_ids)
+                .exclude(id__in=existing)
+                .values_list('id', flat=True)
+            )
+            UserCourse.objects.bulk_create(
+                [UserCourse(user_id=user_id, course_id=course.pk) for user_id in new_ids],
+                ignore_conflicts=True,
+            )
+            added = len(new_ids)
+            bump_user_learning_state(*new_ids)
+            mark_stats_stale(*new_ids, activity=False)
+        if remove_user_ids:
+            removed = UserCourse.objects.filter(
+                course_id=course.pk, user_id__in=remove_user_ids
+            ).delete()[1].get(UserCourse._meta.label, 0)
+    return {'added': added, 'removed': removed}
+
+
+def materialize_group_trajectory(template):
+    """
+    Копирует групповую траекторию в личные траектории участников группы,
+    чтобы их можно было настраивать индивидуально. Пользователи, у которых
+    личная траектория по курсу уже есть, пропускаются.
+
+    Returns:
+        int: количество созданных личных траекторий.
+    """
+    course_id = template.course_id
+    with transaction.atomic():
+        existing = UserLessonTrajectory.objects.filter(course_id=course_id).values('user_id')
+        user_ids = list(
+            users_in_groups([template.group_id]).exclude(id__in=existing).values_list('id', flat=True)
+        )
+        UserLessonTrajectory.objects.bulk_create(
+            [UserLessonTrajectory(user_id=user_id, course_id=course_id) for user_id in user_ids],
+            ignore_conflicts=True,
+            batch_size=ASSIGNMENT_BATCH_SIZE,
+        )
+        # bulk_create с ignore_conflicts не возвращает первичные ключи — выбираем их отдельно
+        trajectory_ids = list(
+            UserLessonTrajectory.objects.filter(course_id=course_id, user_id__in=user_ids)
+            .values_list('pk', flat=True)
+        )
+        lesson_ids = list(template.lessons.values_list('id', flat=True))
+        UserTrajectoryLesson.objects.bulk_create(
+            [
+                UserTrajectoryLesson(userlessontrajectory_id=trajectory_id, lesson_id=lesson_id)
+                for trajectory_id in trajectory_ids
+                for lesson_id in lesson_ids
+            ],
+            ignore_conflicts=True,
+            batch_size=ASSIGNMENT_BATCH_SIZE,
+        )
+        # bulk_create не вызывает m2m_changed — сбрасываем кэш траекторий явно
+        invalidate_course_trajectories(course_id)
+    return len(trajectory_ids)
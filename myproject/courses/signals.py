@@ -1,7 +1,15 @@
-from django.db.models.signals import m2m_changed
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 
+from myapp import cache as cache_tools
+from myapp.learning_state import CONTENT_NAMESPACE
+from knowledge_base.cache import KB_TREE_NAMESPACE
+from .content import invalidate_lesson_content, invalidate_lesson_attachments
+from .models import Course, Lesson, LessonAttachment, UserLessonTrajectory, GroupLessonTrajectory
+from .services import assign_courses_to_users, assign_group_courses_to_user
+from .trajectories import invalidate_course_trajectories, invalidate_user_trajectories
+
 
 @receiver(m2m_changed, sender=User.groups.through)
 def assign_courses_on_group_change(sender, instance, action, pk_set, **kwargs):
@@ -10,16 +18,76 @@ def assign_courses_on_group_change(sender, instance, action, pk_set, **kwargs):
     При добавлении пользователя в группу - назначает ему все курсы этой группы.
     """
     # Реагируем только на добавление в группу (post_add)
-    if action == 'post_add' and pk_set:
-        from courses.models import Course
-        from myapp.models import UserCourse
-        
-        # Получаем все курсы, назначенные добавленным группам
-        courses = Course.objects.filter(assigned_groups__id__in=pk_set).distinct()
-        
-        # Назначаем курсы пользователю
-        for course in courses:
-            UserCourse.objects.get_or_create(
-                user=instance,
-                course=course
-            )
+    if action != 'post_add' or not pk_set:
+        return
+
+    if kwargs.get('reverse'):
+        # group.user_set.add(...): instance — группа, pk_set — ID пользователей
+        course_ids = Course.objects.filter(assigned_groups=instance).values_list('id', flat=True)
+        assign_courses_to_users(User.objects.filter(pk__in=pk_set), course_ids)
+    else:
+        assign_group_courses_to_user(instance, pk_set)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_lesson_cache(sender, instance, **kwargs):
+    """Сбрасывает кэш обработанного HTML и блока вложений при изменении урока."""
+    invalidate_lesson_content(instance.pk)
+    invalidate_lesson_attachments(instance.pk)
+
+
+@receiver(post_save, sender=LessonAttachment)
+@receiver(post_delete, sender=LessonAttachment)
+def invalidate_attachments_cache(sender, instance, **kwargs):
+    """Сбрасывает фрагментный кэш вложений при добавлении или удалении файла."""
+    invalidate_lesson_attachments(instance.lesson_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_trajectories_on_group_change(sender, instance, action, pk_set, reverse, **kwargs):
+    """Состав групп пользователя влияет на его траектории во всех курсах"""
+    if action in ('post_add', 'post_remove') and pk_set:
+        user_ids = pk_set if reverse else [instance.pk]
+    elif action == 'pre_clear':
+        # После очистки участников группы уже не узнать — собираем их до неё
+        user_ids = instance.user_set.values_list('id', flat=True) if reverse else [instance.pk]
+    else:
+        return
+    for user_id in user_ids:
+        invalidate_user_trajectories(user_id)
+
+
+@receiver(post_save, sender=UserLessonTrajectory)
+@receiver(post_delete, sender=UserLessonTrajectory)
+@receiver(post_save, sender=GroupLessonTrajectory)
+@receiver(post_delete, sender=GroupLessonTrajectory)
+def invalidate_trajectories_on_change(sender, instance, **kwargs):
+    invalidate_course_trajectories(instance.course_id)
+
+
+@receiver(m2m_changed, sender=UserLessonTrajectory.lessons.through)
+@receiver(m2m_changed, sender=GroupLessonTrajectory.lessons.through)
+def invalidate_trajectories_on_lessons_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_course_trajectories(instance.course_id)
+        return
+
+    # lesson.<траектория>_set.add(...): instance — урок, pk_set — ID траекторий
+    if action in ('post_add', 'post_remove') and pk_set:
+        trajectories = model.objects.filter(pk__in=pk_set)
+    elif action == 'pre_clear':
+        trajectories = model.objects.filter(lessons=instance)
+    else:
+        return
+    for course_id in trajectories.values_list('course_id', flat=True).distinct():
+        invalidate_course_trajectories(course_id)
+
+
+# Реестр инвалидации кэша: содержимое курсов и дерево базы знаний
+cache_tools.invalidates(Course, CONTENT_NAMESPACE, KB_TREE_NAMESPACE)
+cache_tools.invalidates(Lesson, CONTENT_NAMESPACE, KB_TREE_NAMESPACE)
+cache_tools.invalidates(LessonAttachment, CONTENT_NAMESPACE)
+cache_tools.invalidates(Lesson.courses.through, CONTENT_NAMESPACE)
+cache_tools.invalidates(Course.quizzes.through, CONTENT_NAMESPACE)
@@ -0,0 +1,157 @@
+// Пикер пользователей для назначения курса (create_course / edit_course).
+// Пользователи подгружаются страницами с сервера, в форму уходят только изменения:
+// assign_users — кому назначить курс, unassign_users — с кого снять.
+(function () {
+    const modalEl = document.getElementById('assignUsersModal');
+    if (!modalEl) return;
+
+    const SEARCH_DELAY = 300;
+    const searchUrl = modalEl.dataset.searchUrl;
+    const courseSlug = modalEl.dataset.courseSlug || '';
+    const initialCount = parseInt(modalEl.dataset.assignedCount || '0', 10);
+
+    const list = document.getElementById('allUsersList');
+    const searchInput = document.getElementById('userSearchInput');
+    const moreButton = document.getElementById('usersMoreButton');
+    const hiddenInputsContainer = document.getElementById('assignedUsersHiddenInputs');
+    const summaryEl = document.getElementById('assignedUsersSummary');
+    const saveButton = document.getElementById('assignUsersSaveButton');
+
+    // Применённые изменения (уходят с формой) и черновик внутри открытого окна
+    let added = new Set();
+    let removed = new Set();
+    let draftAdded = new Set();
+    let draftRemoved = new Set();
+
+    const state = { query: '', page: 1, request: 0 };
+    let timer = null;
+
+    function isChecked(user) {
+        const id = String(user.id);
+        if (draftAdded.has(id)) return true;
+        if (draftRemoved.has(id)) return false;
+        return Boolean(user.assigned);
+    }
+
+    function renderUser(user) {
+        const item = document.createElement('li');
+        item.className = 'list-group-item d-flex align-items-center justify-content-between user-item';
+
+        const info = document.createElement('div');
+        info.className = 'flex-grow-1';
+        const name = document.createElement('div');
+        name.className = 'fw-semibold';
+        name.textContent = user.name;
+        const meta = document.createElement('div');
+        meta.className = 'text-muted small';
+        meta.textContent = user.username + (user.email ? ' · ' + user.email : '');
+        info.append(name, meta);
+
+        const check = document.createElement('div');
+        check.className = 'form-check ms-3';
+        const checkbox = document.createElement('input');
+        checkbox.type = 'checkbox';
+        checkbox.className = 'form-check-input user-select-checkbox';
+        checkbox.value = user.id;
+        checkbox.checked = isChecked(user);
+        checkbox.addEventListener('change', function () {
+            const id = String(user.id);
+            draftAdded.delete(id);
+            draftRemoved.delete(id);
+            if (checkbox.checked && !user.assigned) draftAdded.add(id);
+            if (!checkbox.checked && user.assigned) draftRemoved.add(id);
+        });
+        check.appendChild(checkbox);
+
+        item.append(info, check);
+        return item;
+    }
+
+    function loadUsers(append) {
+        const requestId = ++state.request;
+        const params = new URLSearchParams({ q: state.query, page: state.page });
+        if (courseSlug) params.set('course', courseSlug);
+        moreButton.style.display = 'none';
+
+        fetch(`${searchUrl}?${params}`)
+            .then(response => {
+                if (!response.ok) throw new Error('Ошибка загрузки пользователей');
+                return response.json();
+            })
+            .then(data => {
+                // Ответ на устаревший запрос (пользователь уже ввёл новый текст)
+                if (requestId !== state.request) return;
+                if (!append) list.innerHTML = '';
+                data.users.forEach(user => list.appendChild(renderUser(user)));
+                if (!list.children.length) {
+                    list.innerHTML = '<li class="list-group-item text-muted">Пользователи не найдены</li>';
+                }
+                moreButton.style.display = data.has_more ? '' : 'none';
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                list.innerHTML = '<li class="list-group-item text-danger">Не удалось загрузить пользователей</li>';
+            });
+    }
+
+    function reload() {
+        state.page = 1;
+        loadUsers(false);
+    }
+
+    function applyChanges() {
+        added = new Set(draftAdded);
+        removed = new Set(draftRemoved);
+
+        hiddenInputsContainer.innerHTML = '';
+        [['assign_users', added], ['unassign_users', removed]].forEach(([name, ids]) => {
+            ids.forEach(id => {
+                const input = document.createElement('input');
+                input.type = 'hidden';
+                input.name = name;
+                input.value = id;
+                hiddenInputsContainer.appendChild(input);
+            });
+        });
+
+        const total = initialCount + added.size - removed.size;
+        let text = total ? `Назначено пользователей: ${total}` : 'Пользователи не выбраны';
+        if (added.size || removed.size) {
+            text += ` (+${added.size} / −${removed.size})`;
+        }
+        summaryEl.textContent = text;
+    }
+
+    modalEl.addEventListener('show.bs.modal', function () {
+        // Каждое открытие начинается с уже применённого выбора
+        draftAdded = new Set(added);
+        draftRemoved = new Set(removed);
+        state.query = searchInput.value = '';
+        reload();
+    });
+
+    searchInput.addEventListener('input', function () {
+        clearTimeout(timer);
+        timer = setTimeout(() => {
+            state.query = searchInput.value.trim();
+            reload();
+        }, SEARCH_DELAY);
+    });
+    searchInput.addEventListener('keydown', function (event) {
+        if (event.key === 'Enter') event.preventDefault();
+    });
+
+    moreButton.addEventListener('click', function () {
+        state.page += 1;
+        loadUsers(true);
+    });
+
+    saveButton.addEventListener('click', function () {
+        // Применяем выбор только при нажатии "Сохранить выбор"
+        applyChanges();
+        const modalInstance = bootstrap.Modal.getInstance(modalEl);
+        if (modalInstance) modalInstance.hide();
+    });
+
+    applyChanges();
+})();
@@ -1,3 +1,215 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from myapp.models import UserCourse
+from quizzes.models import Quiz
+from .content import extract_inline_images, process_lesson_html
+from .models import Course, Lesson
+from .services import assign_group_courses_to_users
+
+
+# Большой HTML: если колонка попадёт в SELECT, списки будут тянуть его на каждую строку
+HEAVY_HTML = '<p>' + 'Текст урока. ' * 5000 + '</p>'
+
+
+class ListQueryBudgetMixin:
+    """Общие проверки списков: число запросов не растёт, тяжёлые колонки не выбираются"""
+
+    def _add_courses(self, count, start=0):
+        courses = []
+        for index in range(start, start + count):
+            course = Course.objects.create(title=f'Курс {index}', description=HEAVY_HTML, author=self.staff)
+            for lesson_index in range(3):
+                lesson = Lesson.objects.create(title=f'Урок {index}.{lesson_index}', content=HEAVY_HTML)
+                lesson.courses.add(course)
+            course.quizzes.add(Quiz.objects.create(name=f'Тест {index}'))
+            courses.append(course)
+        return courses
+
+    def _get(self, url):
+        # Карточки курсов кэшируются по версиям — меряем построение страницы, а не попадание в кэш
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, context.captured_queries
+
+    def assertColumnNotSelected(self, queries, table, column):
+        for query in queries:
+            self.assertNotIn(f'"{table}"."{column}"', query['sql'])
+
+
+class CourseListQueryBudgetTest(ListQueryBudgetMixin, TestCase):
+    """Список курсов ученика: без описаний курсов и без запросов на каждую карточку"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='password', is_staff=True)
+        cls.learner = User.objects.create_user('learner', password='password')
+
+    def setUp(self):
+        self.client.force_login(self.learner)
+        self.url = reverse('courses:course_detail_all')
+
+    def _assign(self, courses):
+        UserCourse.objects.bulk_create([UserCourse(user=self.learner, course=course) for course in courses])
+
+    def test_queries_do_not_grow_with_courses(self):
+        self._assign(self._add_courses(1))
+        _, queries = self._get(self.url)
+        baseline = len(queries)
+
+        self._assign(self._add_courses(10, start=1))
+        _, queries = self._get(self.url)
+        self.assertEqual(len(queries), baseline)
+
+    def test_description_is_deferred(self):
+        self._assign(self._add_courses(2))
+        response, queries = self._get(self.url)
+
+        self.assertColumnNotSelected(queries, 'courses_course', 'description')
+        for item in response.context['courses_data']:
+            self.assertIn('description', item['course'].get_deferred_fields())
+
+
+class AvailableLessonsQueryBudgetTest(ListQueryBudgetMixin, TestCase):
+    """Окно «Добавить материалы»: уроки без HTML содержимого, запросов не больше при любом числе уроков"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='password', is_staff=True)
+        cls.target = Course.objects.create(title='Целевой курс', description=HEAVY_HTML, author=cls.staff)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        self.url = reverse('courses:get_available_lessons', kwargs={'course_slug': self.target.slug})
+
+    def test_queries_do_not_grow_with_lessons(self):
+        self._add_courses(1)
+        _, queries = self._get(self.url)
+        baseline = len(queries)
+
+        self._add_courses(10, start=1)
+        response, queries = self._get(self.url)
+        self.assertEqual(len(queries), baseline)
+        self.assertEqual(len(response.json()['lessons']), 30)
+
+    def test_content_is_not_selected(self):
+        self._add_courses(2)
+        _, queries = self._get(self.url)
+        self.assertColumnNotSelected(queries, 'courses_lesson', 'content')
+        self.assertColumnNotSelected(queries, 'courses_course', 'description')
+
+
+class LessonAdminQueryBudgetTest(ListQueryBudgetMixin, TestCase):
+    """Список уроков в админке: без HTML содержимого, курсы и вложения — без запросов на строку"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('admin', password='password')
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+        self.url = reverse('admin:courses_lesson_changelist')
+
+    def test_queries_do_not_grow_with_lessons(self):
+        self._add_courses(1)
+        _, queries = self._get(self.url)
+        baseline = len(queries)
+
+        self._add_courses(10, start=1)
+        _, queries = self._get(self.url)
+        self.assertEqual(len(queries), baseline)
+
+    def test_content_is_deferred(self):
+        self._add_courses(2)
+        response, queries = self._get(self.url)
+
+        self.assertColumnNotSelected(queries, 'courses_lesson', 'content')
+        for lesson in response.context['cl'].result_list:
+            self.assertIn('content', lesson.get_deferred_fields())
+
+
+class ListingQuerySetTest(TestCase):
+    """cards() и listing() откладывают тяжёлые колонки и не выбирают их в SQL"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author', password='password')
+        course = Course.objects.create(title='Курс', description=HEAVY_HTML, author=author)
+        Lesson.objects.create(title='Урок', content=HEAVY_HTML).courses.add(course)
+
+    def test_cards_defers_description(self):
+        with CaptureQueriesContext(connection) as context:
+            course = Course.objects.cards().get()
+        self.assertIn('description', course.get_deferred_fields())
+        self.assertNotIn('"courses_course"."description"', context.captured_queries[0]['sql'])
+        self.assertEqual(course.lessons_count, 1)
+
+    def test_listing_defers_content(self):
+        with CaptureQueriesContext(connection) as context:
+            lesson = Lesson.objects.listing().get()
+        self.assertIn('content', lesson.get_deferred_fields())
+        self.assertNotIn('"courses_lesson"."content"', context.captured_queries[0]['sql'])
+
+
+class ProcessLessonHtmlTest(SimpleTestCase):
+    """Постобработка HTML урока: обработчики событий удаляются только из тегов"""
+
+    def test_event_attrs_are_removed_from_tags(self):
+        html = process_lesson_html('<p onclick="alert(1)" class="x">Текст</p><a href="#" onmouseover=steal()>ссылка</a>')
+        self.assertEqual(html, '<p class="x">Текст</p><a href="#">ссылка</a>')
+
+    def test_plain_text_with_on_attribute_syntax_is_unchanged(self):
+        html = '<p>Условие: if online = true, а в коде — button.onclick = handler</p><pre> onload="init()"</pre>'
+        self.assertEqual(process_lesson_html(html), html)
+
+    @override_settings(MEDIA_HOSTS=['lms.example.com'])
+    def test_own_host_media_src_becomes_relative(self):
+        html = process_lesson_html('<img src="https://lms.example.com:8005/media/uploads/a.png">')
+        self.assertIn('src="/media/uploads/a.png"', html)
+
+    @override_settings(MEDIA_HOSTS=['lms.example.com'])
+    def test_foreign_host_media_src_is_unchanged(self):
+        html = process_lesson_html('<img src="https://cdn.other.org/media/uploads/a.png">')
+        self.assertIn('src="https://cdn.other.org/media/uploads/a.png"', html)
+
+
+class ExtractInlineImagesTest(SimpleTestCase):
+    """Неизвлекаемые data: URI остаются в HTML и не считаются заменами"""
+
+    def test_unsupported_and_broken_images_are_not_counted(self):
+        html = (
+            '<img src="data:image/svg+xml;base64,PHN2Zz48L3N2Zz4=">'
+            '<img src="data:image/png;base64,abc">'
+        )
+        self.assertEqual(extract_inline_images(html), (html, 0))
+
+
+class AssignGroupCoursesToUsersTest(TestCase):
+    """Назначение курсов групп при импорте считает только новые назначения"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author', password='password', is_staff=True)
+        cls.group = Group.objects.create(name='Группа')
+        cls.first = Course.objects.create(title='Курс 1', author=author)
+        cls.second = Course.objects.create(title='Курс 2', author=author)
+        cls.first.assigned_groups.add(cls.group)
+        cls.second.assigned_groups.add(cls.group)
+        cls.users = [User.objects.create_user(f'user{index}', password='password') for index in range(2)]
+        User.groups.through.objects.bulk_create(
+            [User.groups.through(user=user, group=cls.group) for user in cls.users]
+        )
+
+    def test_existing_assignments_are_not_counted(self):
+        UserCourse.objects.create(user=self.users[0], course=self.first)
+        user_ids = [user.pk for user in self.users]
+
+        self.assertEqual(assign_group_courses_to_users(user_ids), 3)
+        self.assertEqual(UserCourse.objects.filter(user_id__in=user_ids).count(), 4)
+        self.assertEqual(assign_group_courses_to_users(user_ids), 0)
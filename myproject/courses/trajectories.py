@@ -0,0 +1,101 @@
+from myapp import cache as cache_tools
+from myapp.learning_state import bump_user_learning_state
+from myapp.models import UserCourse
+
+from .models import GroupLessonTrajectory, UserLessonTrajectory
+
+
+# Время жизни закэшированной траектории (сек.); актуальность обеспечивают версии ключей
+TRAJECTORY_CACHE_TIMEOUT = 60 * 60 * 24
+
+UserTrajectoryLesson = UserLessonTrajectory.lessons.through
+GroupTrajectoryLesson = GroupLessonTrajectory.lessons.through
+
+
+def _course_namespace(course_id):
+    return f'trajectory:course:{course_id}'
+
+
+def _user_namespace(user_id):
+    return f'trajectory:user:{user_id}'
+
+
+def _trajectory_key(user_id, course_id):
+    course_ns, user_ns = _course_namespace(course_id), _user_namespace(user_id)
+    versions = cache_tools.namespace_versions(course_ns, user_ns)
+    return cache_tools.make_key(
+        'trajectory_lessons', course_id, user_id,
+        version=f'{versions[course_ns]}.{versions[user_ns]}',
+    )
+
+
+def invalidate_course_trajectories(course_id):
+    """
+    Сбрасывает траектории всех пользователей курса (изменён личный или групповой шаблон).
+    От траектории зависят прогресс и опыт — сбрасывается и состояние обучения
+    назначенных на курс пользователей.
+    """
+    cache_tools.bump(_course_namespace(course_id))
+    bump_user_learning_state(*UserCourse.objects.filter(course_id=course_id).values_list('user_id', flat=True))
+
+
+def invalidate_user_trajectories(user_id):
+    """Сбрасывает все траектории и состояние обучения пользователя (изменился состав его групп)"""
+    cache_tools.bump(_user_namespace(user_id))
+    bump_user_learning_state(user_id)
+
+
+def _resolve_lesson_ids(user_id, course_id):
+    # Личная траектория важнее групповой
+    override_id = UserLessonTrajectory.objects.filter(
+        user_id=user_id, course_id=course_id
+    ).values_list('pk', flat=True).first()
+    if override_id is not None:
+        return list(
+            UserTrajectoryLesson.objects.filter(userlessontrajectory_id=override_id)
+            .values_list('lesson_id', flat=True)
+        )
+
+    templates = GroupLessonTrajectory.objects.filter(
+        course_id=course_id, group__user__id=user_id
+    ).values_list('pk', flat=True)
+    template_ids = list(templates)
+    if not template_ids:
+        return None
+    # Пользователь из нескольких групп видит объединение их траекторий
+    return list(
+        GroupTrajectoryLesson.objects.filter(grouplessontrajectory_id__in=template_ids)
+        .values_list('lesson_id', flat=True).distinct()
+    )
+
+
+def get_trajectory_lesson_ids(user, course):
+    """
+    Эффективный набор уроков курса для пользователя:
+    личная траектория, иначе объединение траекторий его групп.
+    Возвращает frozenset ID уроков или None, если ограничений нет (доступны все уроки).
+    Результат кэшируется; ключ содержит версии курса и пользователя.
+    """
+    if not user.is_authenticated:
+        return None
+    lesson_ids = cache_tools.get_or_set(
+        _trajectory_key(user.pk, course.pk),
+        lambda: _resolve_lesson_ids(user.pk, course.pk),
+        TRAJECTORY_CACHE_TIMEOUT,
+    )
+    return None if lesson_ids is None else frozenset(lesson_ids)
+
+
+def get_trajectory_lessons(user, course, queryset=None):
+    """Уроки курса с учётом траектории пользователя"""
+    lessons = course.lessons.all() if queryset is None else queryset
+    lesson_ids = get_trajectory_lesson_ids(user, course)
+    if lesson_ids is not None:
+        lessons = lessons.filter(id__in=lesson_ids)
+    return lessons
+
+
+def is_lesson_in_trajectory(user, course, lesson_id):
+    """Доступен ли урок пользователю по его траектории"""
+    lesson_ids = get_trajectory_lesson_ids(user, course)
+    return lesson_ids is None or lesson_id in lesson_ids
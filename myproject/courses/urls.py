@@ -16,6 +16,7 @@ urlpatterns = [
     path('course/<int:user_id>/<slug:slug>/cancel_assignment/', course_views.cancel_course_assignment, name='cancel_course_assignment'),
     path('lesson/<int:lesson_id>/delete/', course_views.delete_lesson, name='delete_lesson'),
     path('course/<slug:course_slug>/lesson/<int:lesson_id>/complete/', course_views.complete_lesson, name='complete_lesson'),
+    path('course/<slug:slug>/clone/', course_views.clone_course, name='clone_course'),
     path('course/<slug:slug>/edit/', course_views.edit_course, name='edit_course'),
     path('lesson/<int:lesson_id>/edit/', course_views.edit_lesson, name='edit_lesson'),
     path('course/<slug:course_slug>/redir_to_quiz/', course_views.redir_to_quiz, name='redir_to_quiz'),
@@ -24,5 +25,8 @@ urlpatterns = [
     path('course/<slug:course_slug>/available-quizzes/', course_views.get_available_quizzes, name='get_available_quizzes'),
     path('course/<slug:course_slug>/add-quiz/', course_views.add_quiz_to_course, name='add_quiz_to_course'),
     path('course/<slug:course_slug>/add-materials/', course_views.add_materials_to_course, name='add_materials_to_course'),
+    path('course/<slug:course_slug>/remove-materials/', course_views.remove_materials_from_course, name='remove_materials_from_course'),
+    path('course/<slug:course_slug>/move-materials/', course_views.move_materials_between_courses, name='move_materials_between_courses'),
+    path('assignable-users/', course_views.get_assignable_users, name='get_assignable_users'),
     path('attachment/<int:attachment_id>/delete/', course_views.delete_attachment, name='delete_attachment'),
 ]
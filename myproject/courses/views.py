@@ -3,17 +3,35 @@ from django.utils import timezone
 from django.utils.http import url_has_allowed_host_and_scheme
 from django.shortcuts import render, redirect, get_object_or_404
 from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import TrigramWordSimilarity
 from django.http import JsonResponse
 from django.contrib.auth.models import User
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.views.decorators.http import require_POST, require_http_methods
-from django.views.generic import CreateView, DetailView, ListView
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST, require_http_methods
+from django.views.generic import CreateView, DetailView, TemplateView
 
+from jobs.registry import enqueue
 from quizzes.models import Quiz
+from .cloning import deep_clone_course
+from .conditional import (
+    course_detail_etag, course_detail_last_modified,
+    lesson_detail_etag, lesson_detail_last_modified,
+)
+from .content import get_rendered_lesson_content
+from .trajectories import get_trajectory_lesson_ids, get_trajectory_lessons, is_lesson_in_trajectory
 from .forms import CourseForm, LessonForm, LessonAttachmentsForm
-from .models import Course, Lesson, UserLessonTrajectory, LessonAttachment
+from .services import (
+    attach_materials, detach_materials, move_materials,
+    assign_courses_to_users, parse_ids, update_course_assignments,
+)
+from .models import Course, Lesson, LessonAttachment
+from myapp.learning_state import get_learning_state_cached
 from myapp.models import UserProgress, UserCourse, QuizResult
 from myapp.views import is_admin, is_author_or_admin
 
@@ -57,6 +75,13 @@ class CourseDetailView(LoginRequiredMixin, DetailView):
         return self.get(request, *args, **kwargs)
 
 
+    # Браузер всегда перепроверяет страницу, повторный визит без изменений получает 304
+    @method_decorator(cache_control(private=True, no_cache=True))
+    @method_decorator(condition(etag_func=course_detail_etag, last_modified_func=course_detail_last_modified))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
     def get_user_course(self):
         """Получение UserCourse для текущего пользователя"""
         if not self.request.user.is_authenticated:
@@ -68,25 +93,17 @@ class CourseDetailView(LoginRequiredMixin, DetailView):
 
 
     def get_trajectory(self):
-        """Получение траектории уроков для пользователя"""
-        if not self.request.user.is_authenticated:
-            return None
-        return UserLessonTrajectory.objects.filter(
-            user=self.request.user,
-            course=self.object
-        ).first()
+        """ID уроков траектории пользователя (личной или групповой); None — без ограничений"""
+        return get_trajectory_lesson_ids(self.request.user, self.object)
 
 
     def get_lessons_and_ids(self, trajectory):
         """Получение списка уроков и их ID"""
-        if trajectory:
-            lessons = trajectory.lessons.all()
-            total_lessons = lessons.count()  # Обновляем количество уроков, если есть траектория
-            lesson_ids = lessons.values_list('id', flat=True)  # Получаем ID уроков в траектории
-        else:
-            lessons = self.object.lessons.all()
-            total_lessons = lessons.count()
-            lesson_ids = lessons.values_list('id', flat=True)
+        lessons = self.object.lessons.listing()
+        if trajectory is not None:
+            lessons = lessons.filter(id__in=trajectory)
+        total_lessons = lessons.count()
+        lesson_ids = lessons.values_list('id', flat=True)
         return lessons, lesson_ids, total_lessons
 
     
@@ -293,11 +310,9 @@ def reset_course_progress(request, slug):
     return redirect('courses:course_detail', slug=slug)
 
 
-class CourseListView(ListView):
+class CourseListView(TemplateView):
     """CBV для отображения списка всех доступных курсов пользователя"""
     template_name = 'courses/all_courses_list.html'
-    paginate_by = 12
-    model = UserCourse
 
 
     def dispatch(self, request, *args, **kwargs):
@@ -306,36 +321,43 @@ class CourseListView(ListView):
         return super().dispatch(request, *args, **kwargs)
 
 
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data(object_list=object_list, **kwargs)
+    def build_courses_data(self):
+        """Карточки курсов пользователя с прогрессом (строятся только при промахе кэша)"""
         user_courses_qs = UserCourse.objects.filter(
             user=self.request.user
-        ).select_related('course')
+        ).only('course_id', 'is_completed')
+
+        # Карточки курсов без HTML описания, количество материалов — аннотациями
+        user_courses = list(user_courses_qs)
+        course_ids = [uc.course_id for uc in user_courses]
+        courses = Course.objects.cards().prefetch_related(
+            Prefetch('quizzes', queryset=Quiz.objects.only('id', 'name'))
+        ).in_bulk(course_ids)
+
+        # Прогресс всех курсов — два запроса вместо двух на каждый курс
+        completed_by_course = dict(
+            UserProgress.objects.filter(user=self.request.user, course_id__in=course_ids, completed=True)
+            .values('course_id').annotate(completed=Count('id')).values_list('course_id', 'completed')
+        )
+        passed_quiz_titles = set(
+            QuizResult.objects.filter(user=self.request.user, passed=True)
+            .values_list('quiz_title', flat=True).distinct()
+        )
 
         courses_data = []
-        for uc in user_courses_qs:
-            course = uc.course
-            total_lessons = course.lessons.count()
-            total_quizzes = course.quizzes.count()
+        for uc in user_courses:
+            course = courses[uc.course_id]
+            total_lessons = course.lessons_count
+            total_quizzes = course.quizzes_count
             total_materials = total_lessons + total_quizzes
 
             # Вычисляем прогресс по урокам
-            completed_lessons = UserProgress.objects.filter(
-                user=self.request.user,
-                course=course,
-                completed=True
-            ).count()
+            completed_lessons = completed_by_course.get(course.id, 0)
 
             # Вычисляем прогресс по тестам
-            completed_quizzes_count = 0
-
-            for quiz in course.quizzes.all():
-                if QuizResult.objects.filter(
-                    user=self.request.user,
-                    quiz_title=quiz.name,
-                    passed=True
-                ).exists():
-                    completed_quizzes_count += 1
+            completed_quizzes_count = sum(
+                1 for quiz in course.quizzes.all() if quiz.name in passed_quiz_titles
+            )
 
             total_items = total_lessons + total_quizzes
             completed_items = completed_lessons + completed_quizzes_count
@@ -349,6 +371,16 @@ class CourseListView(ListView):
                 'progress': progress,
                 'is_completed': uc.is_completed,
             })
+        return courses_data
+
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Карточки меняются только вместе с состоянием обучения пользователя
+        # или содержимым курсов — кэшируем по их версиям
+        courses_data = get_learning_state_cached(
+            self.request.user, 'course_cards', self.build_courses_data
+        )
 
         context.update({
             'courses_data': courses_data,
@@ -360,6 +392,8 @@ class CourseListView(ListView):
 
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=lesson_detail_etag, last_modified_func=lesson_detail_last_modified)
 def lesson_detail(request, course_slug=None, lesson_id=None):
     if not request.user.is_authenticated:
         return redirect('login')
@@ -374,11 +408,13 @@ def lesson_detail(request, course_slug=None, lesson_id=None):
             course = lesson.courses.first()
             return render(request, 'courses/lesson_detail.html', {
                 'lesson': lesson, 
+                'lesson_html': get_rendered_lesson_content(lesson),
                 'course': course,
                 'attachments': attachments
             })
         return render(request, 'courses/lesson_detail.html', {
             'lesson': lesson, 
+            'lesson_html': get_rendered_lesson_content(lesson),
             'course': None,
             'attachments': attachments
         })
@@ -394,11 +430,8 @@ def lesson_detail(request, course_slug=None, lesson_id=None):
             return redirect('courses:course_detail', slug=course.slug)
 
         # Проверка траектории
-        trajectory = UserLessonTrajectory.objects.filter(user=request.user, course=course).first()
-        if trajectory and not is_admin(request.user):
-            lessons_in_trajectory = trajectory.lessons.all()
-            if lesson not in lessons_in_trajectory:
-                return redirect('courses:course_detail', slug=course.slug)
+        if not is_admin(request.user) and not is_lesson_in_trajectory(request.user, course, lesson.id):
+            return redirect('courses:course_detail', slug=course.slug)
 
         # Помечаем урок как просмотренный (но не завершенный)
         UserProgress.objects.get_or_create(
@@ -410,6 +443,7 @@ def lesson_detail(request, course_slug=None, lesson_id=None):
         attachments = lesson.attachments.all()
         return render(request, 'courses/lesson_detail.html', {
             'lesson': lesson, 
+            'lesson_html': get_rendered_lesson_content(lesson),
             'course': course,
             'attachments': attachments
         })
@@ -453,11 +487,14 @@ class CreateCourseView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
         response = super().form_valid(form)
 
         # Назначаем курс выбранным пользователям
-        assigned_user_ids = self.request.POST.getlist('assigned_users')
+        assigned_user_ids = parse_ids(self.request.POST.getlist('assign_users'))
         if assigned_user_ids:
-            users = User.objects.filter(id__in=assigned_user_ids)
-            for user in users:
-                UserCourse.objects.get_or_create(user=user, course=self.object)
+            assigned_count = assign_courses_to_users(
+                User.objects.filter(id__in=assigned_user_ids), [self.object.pk]
+            )
+            messages.success(self.request, f'Курс назначен пользователям: {assigned_count}')
+        if form.assignment_job:
+            messages.info(self.request, 'Назначение курса пользователям групп выполняется в фоне.')
 
         return response
     
@@ -475,10 +512,8 @@ class CreateCourseView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
             except (Directory.DoesNotExist, ValueError):
                 pass
 
-        # Список всех пользователей для назначения курса
-        context['all_users'] = User.objects.all().order_by('last_name', 'first_name', 'username')
         # При создании курса изначально нет назначенных пользователей
-        context['assigned_user_ids'] = []
+        context['assigned_users_count'] = 0
 
         return context
     
@@ -613,6 +648,36 @@ def delete_course(request, slug):
 
 
 
+@login_required
+@user_passes_test(lambda u: is_author_or_admin(u, Course), login_url='/')
+@require_POST
+def clone_course(request, slug):
+    """Создание копии курса со всеми уникальными материалами («тот же курс, новый поток»)"""
+    course = get_object_or_404(Course.objects.select_related('final_quiz'), slug=slug)
+    title = request.POST.get('title', '').strip()[:200]
+    copy_groups = request.POST.get('copy_groups') == 'on'
+
+    if title and Course.objects.filter(title=title, author=request.user).exists():
+        messages.error(request, f'Курс с названием "{title}" уже существует у вас.')
+        return redirect('courses:course_detail', slug=course.slug)
+
+    new_course = deep_clone_course(course, request.user, title=title or None, copy_groups=copy_groups)
+
+    group_ids = list(new_course.assigned_groups.values_list('id', flat=True)) if copy_groups else []
+    if group_ids:
+        enqueue(
+            'courses.assign_groups',
+            {'course_id': new_course.pk, 'group_ids': group_ids},
+            user=request.user,
+            description=f'Назначение копии курса «{new_course.title}» группам',
+        )
+        messages.info(request, 'Назначение курса пользователям групп выполняется в фоне.')
+    messages.success(request, f'Создана копия курса: {new_course.title}')
+    return redirect('courses:course_detail', slug=new_course.slug)
+
+
+
+
 @login_required
 @user_passes_test(is_admin, login_url='/')
 def delete_lesson(request, lesson_id):
@@ -656,27 +721,25 @@ def delete_lesson(request, lesson_id):
 def edit_course(request, slug):
     course = get_object_or_404(Course, slug=slug)
     directory = course.directory
-    all_users = User.objects.all().order_by('last_name', 'first_name', 'username')
-    assigned_user_ids = list(UserCourse.objects.filter(course=course).values_list('user_id', flat=True))
 
     if request.method == 'POST':
         form = CourseForm(request.POST, request.FILES, instance=course, user=request.user, directory=directory)
         if form.is_valid():
-            form.save()
-            # Обновляем назначения курса пользователям
-            posted_user_ids = request.POST.getlist('assigned_users')
-            new_user_ids = set(int(uid) for uid in posted_user_ids if uid.isdigit())
-            current_user_ids = set(assigned_user_ids)
-
-            # Добавляем новые назначения
-            for user_id in new_user_ids - current_user_ids:
-                user = User.objects.filter(id=user_id).first()
-                if user:
-                    UserCourse.objects.get_or_create(user=user, course=course)
-
-            # Удаляем снятые назначения
-            for user_id in current_user_ids - new_user_ids:
-                UserCourse.objects.filter(course=course, user_id=user_id).delete()
+            with transaction.atomic():
+                form.save()
+                # Пикер присылает только изменения: кого назначить и с кого снять курс
+                changes = update_course_assignments(
+                    course,
+                    request.POST.getlist('assign_users'),
+                    request.POST.getlist('unassign_users'),
+                )
+            if changes['added'] or changes['removed']:
+                messages.success(
+                    request,
+                    f'Назначения обновлены: добавлено {changes["added"]}, снято {changes["removed"]}'
+                )
+            if form.assignment_job:
+                messages.info(request, 'Назначение курса пользователям групп выполняется в фоне.')
             
             # Перенаправление обратно к курсу, после редактирования
             return redirect('courses:course_detail', slug=course.slug)
@@ -686,8 +749,7 @@ def edit_course(request, slug):
     return render(request, 'courses/edit_course.html', {
         'form': form,
         'course': course,
-        'all_users': all_users,
-        'assigned_user_ids': assigned_user_ids,
+        'assigned_users_count': UserCourse.objects.filter(course=course).count(),
     })
 
 
@@ -772,11 +834,11 @@ def complete_lesson(request, course_slug, lesson_id):
     if not UserCourse.objects.filter(user=request.user, course=course).exists():
         return redirect('courses:course_detail', slug=course.slug)
     
-    # Получаем траекторию пользователя
-    trajectory = UserLessonTrajectory.objects.filter(user=request.user, course=course).first()
+    # Получаем траекторию пользователя (личную или групповую)
+    trajectory = get_trajectory_lesson_ids(request.user, course)
     
     # Проверяем, что урок входит в траекторию пользователя (если траектория задана)
-    if trajectory and lesson not in trajectory.lessons.all():
+    if trajectory is not None and lesson.id not in trajectory:
         return redirect('courses:course_detail', slug=course.slug)
 
     # Создаем или обновляем прогресс
@@ -787,12 +849,9 @@ def complete_lesson(request, course_slug, lesson_id):
     )
 
     # Получаем общее количество уроков для пользователя
-    if trajectory:
-        total_lessons = trajectory.lessons.count()
-        lesson_ids = trajectory.lessons.values_list('id', flat=True)
-    else:
-        total_lessons = course.lessons.count()
-        lesson_ids = course.lessons.values_list('id', flat=True)
+    trajectory_lessons = get_trajectory_lessons(request.user, course)
+    total_lessons = trajectory_lessons.count()
+    lesson_ids = trajectory_lessons.values_list('id', flat=True)
 
     # Считаем ТОЛЬКО уроки из траектории
     completed_lessons = UserProgress.objects.filter(
@@ -875,31 +934,110 @@ def complete_course(request, course_id):
 
 
 
+# Размер страницы в окне «Добавить материалы»
+MATERIALS_PAGE_SIZE = 30
+
+
+def _materials_search_params(request):
+    """Строка поиска и номер страницы из GET-параметров (q, page)"""
+    query = request.GET.get('q', '').strip()[:200]
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except (TypeError, ValueError):
+        page = 1
+    return query, page
+
+
+def _search_by_title(queryset, field, query):
+    """
+    Поиск по подстроке и по похожести (опечатки). Подстроку (UPPER(поле) LIKE)
+    обслуживает триграммный GIN-индекс по UPPER(поле), похожесть (%>) —
+    триграммный GIN-индекс по самому полю.
+    """
+    if not query:
+        return queryset.order_by(field)
+    return queryset.filter(
+        Q(**{f'{field}__icontains': query}) | Q(**{f'{field}__trigram_word_similar': query})
+    ).annotate(
+        similarity=TrigramWordSimilarity(query, field)
+    ).order_by('-similarity', field)
+
+
+def _materials_page(queryset, page):
+    """Срез одной страницы без COUNT(*): лишняя строка показывает, есть ли продолжение"""
+    offset = (page - 1) * MATERIALS_PAGE_SIZE
+    rows = list(queryset[offset:offset + MATERIALS_PAGE_SIZE + 1])
+    return rows[:MATERIALS_PAGE_SIZE], len(rows) > MATERIALS_PAGE_SIZE
+
+
+@login_required
+@user_passes_test(is_admin, login_url='/')
+def get_assignable_users(request):
+    """
+    Страница пользователей для пикера назначений с поиском (JSON API).
+    Если передан ?course=<slug>, у каждого пользователя есть признак assigned.
+    """
+    query, page = _materials_search_params(request)
+    users = User.objects.all()
+    for term in query.split()[:5]:
+        users = users.filter(
+            Q(first_name__icontains=term) | Q(last_name__icontains=term)
+            | Q(username__icontains=term) | Q(email__icontains=term)
+        )
+
+    course_slug = request.GET.get('course')
+    if course_slug:
+        course = get_object_or_404(Course.objects.only('id'), slug=course_slug)
+        users = users.annotate(assigned=Exists(
+            UserCourse.objects.filter(user=OuterRef('pk'), course_id=course.id)
+        ))
+
+    fields = ['id', 'username', 'first_name', 'last_name', 'email'] + (['assigned'] if course_slug else [])
+    rows, has_more = _materials_page(
+        users.order_by('last_name', 'first_name', 'username').values(*fields), page
+    )
+    users_data = [
+        {
+            'id': row['id'],
+            'name': f"{row['first_name']} {row['last_name']}".strip() or row['username'],
+            'username': row['username'],
+            'email': row['email'],
+            'assigned': row.get('assigned', False),
+        }
+        for row in rows
+    ]
+
+    return JsonResponse({'users': users_data, 'page': page, 'has_more': has_more})
+
+
 @login_required
 @user_passes_test(is_admin, login_url='/')
 def get_available_lessons(request, course_slug):
-    """Получение списка доступных уроков для добавления в курс (JSON API)"""
+    """Страница доступных уроков для добавления в курс с поиском по названию (JSON API)"""
     course = get_object_or_404(Course, slug=course_slug)
-    
-    # Получаем ID уроков, которые уже привязаны к этому курсу
-    course_lesson_ids = course.lessons.values_list('id', flat=True)
+    query, page = _materials_search_params(request)
     
     # Уроки для добавления: не в курсе и не уникальные (уникальные привязаны только к одному курсу)
     available_lessons = Lesson.objects.exclude(
-        id__in=course_lesson_ids
-    ).filter(course_only=False).order_by('title')
-    
-    lessons_data = []
-    for lesson in available_lessons:
-        courses_list = ', '.join([c.title for c in lesson.courses.all()]) if lesson.courses.exists() else 'Без курса'
-        lessons_data.append({
-            'id': lesson.id,
-            'title': lesson.title,
-            'current_course': courses_list,
-            'directory': lesson.directory.name if lesson.directory else 'Без категории',
-        })
+        id__in=course.lessons.values('id')
+    ).filter(course_only=False)
+    available_lessons = _search_by_title(available_lessons, 'title', query).annotate(
+        directory_name=F('directory__name'),
+        course_titles=StringAgg('courses__title', delimiter=', ', ordering='courses__title'),
+    ).values('id', 'title', 'directory_name', 'course_titles')
+
+    rows, has_more = _materials_page(available_lessons, page)
+    lessons_data = [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'current_course': row['course_titles'] or 'Без курса',
+            'directory': row['directory_name'] or 'Без категории',
+        }
+        for row in rows
+    ]
     
-    return JsonResponse({'lessons': lessons_data})
+    return JsonResponse({'lessons': lessons_data, 'page': page, 'has_more': has_more})
 
 
 
@@ -931,28 +1069,31 @@ def add_lesson_to_course(request, course_slug):
 @login_required
 @user_passes_test(is_admin, login_url='/')
 def get_available_quizzes(request, course_slug):
-    """Получение списка доступных тестов для добавления в курс (JSON API)"""
+    """Страница доступных тестов для добавления в курс с поиском по названию (JSON API)"""
     course = get_object_or_404(Course, slug=course_slug)
-
-    # Получаем ID тестов, которые уже привязаны к курсу
-    course_quiz_ids = course.quizzes.values_list('id', flat=True)
+    query, page = _materials_search_params(request)
     
     # Тесты для добавления: не в курсе, не уникальные (уникальные привязаны только к одному курсу)
     available_quizzes = Quiz.objects.exclude(
-        id__in=course_quiz_ids
-    ).filter(course_only=False).order_by('name')
-    if course.final_quiz:
-        available_quizzes = available_quizzes.exclude(id=course.final_quiz.id)
-
-    quizzes_data = []
-    for quiz in available_quizzes:
-        quizzes_data.append({
-            'id': quiz.id,
-            'name': quiz.name,
-            'directory': quiz.directory.name if quiz.directory else 'Без категории',
-        })
+        id__in=course.quizzes.values('id')
+    ).filter(course_only=False)
+    if course.final_quiz_id:
+        available_quizzes = available_quizzes.exclude(id=course.final_quiz_id)
+    available_quizzes = _search_by_title(available_quizzes, 'name', query).annotate(
+        directory_name=F('directory__name'),
+    ).values('id', 'name', 'directory_name')
+
+    rows, has_more = _materials_page(available_quizzes, page)
+    quizzes_data = [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'directory': row['directory_name'] or 'Без категории',
+        }
+        for row in rows
+    ]
 
-    return JsonResponse({'quizzes': quizzes_data})
+    return JsonResponse({'quizzes': quizzes_data, 'page': page, 'has_more': has_more})
 
 
 @login_required
@@ -976,49 +1117,36 @@ def add_quiz_to_course(request, course_slug):
         return JsonResponse({'success': False, 'error': 'Тест не найден'}, status=404)
 
 
+def _is_ajax(request):
+    return request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
 @login_required
 @user_passes_test(is_admin, login_url='/')
 @require_POST
 def add_materials_to_course(request, course_slug):
-    """Массовое добавление выбранных уроков и тестов в курс (POST, редирект)."""
+    """Массовое добавление выбранных уроков и тестов в курс (POST, редирект или JSON)."""
     course = get_object_or_404(Course, slug=course_slug)
-    lesson_ids = request.POST.getlist('lesson_ids')
-    quiz_ids = request.POST.getlist('quiz_ids')
-    added_lessons = 0
-    added_quizzes = 0
-    messages_list = []
+    result = attach_materials(
+        course,
+        request.POST.getlist('lesson_ids'),
+        request.POST.getlist('quiz_ids'),
+    )
 
-    for lid in lesson_ids:
-        if not lid:
-            continue
-        try:
-            lesson = Lesson.objects.get(id=lid)
-            if lesson.course_only:
-                continue
-            if not lesson.courses.filter(id=course.id).exists():
-                lesson.courses.add(course)
-                added_lessons += 1
-        except (Lesson.DoesNotExist, ValueError):
-            pass
-
-    for qid in quiz_ids:
-        if not qid:
-            continue
-        try:
-            quiz = Quiz.objects.get(id=qid)
-            if quiz.course_only:
-                continue
-            if not course.quizzes.filter(id=quiz.id).exists():
-                course.quizzes.add(quiz)
-                added_quizzes += 1
-        except (Quiz.DoesNotExist, ValueError):
-            pass
+    if _is_ajax(request):
+        return JsonResponse({'success': True, **result})
 
+    added_lessons = result['lessons_added']
+    added_quizzes = result['quizzes_added']
+    messages_list = []
     if added_lessons or added_quizzes:
         if added_lessons:
             messages_list.append(f'Добавлено уроков: {added_lessons}')
         if added_quizzes:
             messages_list.append(f'Добавлено тестов: {added_quizzes}')
+        skipped = result['lessons_skipped'] + result['quizzes_skipped']
+        if skipped:
+            messages_list.append(f'Пропущено (уже в курсе или недоступно): {skipped}')
         messages.success(request, '; '.join(messages_list))
     else:
         messages.info(request, 'Ничего не выбрано или выбранные материалы уже в курсе.')
@@ -1026,6 +1154,44 @@ def add_materials_to_course(request, course_slug):
     return redirect('courses:course_detail', slug=course_slug)
 
 
+@login_required
+@user_passes_test(is_admin, login_url='/')
+@require_POST
+def remove_materials_from_course(request, course_slug):
+    """Массовое удаление уроков и тестов из курса без удаления самих материалов (JSON API)"""
+    course = get_object_or_404(Course, slug=course_slug)
+    result = detach_materials(
+        course,
+        request.POST.getlist('lesson_ids'),
+        request.POST.getlist('quiz_ids'),
+    )
+    return JsonResponse({'success': True, **result})
+
+
+@login_required
+@user_passes_test(is_admin, login_url='/')
+@require_POST
+def move_materials_between_courses(request, course_slug):
+    """Массовый перенос уроков и тестов в другой курс (JSON API)"""
+    source = get_object_or_404(Course, slug=course_slug)
+    target_slug = request.POST.get('target_course')
+    if not target_slug:
+        return JsonResponse({'success': False, 'error': 'Не указан курс назначения'}, status=400)
+    target = Course.objects.filter(slug=target_slug).first()
+    if not target:
+        return JsonResponse({'success': False, 'error': 'Курс назначения не найден'}, status=404)
+    if target.pk == source.pk:
+        return JsonResponse({'success': False, 'error': 'Курс назначения совпадает с исходным'}, status=400)
+
+    result = move_materials(
+        source,
+        target,
+        request.POST.getlist('lesson_ids'),
+        request.POST.getlist('quiz_ids'),
+    )
+    return JsonResponse({'success': True, **result})
+
+
 @login_required
 @user_passes_test(is_admin, login_url='/')
 @require_POST
@@ -1036,7 +1202,7 @@ def delete_attachment(request, attachment_id):
     attachment.delete()
     
     # Если это AJAX-запрос, возвращаем JSON
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+    if _is_ajax(request):
         return JsonResponse({'success': True, 'message': 'Файл удалён'})
     
     # Иначе редирект обратно на страницу редактирования
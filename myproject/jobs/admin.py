@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'description', 'status', 'progress', 'progress_total', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'description')
+    readonly_fields = ('created_by', 'created_at', 'started_at', 'heartbeat_at', 'finished_at', 'locked_by', 'error', 'result')
+    list_select_related = ('created_by',)
+    actions = ['requeue']
+
+    @admin.action(description='Перезапустить выбранные задачи')
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=Job.Status.RUNNING).update(
+            status=Job.Status.QUEUED, attempts=0, run_after=timezone.now(), error=''
+        )
+        self.message_user(request, f'Поставлено в очередь: {updated}')
@@ -0,0 +1,66 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.worker import HEARTBEAT_INTERVAL, claim_next_job, heartbeat, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    """
+    Воркер фоновых задач. Очередь хранится в БД, внешний брокер не нужен.
+    Можно запускать несколько экземпляров параллельно.
+    """
+    help = 'Выполняет фоновые задачи из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить все готовые задачи и завершиться',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Пауза между опросами пустой очереди (сек.)',
+        )
+
+    def handle(self, *args, **options):
+        worker_name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f'Воркер {worker_name} запущен')
+
+        next_recovery = 0
+        try:
+            while True:
+                # Воркер живёт долго: закрываем соединения с истёкшим сроком жизни
+                close_old_connections()
+                # Задачи упавших воркеров подбираем не только при старте:
+                # в кластере остальные воркеры могут не перезапускаться
+                if time.monotonic() >= next_recovery:
+                    self._requeue_stale()
+                    next_recovery = time.monotonic() + HEARTBEAT_INTERVAL
+
+                job = claim_next_job(worker_name)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                self.stdout.write(f'Задача {job}: попытка {job.attempts}/{job.max_attempts}')
+                with heartbeat(job):
+                    succeeded = run_job(job)
+                if succeeded:
+                    self.stdout.write(self.style.SUCCESS(f'Задача #{job.pk} выполнена'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'Задача #{job.pk}: {job.get_status_display()}'))
+        except KeyboardInterrupt:
+            self.stdout.write('Воркер остановлен')
+
+    def _requeue_stale(self):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Возвращено в очередь зависших задач: {requeued}'))
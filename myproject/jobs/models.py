@@ -0,0 +1,103 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Фоновая задача. Создаётся в запросе через jobs.registry.enqueue()
+    и выполняется командой run_worker.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        FAILED = 'failed', 'Ошибка'
+
+    name = models.CharField(max_length=100, verbose_name='Тип задачи')
+    description = models.CharField(max_length=255, blank=True, verbose_name='Описание')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Параметры')
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='Максимум попыток')
+    progress = models.PositiveIntegerField(default=0, verbose_name='Выполнено')
+    progress_total = models.PositiveIntegerField(default=0, verbose_name='Всего')
+    result = models.JSONField(null=True, blank=True, verbose_name='Результат')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    run_after = models.DateTimeField(default=timezone.now, verbose_name='Запустить после')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='Обработчик')
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        verbose_name='Автор'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Начата')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='Последний сигнал воркера')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Завершена')
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ['-created_at']
+        indexes = [
+            # Выборка следующей задачи воркером: только ожидающие, по времени запуска
+            models.Index(
+                fields=['run_after', 'id'],
+                condition=models.Q(status='queued'),
+                name='job_queued_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.get_status_display()})'
+
+    @property
+    def progress_percent(self):
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.progress_total:
+            return 0
+        return min(100, int(self.progress * 100 / self.progress_total))
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    def set_progress(self, done, total=None):
+        """
+        Обновляет прогресс выполнения и сигнал жизни воркера.
+        Пишется отдельным UPDATE, чтобы не затирать остальные поля задачи.
+        """
+        self.progress = done
+        self.heartbeat_at = timezone.now()
+        fields = {'progress': done, 'heartbeat_at': self.heartbeat_at}
+        if total is not None:
+            self.progress_total = total
+            fields['progress_total'] = total
+        Job.objects.filter(pk=self.pk).update(**fields)
+
+    def to_dict(self):
+        return {
+            'id': self.pk,
+            'name': self.name,
+            'description': self.description,
+            'status': self.status,
+            'status_display': self.get_status_display(),
+            'attempts': self.attempts,
+            'progress': self.progress,
+            'progress_total': self.progress_total,
+            'progress_percent': self.progress_percent,
+            'result': self.result,
+            'error': self.error.strip().splitlines()[-1] if self.error else '',
+            'is_finished': self.is_finished,
+        }
@@ -0,0 +1,42 @@
+from .models import Job
+
+
+_handlers = {}
+
+
+class UnknownJobError(LookupError):
+    """Для задачи не зарегистрирован обработчик"""
+
+
+def job_handler(name):
+    """
+    Регистрирует функцию-обработчик задачи.
+    Обработчик вызывается как handler(job, **job.payload) и может вернуть
+    JSON-совместимый результат, который сохранится в Job.result.
+    """
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def get_handler(name):
+    try:
+        return _handlers[name]
+    except KeyError:
+        raise UnknownJobError(f'Нет обработчика для задачи "{name}"') from None
+
+
+def enqueue(name, payload=None, user=None, description='', max_attempts=3):
+    """
+    Ставит задачу в очередь. Вызывается внутри транзакции запроса:
+    воркер увидит задачу только после её фиксации.
+    """
+    get_handler(name)
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        created_by=user if user and user.is_authenticated else None,
+        description=description[:255],
+        max_attempts=max_attempts,
+    )
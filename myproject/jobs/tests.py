@@ -0,0 +1,169 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Job
+from .registry import enqueue, job_handler
+from .worker import RETRY_DELAY, STALE_JOB_TIMEOUT, claim_next_job, requeue_stale_jobs, run_job
+
+
+@job_handler('jobs.tests.ok')
+def _ok_handler(job, value=None):
+    return {'value': value}
+
+
+@job_handler('jobs.tests.fail')
+def _fail_handler(job):
+    raise RuntimeError('Ошибка обработчика')
+
+
+class ClaimNextJobTest(TestCase):
+    """Выборка задачи воркером: только готовые к запуску, по порядку"""
+
+    def test_claims_oldest_ready_job(self):
+        first = enqueue('jobs.tests.ok')
+        enqueue('jobs.tests.ok')
+
+        job = claim_next_job('worker-1')
+
+        self.assertEqual(job.pk, first.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.locked_by, 'worker-1')
+        self.assertIsNotNone(job.heartbeat_at)
+
+    def test_skips_delayed_and_running_jobs(self):
+        delayed = enqueue('jobs.tests.ok')
+        Job.objects.filter(pk=delayed.pk).update(run_after=timezone.now() + timedelta(minutes=5))
+
+        self.assertIsNotNone(claim_next_job('worker-1'))
+        self.assertIsNone(claim_next_job('worker-1'))
+
+
+class ClaimSkipLockedTest(TransactionTestCase):
+    """Строка, заблокированная другим воркером, пропускается, а не ожидается"""
+
+    def test_locked_job_is_skipped(self):
+        locked = enqueue('jobs.tests.ok')
+        free = enqueue('jobs.tests.ok')
+        row_locked = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    Job.objects.select_for_update().get(pk=locked.pk)
+                    row_locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            self.assertTrue(row_locked.wait(10))
+            job = claim_next_job('worker-2')
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(job.pk, free.pk)
+        locked.refresh_from_db()
+        self.assertEqual(locked.status, Job.Status.QUEUED)
+
+
+class RunJobTest(TestCase):
+    """Результат, повтор с экспоненциальной задержкой и окончательная ошибка"""
+
+    def _claim(self, name, **kwargs):
+        enqueue(name, **kwargs)
+        return claim_next_job('worker-1')
+
+    def test_success_stores_result(self):
+        job = self._claim('jobs.tests.ok', payload={'value': 7})
+
+        self.assertTrue(run_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertEqual(job.result, {'value': 7})
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retry_delay_grows_exponentially(self):
+        job = self._claim('jobs.tests.fail', max_attempts=3)
+
+        for attempt in (1, 2):
+            before = timezone.now()
+            self.assertFalse(run_job(job))
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.Status.QUEUED)
+            self.assertEqual(job.attempts, attempt)
+            self.assertIn('RuntimeError', job.error)
+            delay = (job.run_after - before).total_seconds()
+            self.assertAlmostEqual(delay, RETRY_DELAY * 2 ** (attempt - 1), delta=5)
+
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            job = claim_next_job('worker-1')
+
+    def test_failed_after_max_attempts(self):
+        job = self._claim('jobs.tests.fail', max_attempts=1)
+
+        self.assertFalse(run_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_next_job('worker-1'))
+
+
+class RequeueStaleJobsTest(TestCase):
+    """Задачи упавших воркеров определяются по устаревшему сигналу, а не по времени старта"""
+
+    def _running(self, heartbeat_age, attempts=1, max_attempts=3):
+        job = enqueue('jobs.tests.ok', max_attempts=max_attempts)
+        now = timezone.now()
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.Status.RUNNING,
+            attempts=attempts,
+            locked_by='dead-worker',
+            started_at=now - timedelta(hours=2),
+            heartbeat_at=now - heartbeat_age,
+        )
+        return job
+
+    def test_stale_heartbeat_is_requeued(self):
+        job = self._running(STALE_JOB_TIMEOUT + timedelta(minutes=1))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertEqual(job.locked_by, '')
+
+    def test_fresh_heartbeat_of_long_job_is_kept(self):
+        job = self._running(timedelta(seconds=10))
+
+        self.assertEqual(requeue_stale_jobs(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.RUNNING)
+
+    def test_exhausted_attempts_fail(self):
+        job = self._running(STALE_JOB_TIMEOUT + timedelta(minutes=1), attempts=3, max_attempts=3)
+
+        self.assertEqual(requeue_stale_jobs(), 0)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_progress_refreshes_heartbeat(self):
+        job = self._running(STALE_JOB_TIMEOUT + timedelta(minutes=1))
+        job.set_progress(1, total=10)
+
+        self.assertEqual(requeue_stale_jobs(), 0)
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('', views.job_list, name='job_list'),
+    path('<int:job_id>/status/', views.job_status, name='job_status'),
+]
@@ -0,0 +1,32 @@
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+
+from .models import Job
+
+
+# Сколько последних задач показывать на странице статуса
+JOBS_PAGE_SIZE = 50
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def job_list(request):
+    """Страница статуса фоновых задач для сотрудников"""
+    jobs = Job.objects.select_related('created_by').defer('payload')
+    status = request.GET.get('status')
+    if status in Job.Status.values:
+        jobs = jobs.filter(status=status)
+    return render(request, 'jobs/job_list.html', {
+        'jobs': jobs[:JOBS_PAGE_SIZE],
+        'statuses': Job.Status.choices,
+        'current_status': status,
+    })
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def job_status(request, job_id):
+    """JSON со статусом и прогрессом задачи — для опроса со страницы"""
+    job = get_object_or_404(Job, id=job_id)
+    return JsonResponse({'success': True, 'job': job.to_dict()})
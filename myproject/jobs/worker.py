@@ -0,0 +1,130 @@
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_handler
+
+
+logger = logging.getLogger(__name__)
+
+# Базовая задержка перед повтором (сек.), растёт экспоненциально
+RETRY_DELAY = 30
+
+# Как часто воркер отмечает, что выполняемая задача жива (сек.)
+HEARTBEAT_INTERVAL = 30
+
+# Задача без сигнала от воркера дольше этого времени считается брошенной
+# (воркер упал) и возвращается в очередь
+STALE_JOB_TIMEOUT = timedelta(minutes=5)
+
+
+def claim_next_job(worker_name):
+    """
+    Забирает следующую задачу из очереди. SELECT ... FOR UPDATE SKIP LOCKED
+    позволяет запускать несколько воркеров: строки, заблокированные
+    другим воркером, просто пропускаются.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED, run_after__lte=now)
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.Status.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.heartbeat_at = now
+        job.locked_by = worker_name
+        job.save(update_fields=['status', 'attempts', 'started_at', 'heartbeat_at', 'locked_by'])
+    return job
+
+
+def _beat(job, stop):
+    try:
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, locked_by=job.locked_by).update(
+                heartbeat_at=timezone.now()
+            )
+    except Exception:
+        logger.exception('Не удалось обновить сигнал задачи %s', job)
+    finally:
+        # У потока своё соединение с БД — закрываем его сами
+        connection.close()
+
+
+@contextmanager
+def heartbeat(job):
+    """
+    Пока задача выполняется, фоновый поток раз в HEARTBEAT_INTERVAL обновляет
+    heartbeat_at: долгий обработчик без set_progress() не считается зависшим.
+    """
+    stop = threading.Event()
+    thread = threading.Thread(target=_beat, args=(job, stop), daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def requeue_stale_jobs():
+    """
+    Возвращает в очередь задачи, зависшие после падения воркера:
+    живой воркер обновляет heartbeat_at, у брошенной задачи он устаревает.
+    Задачи, исчерпавшие попытки, помечаются как упавшие: задача, которая
+    роняет сам процесс воркера, иначе повторялась бы бесконечно.
+    """
+    now = timezone.now()
+    cutoff = now - STALE_JOB_TIMEOUT
+    stale = Job.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=Job.Status.RUNNING,
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.Status.FAILED,
+        locked_by='',
+        finished_at=now,
+        error='Воркер завершился во время выполнения задачи',
+    )
+    return stale.update(status=Job.Status.QUEUED, locked_by='')
+
+
+def run_job(job):
+    """Выполняет задачу и фиксирует результат, ошибку или повтор"""
+    try:
+        handler = get_handler(job.name)
+        result = handler(job, **job.payload)
+    except Exception:
+        job.error = traceback.format_exc()
+        job.locked_by = ''
+        if job.attempts < job.max_attempts:
+            job.status = Job.Status.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+            logger.warning('Задача %s упала, повтор в %s', job, job.run_after)
+        else:
+            job.status = Job.Status.FAILED
+            job.finished_at = timezone.now()
+            logger.error('Задача %s завершилась ошибкой', job)
+        job.save(update_fields=['status', 'error', 'locked_by', 'run_after', 'finished_at'])
+        return False
+
+    job.status = Job.Status.DONE
+    job.result = result
+    job.error = ''
+    job.finished_at = timezone.now()
+    if job.progress_total:
+        job.progress = job.progress_total
+    job.save(update_fields=['status', 'result', 'error', 'finished_at', 'progress'])
+    return True
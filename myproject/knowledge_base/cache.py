@@ -0,0 +1,2 @@
+# Пространство имён кэша дерева базы знаний: категории и количество материалов в них
+KB_TREE_NAMESPACE = 'kb_tree'
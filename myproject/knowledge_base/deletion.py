@@ -0,0 +1,118 @@
+"""
+Удаление категории со всем поддеревом набором DELETE по таблицам
+в одной транзакции, без загрузки объектов в память.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from courses.models import Course, GroupLessonTrajectory, Lesson, LessonAttachment, UserLessonTrajectory
+from courses.trajectories import invalidate_course_trajectories
+from jobs.registry import enqueue
+from myapp import cache as cache_tools
+from myapp.learning_state import CONTENT_NAMESPACE
+from myapp.models import UserAnswer, UserCourse, UserProgress
+from quizzes.models import Answer, Question, Quiz
+from users.stats import mark_stats_stale
+from .cache import KB_TREE_NAMESPACE
+from .models import Directory
+
+
+CourseLesson = Lesson.courses.through
+CourseQuiz = Course.quizzes.through
+CourseGroup = Course.assigned_groups.through
+UserTrajectoryLesson = UserLessonTrajectory.lessons.through
+GroupTrajectoryLesson = GroupLessonTrajectory.lessons.through
+
+
+def _delete(queryset):
+    # Один DELETE ... WHERE, как fast-delete в Collector: без выборки объектов и сигналов.
+    # Зависимые строки к этому моменту уже удалены — порядок задаёт delete_subtree
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_subtree(directory_id, user=None):
+    """
+    Удаляет категорию, её подкатегории и всё их содержимое (курсы, уроки, тесты
+    со связанными данными) в одной транзакции. Файлы курсов и уроков не удаляются
+    сразу: их очистка ставится фоновой задачей courses.delete_orphaned_files.
+
+    Сигналы post_delete при этом не отправляются, поэтому кэш сбрасывается явно.
+
+    Returns:
+        dict | None: количество удалённых категорий, курсов, уроков и тестов;
+        None, если категории уже нет.
+    """
+    with transaction.atomic():
+        directory = Directory.objects.filter(pk=directory_id).only('id', 'path').first()
+        if directory is None:
+            return None
+
+        # Поддерево — один запрос по префиксу пути
+        directory_ids = list(directory.get_descendants(include_self=True).values_list('id', flat=True))
+        course_ids = list(Course.objects.filter(directory_id__in=directory_ids).values_list('id', flat=True))
+        lesson_ids = list(Lesson.objects.filter(directory_id__in=directory_ids).values_list('id', flat=True))
+        quiz_ids = list(Quiz.objects.filter(directory_id__in=directory_ids).values_list('id', flat=True))
+
+        files = list(
+            Course.objects.filter(id__in=course_ids).exclude(image='').exclude(image__isnull=True)
+            .values_list('image', flat=True)
+        ) + list(
+            LessonAttachment.objects.filter(lesson_id__in=lesson_ids).values_list('file', flat=True)
+        )
+        # Курсы вне поддерева, из которых пропадут уроки: их траектории нужно пересчитать
+        touched_course_ids = set(
+            CourseLesson.objects.filter(lesson_id__in=lesson_ids).values_list('course_id', flat=True)
+        ) | set(course_ids)
+        # Пользователи, у которых изменятся курсы или их состав: статистику нужно пересчитать
+        affected_user_ids = list(UserCourse.objects.filter(
+            Q(course_id__in=touched_course_ids)
+            | Q(course_id__in=CourseQuiz.objects.filter(quiz_id__in=quiz_ids).values('course_id'))
+            | Q(course__final_quiz_id__in=quiz_ids)
+        ).values_list('user_id', flat=True).distinct())
+
+        # Тесты: ответы пользователей → варианты → вопросы → связи с курсами
+        _delete(UserAnswer.objects.filter(question__quiz_id__in=quiz_ids))
+        _delete(Answer.objects.filter(question__quiz_id__in=quiz_ids))
+        _delete(Question.objects.filter(quiz_id__in=quiz_ids))
+        _delete(CourseQuiz.objects.filter(Q(quiz_id__in=quiz_ids) | Q(course_id__in=course_ids)))
+        Course.objects.filter(final_quiz_id__in=quiz_ids).exclude(id__in=course_ids).update(
+            final_quiz=None, updated_at=timezone.now()
+        )
+
+        # Уроки и курсы: прогресс, вложения, траектории, назначения
+        _delete(UserProgress.objects.filter(Q(lesson_id__in=lesson_ids) | Q(course_id__in=course_ids)))
+        _delete(LessonAttachment.objects.filter(lesson_id__in=lesson_ids))
+        _delete(UserTrajectoryLesson.objects.filter(
+            Q(lesson_id__in=lesson_ids) | Q(userlessontrajectory__course_id__in=course_ids)
+        ))
+        _delete(GroupTrajectoryLesson.objects.filter(
+            Q(lesson_id__in=lesson_ids) | Q(grouplessontrajectory__course_id__in=course_ids)
+        ))
+        _delete(CourseLesson.objects.filter(Q(lesson_id__in=lesson_ids) | Q(course_id__in=course_ids)))
+        _delete(UserLessonTrajectory.objects.filter(course_id__in=course_ids))
+        _delete(GroupLessonTrajectory.objects.filter(course_id__in=course_ids))
+        _delete(UserCourse.objects.filter(course_id__in=course_ids))
+        _delete(CourseGroup.objects.filter(course_id__in=course_ids))
+
+        deleted = {
+            'quizzes': _delete(Quiz.objects.filter(id__in=quiz_ids)),
+            'lessons': _delete(Lesson.objects.filter(id__in=lesson_ids)),
+            'courses': _delete(Course.objects.filter(id__in=course_ids)),
+            'directories': _delete(Directory.objects.filter(id__in=directory_ids)),
+        }
+
+        if files:
+            enqueue(
+                'courses.delete_orphaned_files',
+                {'names': files},
+                user=user,
+                description=f'Очистка файлов удалённой категории #{directory_id}',
+            )
+
+        # Прогресс и назначения удалены в обход сигналов
+        mark_stats_stale(*affected_user_ids, activity=False)
+        cache_tools.bump(CONTENT_NAMESPACE, KB_TREE_NAMESPACE)
+        for course_id in touched_course_ids:
+            invalidate_course_trajectories(course_id)
+    return deleted
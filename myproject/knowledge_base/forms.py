@@ -0,0 +1,16 @@
+from django import forms
+
+from .models import Directory
+
+
+class DirectoryChoiceField(forms.ModelChoiceField):
+    """
+    Выбор категории с полным путём в подписи. Имена всех категорий
+    выбираются одним запросом на форму, а не цепочкой запросов к родителям
+    для каждого варианта списка.
+    """
+
+    def label_from_instance(self, obj):
+        if not hasattr(self, '_full_names'):
+            self._full_names = Directory.objects.full_names()
+        return self._full_names.get(obj.pk) or obj.name
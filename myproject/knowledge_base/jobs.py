@@ -0,0 +1,12 @@
+from jobs.registry import job_handler
+
+from .deletion import delete_subtree
+
+
+@job_handler('knowledge_base.delete_directory')
+def delete_directory_job(job, directory_id):
+    """Фоновое удаление категории со всем содержимым (см. deletion.delete_subtree)"""
+    job.set_progress(0, 1)
+    deleted = delete_subtree(directory_id, user=job.created_by)
+    job.set_progress(1)
+    return deleted or {'directories': 0, 'courses': 0, 'lessons': 0, 'quizzes': 0}
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.6 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    """Заполняет пути существующих категорий по уровням, начиная с корневых"""
+    Directory = apps.get_model('knowledge_base', 'Directory')
+    level = list(Directory.objects.filter(parent__isnull=True))
+    paths = {}
+    depth = 0
+    while level:
+        for directory in level:
+            parent_path = paths.get(directory.parent_id, '/')
+            directory.path = f'{parent_path}{directory.pk}/'
+            directory.depth = depth
+            paths[directory.pk] = directory.path
+        Directory.objects.bulk_update(level, ['path', 'depth'], batch_size=1000)
+        level = list(Directory.objects.filter(parent_id__in=[directory.pk for directory in level]))
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge_base', '0002_directory_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='directory',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Путь'),
+        ),
+        migrations.AddField(
+            model_name='directory',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Уровень вложенности'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='directory',
+            index=models.Index(fields=['path'], name='directory_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
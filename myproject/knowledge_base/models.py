@@ -1,4 +1,73 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import F, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Substr
+
+
+# Разделитель ID в материализованном пути: "/1/5/12/"
+PATH_SEPARATOR = '/'
+
+
+class DirectoryQuerySet(models.QuerySet):
+    def descendants_of(self, directory, include_self=False):
+        """Все вложенные категории: один запрос по префиксу пути (индекс directory_path_idx)"""
+        queryset = self.filter(path__startswith=directory.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=directory.pk)
+        return queryset
+
+    def move_subtree(self, old_path, new_path, depth_delta):
+        """Переписывает пути и уровни поддерева с префиксом old_path одним UPDATE"""
+        return self.filter(path__startswith=old_path).update(
+            path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+            depth=F('depth') + depth_delta,
+        )
+
+    def with_subtree_counts(self):
+        """
+        Количество курсов, уроков и тестов в категории вместе с подкатегориями
+        (courses_total, lessons_total, quizzes_total) для всего списка категорий
+        одним запросом: вложенность определяется по префиксу пути.
+        """
+        from courses.models import Course, Lesson
+        from quizzes.models import Quiz
+        # Уникальные уроки и тесты курсов в базе знаний не показываются — не считаем их
+        return self.annotate(
+            courses_total=_subtree_count(Course.objects.all()),
+            lessons_total=_subtree_count(Lesson.objects.filter(course_only=False)),
+            quizzes_total=_subtree_count(Quiz.objects.filter(course_only=False)),
+        )
+
+    def full_names(self, ids=None):
+        """
+        Словарь {id: "Родитель / Дочерняя / ..."} одним запросом:
+        пути выбранных категорий уже содержат ID всех предков.
+        """
+        rows = list(self.values_list('id', 'name', 'path'))
+        names = {pk: name for pk, name, _ in rows}
+        if ids is not None:
+            ids = set(ids)
+            rows = [row for row in rows if row[0] in ids]
+        return {
+            pk: ' / '.join(names.get(ancestor_id, '') for ancestor_id in split_path(path) or [pk])
+            for pk, _, path in rows
+        }
+
+
+def _subtree_count(queryset):
+    # COUNT без GROUP BY всегда возвращает одну строку, поэтому пустое поддерево даёт 0
+    return Subquery(
+        queryset.filter(directory__path__startswith=OuterRef('path'))
+        .order_by()
+        .annotate(total=Func(F('pk'), function='COUNT'))
+        .values('total')
+    )
+
+
+def split_path(path):
+    """ID категорий из материализованного пути, от корня"""
+    return [int(part) for part in path.split(PATH_SEPARATOR) if part]
+
 
 class Directory(models.Model):
     """Иерархическая модель папок/категорий базы знаний"""
@@ -13,6 +82,12 @@ class Directory(models.Model):
     )
     order = models.PositiveIntegerField(default=0, verbose_name='Порядок сортировки')
     description = models.TextField(blank=True, null=True, verbose_name='Описание категории')
+    # Материализованный путь из ID предков и самой категории: "/1/5/12/".
+    # Поддерживается в save(); при удалении потомки уходят каскадом вместе с путями
+    path = models.CharField(max_length=255, default='', editable=False, verbose_name='Путь')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Уровень вложенности')
+
+    objects = DirectoryQuerySet.as_manager()
 
     
     class Meta:
@@ -21,36 +96,97 @@ class Directory(models.Model):
         ordering = ['order', 'name']
         indexes = [
             models.Index(fields=['parent'], name='directory_parent_idx'),
+            # varchar_pattern_ops — чтобы LIKE 'префикс%' использовал индекс при любой локали БД
+            models.Index(fields=['path'], name='directory_path_idx', opclasses=['varchar_pattern_ops']),
         ]
 
     def __str__(self):
-        full_path = [self.name]
-        k = self.parent
-        while k is not None:
-            full_path.append(k.name)
-            k = k.parent
-        return ' / '.join(full_path[::-1])
-    
+        # Без запросов к БД: списки и выпадающие меню выводят много категорий.
+        # Полное имя — get_full_name() или Directory.objects.full_names()
+        return self.name
+
+    @property
+    def ancestor_ids(self):
+        """ID предков от корня к родителю (без запросов к БД)"""
+        return split_path(self.path)[:-1]
+
+    def get_ancestors(self, include_self=False):
+        """Предки от корня вниз — один запрос по первичному ключу"""
+        ids = split_path(self.path) if include_self else self.ancestor_ids
+        return Directory.objects.filter(pk__in=ids).order_by('depth')
+
+    def get_descendants(self, include_self=False):
+        return Directory.objects.descendants_of(self, include_self=include_self)
+
+    def get_full_name(self, names=None):
+        """
+        Полное имя "Корень / ... / Категория". names — готовый словарь {id: name},
+        иначе имена предков выбираются одним запросом.
+        """
+        if not self.parent_id:
+            return self.name
+        if names is None:
+            names = dict(Directory.objects.filter(pk__in=self.ancestor_ids).values_list('id', 'name'))
+        return ' / '.join([names.get(pk, '') for pk in self.ancestor_ids] + [self.name])
+
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_id and self._is_own_subtree(self.parent_id):
+            raise ValidationError({'parent': 'Нельзя переместить категорию внутрь неё самой'})
+
+    def _is_own_subtree(self, directory_id):
+        return Directory.objects.filter(pk=directory_id).descendants_of(self, include_self=True).exists()
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'parent' not in update_fields:
+            return super().save(*args, **kwargs)
+
+        old = None
+        if self.pk:
+            old = Directory.objects.filter(pk=self.pk).values('parent_id', 'path', 'depth').first()
+        if old and update_fields is None:
+            # path и depth пишутся только UPDATE-ами ниже: устаревший экземпляр
+            # (например, потомок, загруженный до переноса предка) не затрёт их
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('path', 'depth')
+            ]
+        if old and old['path'] and old['parent_id'] == self.parent_id:
+            self.path, self.depth = old['path'], old['depth']
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            parent_path, depth = PATH_SEPARATOR, 0
+            if self.parent_id:
+                parent_path, parent_depth = Directory.objects.filter(
+                    pk=self.parent_id
+                ).values_list('path', 'depth').get()
+                if old and old['path'] and parent_path.startswith(old['path']):
+                    raise ValidationError({'parent': 'Нельзя переместить категорию внутрь неё самой'})
+                depth = parent_depth + 1
+
+            super().save(*args, **kwargs)
+            new_path = f'{parent_path}{self.pk}{PATH_SEPARATOR}'
+
+            if old and old['path']:
+                # Перенос: пути и уровни всего поддерева переписываются одним UPDATE
+                Directory.objects.move_subtree(old['path'], new_path, depth - old['depth'])
+            else:
+                Directory.objects.filter(pk=self.pk).update(path=new_path, depth=depth)
+            self.path, self.depth = new_path, depth
+
     def get_courses_count(self):
         """Возвращает количество курсов в этой категории и подкатегориях"""
         from courses.models import Course
-        count = Course.objects.filter(directory=self).count()
-        for subdir in self.subdirectories.all():
-            count += subdir.get_courses_count()
-        return count
+        return Course.objects.filter(directory__path__startswith=self.path).count()
     
     def get_lessons_count(self):
         """Возвращает количество уроков в этой категории и подкатегориях"""
         from courses.models import Lesson
-        count = Lesson.objects.filter(directory=self).count()
-        for subdir in self.subdirectories.all():
-            count += subdir.get_lessons_count()
-        return count
+        return Lesson.objects.filter(directory__path__startswith=self.path).count()
     
     def get_quizzes_count(self):
         """Возвращает количество тестов в этой категории и подкатегориях"""
         from quizzes.models import Quiz
-        count = Quiz.objects.filter(directory=self).count()
-        for subdir in self.subdirectories.all():
-            count += subdir.get_quizzes_count()
-        return count
\ No newline at end of file
+        return Quiz.objects.filter(directory__path__startswith=self.path).count()
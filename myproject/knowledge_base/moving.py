@@ -0,0 +1,134 @@
+"""
+Пакетное перемещение и упорядочивание элементов базы знаний:
+категории, курсы, уроки и тесты переносятся в одну целевую категорию
+массовыми UPDATE в одной транзакции.
+"""
+from django.db import transaction
+from django.db.models import Case, Max, Value, When
+from django.utils import timezone
+
+from courses.models import Course, Lesson
+from myapp import cache as cache_tools
+from myapp.learning_state import CONTENT_NAMESPACE
+from quizzes.models import Quiz
+from .cache import KB_TREE_NAMESPACE
+from .models import PATH_SEPARATOR, Directory
+
+
+# Тип элемента в запросе → модель. Уникальные уроки и тесты курсов в базе знаний
+# не показываются, поэтому не перемещаются
+ITEM_QUERYSETS = {
+    'directory': lambda: Directory.objects.all(),
+    'course': lambda: Course.objects.all(),
+    'lesson': lambda: Lesson.objects.filter(course_only=False),
+    'quiz': lambda: Quiz.objects.filter(course_only=False),
+}
+
+
+class MoveError(ValueError):
+    """Перемещение невозможно (неизвестный тип, перенос категории внутрь себя)"""
+
+
+def _group_ids(items):
+    """[{'type': 'lesson', 'id': 5}, ...] → {'lesson': [5, ...]} с сохранением порядка"""
+    grouped = {kind: [] for kind in ITEM_QUERYSETS}
+    for item in items or []:
+        kind = item.get('type') if isinstance(item, dict) else None
+        if kind not in grouped:
+            raise MoveError(f'Неизвестный тип элемента: {kind}')
+        try:
+            item_id = int(item.get('id'))
+        except (TypeError, ValueError):
+            raise MoveError('Некорректный ID элемента')
+        if item_id not in grouped[kind]:
+            grouped[kind].append(item_id)
+    return grouped
+
+
+def _move_directories(directory_ids, target):
+    """
+    Переносит категории в target с переписыванием путей поддеревьев
+    (один UPDATE на каждую переносимую категорию) и ставит их в конец
+    списка подкатегорий target в исходном порядке.
+    """
+    directories = list(
+        Directory.objects.filter(pk__in=directory_ids).order_by('depth').values('id', 'path', 'depth')
+    )
+    for directory in directories:
+        if target and target.path.startswith(directory['path']):
+            raise MoveError('Нельзя переместить категорию внутрь неё самой')
+
+    siblings = Directory.objects.filter(parent=target) if target else Directory.objects.filter(parent__isnull=True)
+    next_order = (siblings.exclude(pk__in=directory_ids).aggregate(max_order=Max('order'))['max_order'] or 0) + 1
+    position = {pk: index for index, pk in enumerate(directory_ids)}
+
+    parent_path = target.path if target else PATH_SEPARATOR
+    depth = target.depth + 1 if target else 0
+    for directory in directories:
+        # Предок этой категории мог быть перенесён раньше в этом цикле — берём актуальный путь
+        old_path, old_depth = Directory.objects.filter(pk=directory['id']).values_list('path', 'depth').get()
+        Directory.objects.move_subtree(old_path, f'{parent_path}{directory["id"]}{PATH_SEPARATOR}', depth - old_depth)
+
+    Directory.objects.filter(pk__in=[directory['id'] for directory in directories]).update(
+        parent=target,
+        order=Case(
+            *[When(pk=pk, then=Value(next_order + position[pk])) for pk in directory_ids],
+            default=Value(next_order),
+        ),
+    )
+    return len(directories)
+
+
+def _apply_order(queryset, ids, **fields):
+    """Порядок элементов по списку ID одним UPDATE ... CASE"""
+    if not ids:
+        return 0
+    return queryset.filter(pk__in=ids).update(
+        order=Case(*[When(pk=pk, then=Value(index)) for index, pk in enumerate(ids, start=1)]),
+        **fields,
+    )
+
+
+def move_items(target, items, order=None):
+    """
+    Переносит элементы в категорию target (None — корень) и, если передан order,
+    задаёт новый порядок категорий и уроков внутри target.
+
+    Args:
+        target (Directory | None): целевая категория.
+        items (list[dict]): элементы вида {'type': 'directory'|'course'|'lesson'|'quiz', 'id': int}.
+        order (list[dict]): элементы target в нужном порядке (того же вида).
+            Курсы и тесты сортируются по названию, поэтому учитываются только
+            категории и уроки.
+
+    Returns:
+        dict: количество перенесённых элементов каждого типа.
+
+    Raises:
+        MoveError: неизвестный тип элемента или перенос категории внутрь себя.
+    """
+    grouped = _group_ids(items)
+    ordered = _group_ids(order)
+    now = timezone.now()
+
+    with transaction.atomic():
+        moved = {'directory': _move_directories(grouped['directory'], target) if grouped['directory'] else 0}
+        for kind in ('course', 'lesson', 'quiz'):
+            moved[kind] = ITEM_QUERYSETS[kind]().filter(pk__in=grouped[kind]).update(
+                directory=target, updated_at=now
+            ) if grouped[kind] else 0
+
+        _apply_order(
+            Directory.objects.filter(parent=target) if target else Directory.objects.filter(parent__isnull=True),
+            ordered['directory'],
+        )
+        lessons = ITEM_QUERYSETS['lesson']()
+        _apply_order(
+            lessons.filter(directory=target) if target else lessons.filter(directory__isnull=True),
+            ordered['lesson'],
+            updated_at=now,
+        )
+
+        # Массовые UPDATE не отправляют сигналы — сбрасываем кэш дерева и содержимого явно
+        cache_tools.bump(KB_TREE_NAMESPACE, CONTENT_NAMESPACE)
+    return moved
@@ -0,0 +1,139 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils.html import escape, strip_tags
+
+from courses.models import Course, Lesson
+from myapp.models import UserCourse
+from quizzes.models import Quiz
+
+
+SEARCH_CONFIG = 'russian'
+
+# Сколько результатов каждого типа возвращать
+RESULTS_PER_TYPE = 20
+
+# Маркеры подсветки: заменяются на <mark> после очистки HTML фрагмента
+_START_SEL = '\x02'
+_STOP_SEL = '\x03'
+
+
+def _assigned_course_ids(user):
+    return UserCourse.objects.filter(user=user).values('course_id')
+
+
+def _visible_courses(user):
+    if user.is_staff:
+        return Course.objects.all()
+    return Course.objects.filter(id__in=_assigned_course_ids(user))
+
+
+def _visible_lessons(user):
+    if user.is_staff:
+        return Lesson.objects.all()
+    # Ученик видит уроки только назначенных ему курсов (в т.ч. уникальные уроки курса)
+    return Lesson.objects.filter(
+        id__in=Lesson.courses.through.objects.filter(
+            course_id__in=_assigned_course_ids(user)
+        ).values('lesson_id')
+    )
+
+
+def _visible_quizzes(user):
+    if user.is_staff:
+        return Quiz.objects.all()
+    assigned = _assigned_course_ids(user)
+    return Quiz.objects.filter(
+        Q(id__in=Course.quizzes.through.objects.filter(course_id__in=assigned).values('quiz_id'))
+        | Q(id__in=Course.objects.filter(id__in=assigned, final_quiz__isnull=False).values('final_quiz_id'))
+    )
+
+
+def _format_headline(headline):
+    """Убирает HTML из фрагмента и превращает маркеры в безопасную подсветку"""
+    text = escape(strip_tags(headline or ''))
+    return text.replace(_START_SEL, '<mark>').replace(_STOP_SEL, '</mark>')
+
+
+def _ranked_ids(queryset, query):
+    """ID лучших совпадений по рангу: индекс GIN + сортировка только найденных строк"""
+    return list(
+        queryset.filter(search_vector=query)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', 'pk')
+        .values_list('pk', flat=True)[:RESULTS_PER_TYPE]
+    )
+
+
+def _headline(expression, query):
+    return SearchHeadline(
+        expression,
+        query,
+        config=SEARCH_CONFIG,
+        start_sel=_START_SEL,
+        stop_sel=_STOP_SEL,
+        max_words=35,
+        min_words=15,
+        max_fragments=2,
+    )
+
+
+def search_materials(user, text):
+    """
+    Полнотекстовый поиск по курсам, урокам и тестам с учётом прав пользователя.
+    Сначала выбираются ID лучших совпадений, затем фрагменты с подсветкой
+    строятся только для них — ts_headline не вызывается для всей выборки.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+    course_ids = _ranked_ids(_visible_courses(user), query)
+    courses = Course.objects.filter(pk__in=course_ids).annotate(
+        headline=_headline('description', query)
+    ).values('pk', 'title', 'slug', 'headline')
+    courses_by_id = {row['pk']: row for row in courses}
+
+    lesson_ids = _ranked_ids(_visible_lessons(user), query)
+    lessons = Lesson.objects.filter(pk__in=lesson_ids).annotate(
+        headline=_headline('content', query)
+    ).values('pk', 'title', 'course_only', 'headline')
+    lessons_by_id = {row['pk']: row for row in lessons}
+
+    quiz_ids = _ranked_ids(_visible_quizzes(user), query)
+    quizzes = Quiz.objects.filter(pk__in=quiz_ids).annotate(
+        questions_text=StringAgg('question__text', delimiter=' ', default=''),
+    ).annotate(
+        headline=_headline('questions_text', query)
+    ).values('pk', 'name', 'headline')
+    quizzes_by_id = {row['pk']: row for row in quizzes}
+
+    return {
+        'courses': [
+            {
+                'id': pk,
+                'title': courses_by_id[pk]['title'],
+                'url': reverse('courses:course_detail', kwargs={'slug': courses_by_id[pk]['slug']}),
+                'snippet': _format_headline(courses_by_id[pk]['headline']),
+            }
+            for pk in course_ids if pk in courses_by_id
+        ],
+        'lessons': [
+            {
+                'id': pk,
+                'title': lessons_by_id[pk]['title'],
+                'course_only': lessons_by_id[pk]['course_only'],
+                'url': reverse('courses:lesson_detail_standalone', kwargs={'lesson_id': pk}),
+                'snippet': _format_headline(lessons_by_id[pk]['headline']),
+            }
+            for pk in lesson_ids if pk in lessons_by_id
+        ],
+        'quizzes': [
+            {
+                'id': pk,
+                'name': quizzes_by_id[pk]['name'],
+                'url': reverse('quizzes:quiz_start', kwargs={'quiz_id': pk}),
+                'snippet': _format_headline(quizzes_by_id[pk]['headline']),
+            }
+            for pk in quiz_ids if pk in quizzes_by_id
+        ],
+    }
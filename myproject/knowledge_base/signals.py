@@ -0,0 +1,7 @@
+from myapp import cache as cache_tools
+from .cache import KB_TREE_NAMESPACE
+from .models import Directory
+
+
+# Реестр инвалидации кэша: любое изменение категорий меняет дерево базы знаний
+cache_tools.invalidates(Directory, KB_TREE_NAMESPACE)
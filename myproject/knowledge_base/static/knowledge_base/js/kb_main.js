@@ -621,6 +621,8 @@ document.addEventListener('DOMContentLoaded', function() {
         lessonsPane.classList.add('show', 'active');
         quizzesPane.classList.remove('show', 'active');
         
+        // Сбрасываем поиск и выбранные материалы предыдущего курса
+        resetMaterialsSearch();
         // Сбрасываем состояние уроков
         resetLessonsState();
         // Сбрасываем состояние тестов
@@ -680,26 +682,97 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Состояние поиска и постраничной загрузки материалов
+    const MATERIALS_SEARCH_DELAY = 300;
+    const materialsState = {
+        lessons: { query: '', page: 1 },
+        quizzes: { query: '', page: 1 },
+    };
+
     // Функции для сброса состояния
     function resetLessonsState() {
+        materialsState.lessons.page = 1;
         document.getElementById('lessons-loading').style.display = 'block';
         document.getElementById('lessons-list').style.display = 'none';
         document.getElementById('lessons-error').style.display = 'none';
         document.getElementById('lessons-empty').style.display = 'none';
-        document.getElementById('lessons-container').innerHTML = '';
+        document.getElementById('lessons-more').style.display = 'none';
+        keepCheckedItems(document.getElementById('lessons-container'));
     }
     
     function resetQuizzesState() {
+        materialsState.quizzes.page = 1;
         document.getElementById('quizzes-loading').style.display = 'block';
         document.getElementById('quizzes-list').style.display = 'none';
         document.getElementById('quizzes-error').style.display = 'none';
         document.getElementById('quizzes-empty').style.display = 'none';
-        document.getElementById('quizzes-container').innerHTML = '';
+        document.getElementById('quizzes-more').style.display = 'none';
+        keepCheckedItems(document.getElementById('quizzes-container'));
+    }
+
+    // Оставляет в списке только отмеченные материалы (чтобы новый поиск не сбрасывал выбор)
+    function keepCheckedItems(container) {
+        const checked = Array.from(container.querySelectorAll('input:checked'))
+            .map(input => input.closest('label'));
+        container.innerHTML = '';
+        checked.forEach(label => container.appendChild(label));
+    }
+
+    // Сброс поиска при открытии окна для другого курса
+    function resetMaterialsSearch() {
+        ['lessons', 'quizzes'].forEach(kind => {
+            materialsState[kind].query = '';
+            materialsState[kind].page = 1;
+            const input = document.getElementById(`${kind}-search`);
+            if (input) input.value = '';
+            document.getElementById(`${kind}-container`).innerHTML = '';
+        });
     }
+
+    function materialsUrl(courseSlug, kind) {
+        const state = materialsState[kind];
+        const params = new URLSearchParams({ q: state.query, page: state.page });
+        return `/courses/course/${courseSlug}/available-${kind}/?${params}`;
+    }
+
+    function bindMaterialsSearch(kind, loader) {
+        const input = document.getElementById(`${kind}-search`);
+        const moreButton = document.getElementById(`${kind}-more`);
+        let timer = null;
+
+        if (input) {
+            input.addEventListener('input', function() {
+                clearTimeout(timer);
+                timer = setTimeout(() => {
+                    materialsState[kind].query = input.value.trim();
+                    if (kind === 'lessons') {
+                        resetLessonsState();
+                    } else {
+                        resetQuizzesState();
+                    }
+                    loader(currentCourseSlug);
+                }, MATERIALS_SEARCH_DELAY);
+            });
+            // Enter в поле поиска не должен отправлять форму добавления
+            input.addEventListener('keydown', function(event) {
+                if (event.key === 'Enter') event.preventDefault();
+            });
+        }
+        if (moreButton) {
+            moreButton.addEventListener('click', function() {
+                materialsState[kind].page += 1;
+                moreButton.style.display = 'none';
+                loader(currentCourseSlug, true);
+            });
+        }
+    }
+
+    bindMaterialsSearch('lessons', loadAvailableLessons);
+    bindMaterialsSearch('quizzes', loadAvailableQuizzes);
     
-    // Функция загрузки списка доступных уроков
+    // Функция загрузки страницы доступных уроков
     function loadAvailableLessons(courseSlug) {
-        fetch(`/courses/course/${courseSlug}/available-lessons/`)
+        fetch(materialsUrl(courseSlug, 'lessons'))
             .then(response => {
                 if (!response.ok) {
                     throw new Error('Ошибка загрузки уроков');
@@ -708,12 +781,13 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(data => {
                 document.getElementById('lessons-loading').style.display = 'none';
+                const container = document.getElementById('lessons-container');
                 
                 if (data.lessons && data.lessons.length > 0) {
-                    const container = document.getElementById('lessons-container');
-                    container.innerHTML = '';
-                    
                     data.lessons.forEach(lesson => {
+                        if (container.querySelector(`input[value="${lesson.id}"]`)) {
+                            return;
+                        }
                         const lessonItem = document.createElement('label');
                         lessonItem.className = 'list-group-item list-group-item-action d-flex justify-content-between align-items-center mb-0 cursor-pointer';
                         lessonItem.style.cursor = 'pointer';
@@ -731,11 +805,15 @@ document.addEventListener('DOMContentLoaded', function() {
                         `;
                         container.appendChild(lessonItem);
                     });
-                    
+                }
+
+                if (container.children.length > 0) {
                     document.getElementById('lessons-list').style.display = 'block';
+                    document.getElementById('lessons-empty').style.display = 'none';
                 } else {
                     document.getElementById('lessons-empty').style.display = 'block';
                 }
+                document.getElementById('lessons-more').style.display = data.has_more ? 'inline-block' : 'none';
             })
             .catch(error => {
                 document.getElementById('lessons-loading').style.display = 'none';
@@ -745,7 +823,7 @@ document.addEventListener('DOMContentLoaded', function() {
             });
     }
     
-    // Функция загрузки списка доступных тестов
+    // Функция загрузки страницы доступных тестов
     function loadAvailableQuizzes(courseSlug) {
         if (!courseSlug) {
             console.error('courseSlug не передан в loadAvailableQuizzes');
@@ -756,7 +834,7 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
-        fetch(`/courses/course/${courseSlug}/available-quizzes/`)
+        fetch(materialsUrl(courseSlug, 'quizzes'))
             .then(response => {
                 if (!response.ok) {
                     // Пытаемся получить текст ошибки
@@ -768,12 +846,13 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(data => {
                 document.getElementById('quizzes-loading').style.display = 'none';
+                const container = document.getElementById('quizzes-container');
                 
                 if (data.quizzes && data.quizzes.length > 0) {
-                    const container = document.getElementById('quizzes-container');
-                    container.innerHTML = '';
-                    
                     data.quizzes.forEach(quiz => {
+                        if (container.querySelector(`input[value="${quiz.id}"]`)) {
+                            return;
+                        }
                         const quizItem = document.createElement('label');
                         quizItem.className = 'list-group-item list-group-item-action d-flex justify-content-between align-items-center mb-0 cursor-pointer';
                         quizItem.style.cursor = 'pointer';
@@ -790,11 +869,15 @@ document.addEventListener('DOMContentLoaded', function() {
                         `;
                         container.appendChild(quizItem);
                     });
-                    
+                }
+
+                if (container.children.length > 0) {
                     document.getElementById('quizzes-list').style.display = 'block';
+                    document.getElementById('quizzes-empty').style.display = 'none';
                 } else {
                     document.getElementById('quizzes-empty').style.display = 'block';
                 }
+                document.getElementById('quizzes-more').style.display = data.has_more ? 'inline-block' : 'none';
             })
             .catch(error => {
                 console.error('Ошибка загрузки тестов:', error);
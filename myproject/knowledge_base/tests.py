@@ -1,3 +1,239 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from courses.models import Course, Lesson
+from myapp.models import UserCourse, UserProgress
+from quizzes.models import Quiz
+from users.models import Profile
+from .deletion import delete_subtree
+from .models import Directory
+from .moving import MoveError, move_items
+
+
+class KbHomeQueryBudgetTest(TestCase):
+    """Страница папки базы знаний выполняет одинаковое число запросов при любом количестве курсов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='password', is_staff=True)
+        cls.directory = Directory.objects.create(name='Папка')
+        Directory.objects.create(name='Подпапка', parent=cls.directory)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def _add_courses(self, count, start=0):
+        for index in range(start, start + count):
+            course = Course.objects.create(
+                title=f'Курс {index}',
+                description='<p>Описание</p>',
+                author=self.staff,
+                directory=self.directory,
+            )
+            for lesson_index in range(3):
+                lesson = Lesson.objects.create(title=f'Урок {index}.{lesson_index}', content='<p>Текст</p>')
+                lesson.courses.add(course)
+            course.quizzes.add(Quiz.objects.create(name=f'Тест {index}'))
+
+    def _count_queries(self):
+        url = reverse('knowledge_base:kb_directory', kwargs={'directory_id': self.directory.id})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_queries_do_not_grow_with_courses(self):
+        self._add_courses(1)
+        baseline = self._count_queries()
+
+        self._add_courses(10, start=1)
+        self.assertEqual(self._count_queries(), baseline)
+
+    def test_rich_text_is_deferred(self):
+        self._add_courses(2)
+        Lesson.objects.create(title='Урок папки', content='<p>Текст</p>', directory=self.directory)
+        url = reverse('knowledge_base:kb_directory', kwargs={'directory_id': self.directory.id})
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+
+        for query in context.captured_queries:
+            self.assertNotIn('"courses_course"."description"', query['sql'])
+            self.assertNotIn('"courses_lesson"."content"', query['sql'])
+        for item in response.context['courses']:
+            self.assertIn('description', item['course'].get_deferred_fields())
+            for lesson in item['lessons']:
+                self.assertIn('content', lesson.get_deferred_fields())
+        self.assertTrue(response.context['standalone_lessons'])
+        for lesson in response.context['standalone_lessons']:
+            self.assertIn('content', lesson.get_deferred_fields())
+
+
+class DirectoryPathTest(TestCase):
+    """Материализованный путь и уровень поддерева при создании и переносе категории"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.root = Directory.objects.create(name='Корень')
+        cls.child = Directory.objects.create(name='Дочерняя', parent=cls.root)
+        cls.grandchild = Directory.objects.create(name='Внучатая', parent=cls.child)
+        cls.other = Directory.objects.create(name='Другая')
+
+    def _refresh(self, *directories):
+        for directory in directories:
+            directory.refresh_from_db()
+
+    def test_path_and_depth_on_create(self):
+        self.assertEqual(self.root.path, f'/{self.root.pk}/')
+        self.assertEqual(self.grandchild.path, f'/{self.root.pk}/{self.child.pk}/{self.grandchild.pk}/')
+        self.assertEqual(self.grandchild.depth, 2)
+
+    def test_move_rewrites_subtree_paths_and_depths(self):
+        self.child.parent = self.other
+        self.child.save()
+        self._refresh(self.child, self.grandchild)
+
+        self.assertEqual(self.child.path, f'/{self.other.pk}/{self.child.pk}/')
+        self.assertEqual(self.child.depth, 1)
+        self.assertEqual(self.grandchild.path, f'/{self.other.pk}/{self.child.pk}/{self.grandchild.pk}/')
+        self.assertEqual(self.grandchild.depth, 2)
+        self.assertEqual(list(self.root.get_descendants()), [])
+
+    def test_move_to_root(self):
+        self.child.parent = None
+        self.child.save()
+        self._refresh(self.child, self.grandchild)
+
+        self.assertEqual(self.child.depth, 0)
+        self.assertEqual(self.grandchild.path, f'/{self.child.pk}/{self.grandchild.pk}/')
+        self.assertEqual(self.grandchild.depth, 1)
+
+    def test_stale_instance_does_not_overwrite_moved_path(self):
+        stale = Directory.objects.get(pk=self.grandchild.pk)
+        self.child.parent = self.other
+        self.child.save()
+
+        stale.name = 'Переименована'
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.path, f'/{self.other.pk}/{self.child.pk}/{self.grandchild.pk}/')
+
+    def test_move_into_own_subtree_is_rejected(self):
+        self.root.parent = self.grandchild
+        with self.assertRaises(ValidationError):
+            self.root.save()
+        self._refresh(self.root, self.grandchild)
+        self.assertIsNone(self.root.parent_id)
+        self.assertEqual(self.grandchild.depth, 2)
+
+    def test_full_names(self):
+        names = Directory.objects.full_names()
+        self.assertEqual(names[self.grandchild.pk], 'Корень / Дочерняя / Внучатая')
+        self.assertEqual(self.grandchild.get_full_name(), 'Корень / Дочерняя / Внучатая')
+        self.assertEqual(str(self.grandchild), 'Внучатая')
+
+
+class DeleteSubtreeTest(TestCase):
+    """Удаление ветки: уроки ветки пропадают и из курсов вне неё, сами эти курсы остаются"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='password', is_staff=True)
+        cls.learner = User.objects.create_user('learner', password='password')
+        cls.root = Directory.objects.create(name='Удаляемая')
+        cls.child = Directory.objects.create(name='Вложенная', parent=cls.root)
+        cls.kept = Directory.objects.create(name='Остаётся')
+
+        cls.inner_course = Course.objects.create(title='Курс ветки', author=cls.author, directory=cls.child)
+        cls.shared_lesson = Lesson.objects.create(title='Общий урок', content='<p>Текст</p>', directory=cls.child)
+        cls.shared_lesson.courses.add(cls.inner_course)
+        cls.inner_quiz = Quiz.objects.create(name='Тест ветки', directory=cls.root)
+
+        cls.outer_course = Course.objects.create(title='Внешний курс', author=cls.author, directory=cls.kept)
+        cls.outer_lesson = Lesson.objects.create(title='Внешний урок', content='<p>Текст</p>', directory=cls.kept)
+        cls.outer_lesson.courses.add(cls.outer_course)
+        cls.shared_lesson.courses.add(cls.outer_course)
+        cls.outer_course.quizzes.add(cls.inner_quiz)
+
+        UserCourse.objects.create(user=cls.learner, course=cls.outer_course)
+        UserProgress.objects.create(
+            user=cls.learner, course=cls.outer_course, lesson=cls.shared_lesson, completed=True
+        )
+        UserProgress.objects.create(
+            user=cls.learner, course=cls.outer_course, lesson=cls.outer_lesson, completed=True
+        )
+
+    def test_branch_is_deleted_and_outside_course_keeps_its_own_lessons(self):
+        deleted = delete_subtree(self.root.pk)
+
+        self.assertEqual(deleted, {'quizzes': 1, 'lessons': 1, 'courses': 1, 'directories': 2})
+        self.assertFalse(Directory.objects.filter(pk__in=[self.root.pk, self.child.pk]).exists())
+        self.assertTrue(Directory.objects.filter(pk=self.kept.pk).exists())
+        self.assertFalse(Course.objects.filter(pk=self.inner_course.pk).exists())
+        self.assertFalse(Lesson.objects.filter(pk=self.shared_lesson.pk).exists())
+
+        self.assertEqual(list(self.outer_course.lessons.all()), [self.outer_lesson])
+        self.assertFalse(self.outer_course.quizzes.exists())
+        self.assertEqual(
+            list(UserProgress.objects.filter(user=self.learner).values_list('lesson_id', flat=True)),
+            [self.outer_lesson.pk],
+        )
+        self.assertTrue(UserCourse.objects.filter(user=self.learner, course=self.outer_course).exists())
+
+    def test_stats_of_affected_users_are_marked_stale(self):
+        Profile.objects.update_or_create(user=self.learner, defaults={'stats_dirty': False})
+
+        delete_subtree(self.root.pk)
+
+        self.assertTrue(Profile.objects.get(user=self.learner).stats_dirty)
+
+    def test_missing_directory(self):
+        self.assertIsNone(delete_subtree(self.kept.pk + 1000))
+
+
+class MoveItemsTest(TestCase):
+    """Пакетный перенос: пути поддеревьев переписываются, перенос внутрь себя отклоняется целиком"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='password', is_staff=True)
+        cls.source = Directory.objects.create(name='Источник')
+        cls.child = Directory.objects.create(name='Дочерняя', parent=cls.source)
+        cls.grandchild = Directory.objects.create(name='Внучатая', parent=cls.child)
+        cls.target = Directory.objects.create(name='Цель')
+        cls.course = Course.objects.create(title='Курс', author=cls.author, directory=cls.source)
+
+    def test_move_directory_with_subtree(self):
+        moved = move_items(self.target, [{'type': 'directory', 'id': self.child.pk}, {'type': 'course', 'id': self.course.pk}])
+
+        self.assertEqual(moved, {'directory': 1, 'course': 1, 'lesson': 0, 'quiz': 0})
+        self.child.refresh_from_db()
+        self.grandchild.refresh_from_db()
+        self.course.refresh_from_db()
+        self.assertEqual(self.child.parent_id, self.target.pk)
+        self.assertEqual(self.grandchild.path, f'/{self.target.pk}/{self.child.pk}/{self.grandchild.pk}/')
+        self.assertEqual(self.grandchild.depth, 2)
+        self.assertEqual(self.course.directory_id, self.target.pk)
+
+    def test_move_into_own_descendant_is_rejected(self):
+        items = [{'type': 'course', 'id': self.course.pk}, {'type': 'directory', 'id': self.source.pk}]
+        with self.assertRaises(MoveError):
+            move_items(self.grandchild, items)
+
+        self.source.refresh_from_db()
+        self.grandchild.refresh_from_db()
+        self.course.refresh_from_db()
+        self.assertIsNone(self.source.parent_id)
+        self.assertEqual(self.grandchild.path, f'/{self.source.pk}/{self.child.pk}/{self.grandchild.pk}/')
+        self.assertEqual(self.course.directory_id, self.source.pk)
+
+    def test_move_into_itself_is_rejected(self):
+        with self.assertRaises(MoveError):
+            move_items(self.child, [{'type': 'directory', 'id': self.child.pk}])
+
+    def test_unknown_item_type(self):
+        with self.assertRaises(MoveError):
+            move_items(self.target, [{'type': 'user', 'id': 1}])
@@ -0,0 +1,170 @@
+"""
+Данные для ленивого дерева базы знаний (JSON API): один уровень категорий
+со счётчиками и страницы содержимого, а также полный контур дерева из кэша.
+"""
+from collections import Counter
+
+from django.db.models import Count, Exists, OuterRef
+from django.urls import reverse
+
+from courses.models import Course, Lesson
+from myapp import cache as cache_tools
+from quizzes.models import Quiz
+from .cache import KB_TREE_NAMESPACE
+from .models import Directory, split_path
+
+
+# Размер страницы содержимого одного типа в ответе API
+TREE_PAGE_SIZE = 50
+
+CONTENT_KINDS = ('courses', 'lessons', 'quizzes')
+
+
+def _page(queryset, page):
+    """Срез страницы без COUNT(*): лишняя строка показывает, есть ли продолжение"""
+    offset = (page - 1) * TREE_PAGE_SIZE
+    rows = list(queryset[offset:offset + TREE_PAGE_SIZE + 1])
+    return {'items': rows[:TREE_PAGE_SIZE], 'page': page, 'has_more': len(rows) > TREE_PAGE_SIZE}
+
+
+def _in_directory(queryset, directory):
+    if directory is None:
+        return queryset.filter(directory__isnull=True)
+    return queryset.filter(directory=directory)
+
+
+def _courses_page(directory, page):
+    result = _page(
+        _in_directory(Course.objects.cards(), directory)
+        .order_by('title').values('id', 'title', 'slug', 'lessons_count', 'quizzes_count'),
+        page,
+    )
+    result['items'] = [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'url': reverse('courses:course_detail', kwargs={'slug': row['slug']}),
+            'lessons_count': row['lessons_count'],
+            'quizzes_count': row['quizzes_count'],
+        }
+        for row in result['items']
+    ]
+    return result
+
+
+def _lessons_page(directory, page):
+    # Уникальные уроки курсов в базе знаний не показываются (как на KbHome)
+    result = _page(
+        _in_directory(Lesson.objects.filter(course_only=False), directory)
+        .order_by('order', 'title').values('id', 'title'),
+        page,
+    )
+    for row in result['items']:
+        row['url'] = reverse('courses:lesson_detail_standalone', kwargs={'lesson_id': row['id']})
+    return result
+
+
+def _quizzes_page(directory, page):
+    result = _page(
+        _in_directory(Quiz.objects.filter(course_only=False), directory)
+        .order_by('name').values('id', 'name'),
+        page,
+    )
+    for row in result['items']:
+        row['url'] = reverse('quizzes:quiz_start', kwargs={'quiz_id': row['id']})
+    return result
+
+
+_CONTENT_PAGES = {
+    'courses': _courses_page,
+    'lessons': _lessons_page,
+    'quizzes': _quizzes_page,
+}
+
+
+def content_page(directory, kind, page=1):
+    """Одна страница содержимого категории (directory=None — корень)"""
+    return _CONTENT_PAGES[kind](directory, page)
+
+
+def children_level(directory):
+    """
+    Подкатегории одного уровня: счётчики по поддереву (одним запросом)
+    и признак наличия вложенных категорий для кнопки раскрытия.
+    """
+    queryset = Directory.objects.filter(parent=directory) if directory else Directory.objects.filter(parent__isnull=True)
+    rows = queryset.with_subtree_counts().annotate(
+        has_children=Exists(Directory.objects.filter(parent=OuterRef('pk')))
+    ).order_by('order', 'name').values(
+        'id', 'name', 'description', 'has_children', 'courses_total', 'lessons_total', 'quizzes_total'
+    )
+    return [
+        dict(row, url=reverse('knowledge_base:tree_level', kwargs={'directory_id': row['id']}))
+        for row in rows
+    ]
+
+
+def level_payload(directory):
+    """Уровень дерева целиком: категория, подкатегории и первые страницы содержимого"""
+    return {
+        'directory': {
+            'id': directory.id,
+            'name': directory.name,
+            'parent_id': directory.parent_id,
+        } if directory else None,
+        'children': children_level(directory),
+        **{kind: content_page(directory, kind) for kind in CONTENT_KINDS},
+    }
+
+
+def _build_outline():
+    """
+    Полный контур дерева: категории в порядке обхода и счётчики по поддеревьям.
+    Прямые счётчики — три запроса с GROUP BY, суммирование по путям — в памяти.
+    """
+    directories = list(
+        Directory.objects.order_by('depth', 'order', 'name').values('id', 'name', 'parent_id', 'path', 'depth')
+    )
+    totals = {}
+    for kind, queryset in (
+        ('courses', Course.objects.all()),
+        ('lessons', Lesson.objects.filter(course_only=False)),
+        ('quizzes', Quiz.objects.filter(course_only=False)),
+    ):
+        direct = dict(
+            queryset.filter(directory__isnull=False).order_by()
+            .values_list('directory_id').annotate(total=Count('id'))
+        )
+        subtree = Counter()
+        for directory in directories:
+            count = direct.get(directory['id'], 0)
+            if count:
+                for ancestor_id in split_path(directory['path']):
+                    subtree[ancestor_id] += count
+        totals[kind] = subtree
+
+    children = {}
+    for directory in directories:
+        children.setdefault(directory['parent_id'], []).append(directory)
+
+    def walk(parent_id):
+        return [
+            {
+                'id': directory['id'],
+                'name': directory['name'],
+                'depth': directory['depth'],
+                **{f'{kind}_total': totals[kind][directory['id']] for kind in CONTENT_KINDS},
+                'children': walk(directory['id']),
+            }
+            for directory in children.get(parent_id, [])
+        ]
+
+    return walk(None)
+
+
+def get_outline():
+    """
+    Контур дерева из кэша. Пространство kb_tree сбрасывается при изменении
+    категорий, курсов, уроков и тестов (см. signals.py приложений).
+    """
+    return cache_tools.get_or_set(cache_tools.versioned_key(KB_TREE_NAMESPACE, 'outline'), _build_outline)
@@ -9,4 +9,9 @@ urlpatterns = [
     path('directory/<int:directory_id>/edit-name/', kb_views.edit_directory_name, name='edit_directory_name'),
     path('directory/<int:directory_id>/delete/', kb_views.delete_directory, name='delete_directory'),
     path('directory/create/', kb_views.create_directory, name='create_directory'),
+    path('search/', kb_views.search, name='search'),
+    path('tree/', kb_views.tree_level, name='tree_root'),
+    path('tree/<int:directory_id>/', kb_views.tree_level, name='tree_level'),
+    path('tree/outline/', kb_views.tree_outline, name='tree_outline'),
+    path('move/', kb_views.move_items_view, name='move_items'),
 ]
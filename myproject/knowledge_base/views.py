@@ -4,8 +4,14 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db import models
+from django.db.models import Prefetch
+from django.urls import reverse
 import json
 from .models import Directory
+from .moving import MoveError, move_items
+from .search import search_materials
+from .tree import CONTENT_KINDS, content_page, get_outline, level_payload
+from jobs.registry import enqueue
 from courses.models import Course, Lesson
 from quizzes.models import Quiz
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -40,10 +46,10 @@ class KbHome(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
         # Получаем содержимое текущей папки
         if current_directory:
             # Подкатегории текущей папки
-            subdirectories = Directory.objects.filter(parent=current_directory).order_by('order', 'name')
+            subdirectories = Directory.objects.filter(parent=current_directory).with_subtree_counts().order_by('order', 'name')
             
             # Курсы в текущей папке
-            courses = Course.objects.filter(directory=current_directory).select_related('author', 'final_quiz').order_by('title')
+            courses = Course.objects.cards().filter(directory=current_directory).select_related('author', 'final_quiz').order_by('title')
             
             # Тесты в текущей папке (исключаем уникальные тесты курсов)
             quizzes = Quiz.objects.filter(
@@ -52,16 +58,16 @@ class KbHome(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
             ).order_by('name')
             
             # Уроки в текущей папке (исключаем уникальные уроки курсов — они не в БЗ)
-            standalone_lessons = Lesson.objects.filter(
+            standalone_lessons = Lesson.objects.listing().filter(
                 directory=current_directory,
                 course_only=False
             ).order_by('order', 'title')
         else:
             # Корневая папка - показываем корневые категории, курсы и тесты без категории
-            subdirectories = Directory.objects.filter(parent__isnull=True).order_by('order', 'name')
+            subdirectories = Directory.objects.filter(parent__isnull=True).with_subtree_counts().order_by('order', 'name')
             
             # Курсы без категории (directory=None)
-            courses = Course.objects.filter(directory__isnull=True).select_related('author', 'final_quiz').order_by('title')
+            courses = Course.objects.cards().filter(directory__isnull=True).select_related('author', 'final_quiz').order_by('title')
             
             # Тесты без категории (исключаем уникальные тесты курсов)
             quizzes = Quiz.objects.filter(
@@ -70,22 +76,24 @@ class KbHome(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
             ).order_by('name')
             
             # Уроки без категории (исключаем уникальные уроки курсов — они не в БЗ)
-            standalone_lessons = Lesson.objects.filter(
+            standalone_lessons = Lesson.objects.listing().filter(
                 directory__isnull=True,
                 course_only=False
             ).order_by('order', 'title')
         
-        # Уроки и тесты для каждого курса (общая логика для всех курсов)
-        courses_with_lessons = []
-        for course in courses:
-            lessons = Lesson.objects.filter(courses=course).order_by('order')
-            quizzes_count = course.quizzes.count()
-            courses_with_lessons.append({
+        # Уроки всех курсов папки — один запрос через Prefetch, счётчики — из аннотаций cards()
+        courses = courses.prefetch_related(
+            Prefetch('lessons', queryset=Lesson.objects.listing().order_by('order'), to_attr='kb_lessons')
+        )
+        courses_with_lessons = [
+            {
                 'course': course,
-                'lessons': lessons,
-                'lessons_count': lessons.count(),
-                'quizzes_count': quizzes_count
-            })
+                'lessons': course.kb_lessons,
+                'lessons_count': course.lessons_count,
+                'quizzes_count': course.quizzes_count
+            }
+            for course in courses
+        ]
         
         context.update({
             'current_directory': current_directory,
@@ -111,15 +119,9 @@ class KbHome(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
             'is_root': True
         })
         
-        # Если есть текущая папка, добавляем путь к ней
+        # Если есть текущая папка, добавляем путь к ней (предки — одним запросом по пути)
         if directory:
-            path = []
-            current = directory
-            while current:
-                path.insert(0, current)
-                current = current.parent
-            
-            for dir_item in path:
+            for dir_item in directory.get_ancestors(include_self=True).only('id', 'name'):
                 breadcrumbs.append({
                     'name': dir_item.name,
                     'url': f'/kb/directory/{dir_item.id}/',
@@ -191,8 +193,11 @@ def delete_directory(request, directory_id):
         directory_name = directory.name
         
         if action == 'move_to_root':
-            # Перемещаем всё содержимое в корень
-            Directory.objects.filter(parent=directory).update(parent=None)
+            # Перемещаем всё содержимое в корень. Подкатегории переносятся через save(),
+            # чтобы переписать материализованные пути их поддеревьев
+            for subdirectory in Directory.objects.filter(parent=directory):
+                subdirectory.parent = None
+                subdirectory.save(update_fields=['parent'])
             Course.objects.filter(directory=directory).update(directory=None)
             Lesson.objects.filter(directory=directory).update(directory=None)
             Quiz.objects.filter(directory=directory).update(directory=None)
@@ -206,29 +211,26 @@ def delete_directory(request, directory_id):
             })
         
         elif action == 'delete_all':
-            # Рекурсивная функция для удаления всего содержимого
-            def delete_directory_recursive(dir_obj):
-                # Сначала удаляем все вложенные директории рекурсивно
-                for subdir in Directory.objects.filter(parent=dir_obj):
-                    delete_directory_recursive(subdir)
-                
-                # Удаляем курсы в этой директории (и связанные с ними уроки через курс)
-                Course.objects.filter(directory=dir_obj).delete()
-                
-                # Удаляем уроки в этой директории
-                Lesson.objects.filter(directory=dir_obj).delete()
-                
-                # Удаляем тесты в этой директории
-                Quiz.objects.filter(directory=dir_obj).delete()
-                
-                # Удаляем саму директорию
-                dir_obj.delete()
-            
-            delete_directory_recursive(directory)
-            
+            if not has_content:
+                directory.delete()
+                return JsonResponse({
+                    'success': True,
+                    'message': f'Категория "{directory_name}" удалена.'
+                })
+
+            # Каскад по большому поддереву может занимать минуты — удаляем в фоне
+            job = enqueue(
+                'knowledge_base.delete_directory',
+                {'directory_id': directory.id},
+                user=request.user,
+                description=f'Удаление категории «{directory_name}» со всем содержимым',
+            )
             return JsonResponse({
-                'success': True, 
-                'message': f'Категория "{directory_name}" и всё её содержимое удалены безвозвратно.'
+                'success': True,
+                'queued': True,
+                'job_id': job.id,
+                'status_url': reverse('jobs:job_status', kwargs={'job_id': job.id}),
+                'message': f'Категория "{directory_name}" и всё её содержимое будут удалены в фоне.'
             })
         
         else:
@@ -285,3 +287,74 @@ def create_directory(request):
         return JsonResponse({'success': False, 'error': 'Неверный формат данных'}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+@login_required
+def search(request):
+    """
+    JSON API полнотекстового поиска по курсам, урокам и тестам.
+    Staff ищет по всей базе, ученик — только по назначенным ему курсам.
+    """
+    text = request.GET.get('q', '').strip()[:200]
+    if len(text) < 2:
+        return JsonResponse({'query': text, 'results': {'courses': [], 'lessons': [], 'quizzes': []}})
+    return JsonResponse({'query': text, 'results': search_materials(request.user, text)})
+
+
+def _tree_page_param(request):
+    try:
+        return max(int(request.GET.get('page', 1)), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def tree_level(request, directory_id=None):
+    """
+    JSON API одного уровня дерева: подкатегории со счётчиками и первые страницы
+    курсов, уроков и тестов. С ?kind=courses|lessons|quizzes&page=N возвращает
+    только следующую страницу содержимого указанного типа.
+    """
+    directory = get_object_or_404(Directory, id=directory_id) if directory_id else None
+
+    kind = request.GET.get('kind')
+    if kind:
+        if kind not in CONTENT_KINDS:
+            return JsonResponse({'success': False, 'error': 'Неизвестный тип содержимого'}, status=400)
+        return JsonResponse({kind: content_page(directory, kind, _tree_page_param(request))})
+
+    return JsonResponse(level_payload(directory))
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def tree_outline(request):
+    """JSON API полного контура дерева категорий со счётчиками (из кэша)"""
+    return JsonResponse({'outline': get_outline()})
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@require_POST
+def move_items_view(request):
+    """
+    AJAX пакетного перемещения: {"target_id": id | null, "items": [...], "order": [...]},
+    элементы вида {"type": "directory"|"course"|"lesson"|"quiz", "id": ID}.
+    Возвращает обновлённый уровень целевой категории для перерисовки на клиенте.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Неверный формат данных'}, status=400)
+
+    target_id = data.get('target_id')
+    target = get_object_or_404(Directory, id=target_id) if target_id else None
+    try:
+        moved = move_items(target, data.get('items'), data.get('order'))
+    except MoveError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    if target:
+        target.refresh_from_db()
+    return JsonResponse({'success': True, 'moved': moved, 'target': level_payload(target)})
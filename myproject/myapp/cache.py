@@ -0,0 +1,167 @@
+"""
+Общие инструменты кэширования: версионируемые пространства имён ключей,
+get_or_set с защитой от одновременного построения (single-flight),
+пакетные get_many/set_many и реестр «модель → пространства имён»,
+которые сбрасываются при её изменении.
+"""
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+# Сколько держится блокировка построения значения и сколько её ждут другие процессы (сек.)
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+
+def version_key(namespace):
+    return f'ns_version:{namespace}'
+
+
+def _new_version():
+    # Версии только сравниваются на равенство: уникальную метку можно записать
+    # без чтения, в том числе пачкой через set_many
+    return time.time_ns()
+
+
+def namespace_versions(*namespaces):
+    """
+    Текущие версии пространств имён одним обращением к кэшу.
+    Вытесненная версия заводится заново, чтобы старые записи не совпали с ней.
+    """
+    keys = {namespace: version_key(namespace) for namespace in namespaces}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for namespace, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, _new_version(), None)
+            version = cache.get(key)
+        versions[namespace] = version
+    return versions
+
+
+def make_key(namespace, *parts, version):
+    return ':'.join([namespace, str(version), *map(str, parts)])
+
+
+def versioned_key(namespace, *parts):
+    """Ключ в пространстве имён с его текущей версией"""
+    return make_key(namespace, *parts, version=namespace_versions(namespace)[namespace])
+
+
+def bump(*namespaces):
+    """
+    Сбрасывает пространства имён сменой версии. Выполняется после фиксации
+    транзакции, чтобы параллельный запрос не закэшировал под новой версией
+    ещё не зафиксированные данные.
+    """
+    if namespaces:
+        transaction.on_commit(lambda: cache.set_many(
+            {version_key(namespace): _new_version() for namespace in set(namespaces)}, None
+        ))
+
+
+def get_or_set(key, builder, timeout=DEFAULT_TIMEOUT):
+    """
+    cache.get_or_set с single-flight: при промахе значение строит один процесс,
+    остальные недолго ждут его результат вместо параллельного построения.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock_key = f'{key}:lock'
+    acquired = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    if acquired is True:
+        try:
+            value = builder()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    # Ждём только реально занятую блокировку: при недоступном кэше
+    # (DJANGO_REDIS_IGNORE_EXCEPTIONS) add() возвращает None, а блокировки нет
+    if cache.get(lock_key) is None:
+        return builder()
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    # Не дождались — строим сами, но не мешаем владельцу блокировки записать значение
+    return builder()
+
+
+def get_many(namespace, ids):
+    """Значения для набора ID из пространства имён одним обращением: {id: значение} для найденных"""
+    version = namespace_versions(namespace)[namespace]
+    keys = {make_key(namespace, id_, version=version): id_ for id_ in ids}
+    return {keys[key]: value for key, value in cache.get_many(keys).items()}
+
+
+def set_many(namespace, values, timeout=DEFAULT_TIMEOUT):
+    """Записывает {id: значение} в пространство имён одним обращением"""
+    version = namespace_versions(namespace)[namespace]
+    cache.set_many(
+        {make_key(namespace, id_, version=version): value for id_, value in values.items()},
+        timeout,
+    )
+
+
+def get_many_or_set(namespace, ids, builder, timeout=DEFAULT_TIMEOUT):
+    """
+    Пакетное чтение с достройкой: builder(missing_ids) вызывается один раз
+    для всех отсутствующих ID и возвращает {id: значение}.
+    """
+    ids = list(ids)
+    result = get_many(namespace, ids)
+    missing = [id_ for id_ in ids if id_ not in result]
+    if missing:
+        built = builder(missing)
+        set_many(namespace, built, timeout)
+        result.update(built)
+    return result
+
+
+# Реестр инвалидации: модель → пространства имён (строка или функция от экземпляра)
+_registry = defaultdict(list)
+
+
+def invalidates(model, *namespaces):
+    """
+    Регистрирует пространства имён, которые сбрасываются при изменении модели.
+    Для промежуточных таблиц ManyToMany (Model.field.through) используется m2m_changed;
+    в этом случае допускаются только строковые пространства имён.
+    """
+    _registry[model].extend(namespaces)
+    dispatch_uid = f'cache_invalidation:{model._meta.label}'
+    if model._meta.auto_created:
+        m2m_changed.connect(_on_m2m_changed, sender=model, dispatch_uid=dispatch_uid)
+    else:
+        post_save.connect(_on_change, sender=model, dispatch_uid=dispatch_uid)
+        post_delete.connect(_on_change, sender=model, dispatch_uid=dispatch_uid)
+
+
+def registered_namespaces(model):
+    return list(_registry.get(model, []))
+
+
+def _on_change(sender, instance, **kwargs):
+    bump(*(namespace(instance) if callable(namespace) else namespace for namespace in _registry[sender]))
+
+
+def _on_m2m_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump(*(namespace for namespace in _registry[sender] if not callable(namespace)))
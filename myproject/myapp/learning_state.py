@@ -0,0 +1,59 @@
+from django.core.cache import cache
+
+from . import cache as cache_tools
+
+
+# Записи живут долго: актуальность обеспечивают версии, а не время жизни
+LEARNING_STATE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Результат построения для конкретных версий нужен только одновременным промахам
+LEARNING_STATE_BUILD_TIMEOUT = 60
+
+# Пространство имён содержимого курсов (см. реестр инвалидации в signals.py приложений)
+CONTENT_NAMESPACE = 'course_content'
+
+
+def user_namespace(user_id):
+    """Пространство имён состояния обучения пользователя: прогресс, тесты, назначения"""
+    return f'learning_state:user:{user_id}'
+
+
+def _entry_key(name, user_id):
+    return f'learning_state:{name}:{user_id}'
+
+
+def bump_user_learning_state(*user_ids):
+    """Меняет версию состояния обучения пользователей (для записей в обход сигналов)"""
+    cache_tools.bump(*(user_namespace(user_id) for user_id in user_ids))
+
+
+def bump_content_version():
+    """Меняет версию содержимого курсов — устаревают записи всех пользователей"""
+    cache_tools.bump(CONTENT_NAMESPACE)
+
+
+def get_learning_state_cached(user, name, builder):
+    """
+    Кэш данных, зависящих только от состояния обучения пользователя и содержимого курсов.
+    Попадание в кэш стоит одного get_many (запись + две версии) и не требует запросов к БД;
+    запись считается актуальной, только если обе версии совпадают с сохранёнными в ней.
+    """
+    entry_key = _entry_key(name, user.pk)
+    user_key = cache_tools.version_key(user_namespace(user.pk))
+    content_key = cache_tools.version_key(CONTENT_NAMESPACE)
+    values = cache.get_many([entry_key, user_key, content_key])
+    versions = (values.get(user_key), values.get(content_key))
+
+    entry = values.get(entry_key)
+    if entry is not None and None not in versions and entry['versions'] == versions:
+        return entry['data']
+
+    if None in versions:
+        current = cache_tools.namespace_versions(user_namespace(user.pk), CONTENT_NAMESPACE)
+        versions = (current[user_namespace(user.pk)], current[CONTENT_NAMESPACE])
+    # Версии прочитаны до построения данных: изменение во время построения
+    # сделает эту запись устаревшей при следующем чтении. Параллельные промахи
+    # (панели страницы загружаются одновременно) ждут одно построение
+    data = cache_tools.get_or_set(f'{entry_key}:{versions[0]}:{versions[1]}', builder, LEARNING_STATE_BUILD_TIMEOUT)
+    cache.set(entry_key, {'versions': versions, 'data': data}, LEARNING_STATE_CACHE_TIMEOUT)
+    return data
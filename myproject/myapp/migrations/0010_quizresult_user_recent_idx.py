@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_remove_useranswer_answer_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['user', '-completed_at', '-id'], name='quizresult_user_recent_idx'),
+        ),
+    ]
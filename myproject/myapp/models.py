@@ -104,6 +104,10 @@ class QuizResult(models.Model):
     class Meta:
         verbose_name = 'Результат теста'
         verbose_name_plural = 'Результаты тестов'
+        indexes = [
+            # История тестов пользователя: курсорная пагинация по (completed_at, id)
+            models.Index(fields=['user', '-completed_at', '-id'], name='quizresult_user_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.quiz_title} ({self.percent}%)"
@@ -0,0 +1,8 @@
+from . import cache as cache_tools
+from .learning_state import user_namespace
+from .models import UserCourse, UserProgress, QuizResult
+
+
+# Прогресс, результаты тестов и назначения меняют состояние обучения пользователя
+for model in (UserProgress, UserCourse, QuizResult):
+    cache_tools.invalidates(model, lambda instance: user_namespace(instance.user_id))
@@ -2,35 +2,19 @@ from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.http import HttpResponse, HttpRequest
 from django.views.generic import TemplateView
-from .models import Course, UserCourse
-from courses.models import Course as CourseModel
 
 class IndexView(TemplateView):
     """Класс представление домашней страницы
 
         Attrs:
             template_name: имя файла для рендера
-            get_context_data: функция передает контекст в шаблон 
     """
     template_name = 'home.html'
 
     def dispatch(self, request, *args, **kwargs):
         if request.user.is_staff:
             return redirect(reverse_lazy('knowledge_base:kb_home'))
-        return super().dispatch(request, *args, **kwargs)        
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        user = self.request.user
-        
-        if user.is_authenticated:
-            # Получаем курсы, назначенные пользователю через UserCourse
-            user_courses = UserCourse.objects.filter(user=user).values_list('course', flat=True)
-            context['courses'] = CourseModel.objects.filter(id__in=user_courses)
-        else:
-            context['courses'] = []
-            
-        return context
+        return super().dispatch(request, *args, **kwargs)
 
 
 def is_admin(user) -> bool:
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'django.contrib.postgres',
     "whitenoise.runserver_nostatic",
     'django.contrib.staticfiles',
 
@@ -57,7 +59,8 @@ INSTALLED_APPS = [
     'users',
     'courses',
     'quizzes',
-    'knowledge_base'
+    'knowledge_base',
+    'jobs',
 ]
 
 X_FRAME_OPTIONS = "SAMEORIGIN"              # allows you to use modals insated of popups
@@ -101,6 +104,9 @@ TEMPLATES = [
 
 MEDIA_URL = '/media/'  # URL для доступа к медиафайлам
 MEDIA_ROOT = BASE_DIR / 'media'  # Папка для хранения медиафайлов
+# Собственные хосты сайта: абсолютные ссылки на их медиафайлы в уроках становятся относительными.
+# Если не заданы — берутся ALLOWED_HOSTS без «*»
+MEDIA_HOSTS = [host.strip() for host in os.getenv('MEDIA_HOSTS', '').split(',') if host.strip()]
 
 STORAGES = {
     "default": { 
@@ -140,6 +146,39 @@ DATABASES = {
 }
 
 
+# Кэш: Redis в продакшене (REDIS_URL, см. compose.yaml), иначе — память процесса.
+# Тесты всегда работают с locmem, чтобы не зависеть от внешнего сервиса.
+REDIS_URL = os.getenv('REDIS_URL')
+TESTING = 'test' in sys.argv
+
+if REDIS_URL and not TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'gazprom_lc',
+            'TIMEOUT': 60 * 60 * 24,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                'SOCKET_CONNECT_TIMEOUT': 2,
+                'SOCKET_TIMEOUT': 2,
+            },
+        }
+    }
+    # Недоступный Redis не должен ронять страницы: кэш просто промахивается
+    DJANGO_REDIS_IGNORE_EXCEPTIONS = True
+    DJANGO_REDIS_LOG_IGNORED_EXCEPTIONS = True
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gazprom-lc',
+            'TIMEOUT': 60 * 60 * 24,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
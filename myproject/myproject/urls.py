@@ -35,6 +35,7 @@ urlpatterns = [
     path('quizzes/', include('quizzes.urls'), name='quizzes'),
     path('kb/', include('knowledge_base.urls'), name='knowledge_base'),
     path('users/', include('users.urls')),
+    path('jobs/', include('jobs.urls')),
     path('profile/quiz_report/<int:quiz_id>/', user_views.quiz_report, name='quiz_report'),
     path('ckeditor5/', include('django_ckeditor_5.urls')),
     path('error_found/', views.page_not_found_view, {'exception': Answer.MultipleObjectsReturned}, name='error'),
@@ -1,10 +1,12 @@
 from django import forms
+from knowledge_base.forms import DirectoryChoiceField
 from .models import Quiz, Question, Answer
 
 class QuizForm(forms.ModelForm):
     class Meta:
         model = Quiz
         fields = ['name', 'directory']
+        field_classes = {'directory': DirectoryChoiceField}
         labels = {
             'directory': 'Категория (необязательно)'
         }
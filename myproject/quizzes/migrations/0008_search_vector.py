@@ -0,0 +1,97 @@
+# Generated manually for full-text search (tsvector + GIN + triggers)
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Вектор теста: название (A) + тексты всех вопросов (B).
+# Изменения вопросов «трогают» search_vector теста, что перезапускает расчёт.
+QUIZ_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION quizzes_quiz_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(
+            (SELECT string_agg(q.text, ' ') FROM quizzes_question q WHERE q.quiz_id = NEW.id), ''
+        )), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER quizzes_quiz_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, search_vector ON quizzes_quiz
+    FOR EACH ROW EXECUTE FUNCTION quizzes_quiz_search_vector_update();
+
+CREATE OR REPLACE FUNCTION quizzes_question_inserted_refresh_quiz() RETURNS trigger AS $$
+BEGIN
+    UPDATE quizzes_quiz SET search_vector = NULL
+    WHERE id IN (SELECT DISTINCT quiz_id FROM new_rows);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION quizzes_question_updated_refresh_quiz() RETURNS trigger AS $$
+BEGIN
+    UPDATE quizzes_quiz SET search_vector = NULL
+    WHERE id IN (SELECT quiz_id FROM new_rows UNION SELECT quiz_id FROM old_rows);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION quizzes_question_deleted_refresh_quiz() RETURNS trigger AS $$
+BEGIN
+    UPDATE quizzes_quiz SET search_vector = NULL
+    WHERE id IN (SELECT DISTINCT quiz_id FROM old_rows);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER quizzes_question_insert_search_trigger
+    AFTER INSERT ON quizzes_question
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION quizzes_question_inserted_refresh_quiz();
+
+CREATE TRIGGER quizzes_question_update_search_trigger
+    AFTER UPDATE ON quizzes_question
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION quizzes_question_updated_refresh_quiz();
+
+CREATE TRIGGER quizzes_question_delete_search_trigger
+    AFTER DELETE ON quizzes_question
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION quizzes_question_deleted_refresh_quiz();
+
+UPDATE quizzes_quiz SET search_vector = NULL;
+"""
+
+QUIZ_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS quizzes_question_insert_search_trigger ON quizzes_question;
+DROP TRIGGER IF EXISTS quizzes_question_update_search_trigger ON quizzes_question;
+DROP TRIGGER IF EXISTS quizzes_question_delete_search_trigger ON quizzes_question;
+DROP TRIGGER IF EXISTS quizzes_quiz_search_vector_trigger ON quizzes_quiz;
+DROP FUNCTION IF EXISTS quizzes_question_inserted_refresh_quiz();
+DROP FUNCTION IF EXISTS quizzes_question_updated_refresh_quiz();
+DROP FUNCTION IF EXISTS quizzes_question_deleted_refresh_quiz();
+DROP FUNCTION IF EXISTS quizzes_quiz_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0007_quiz_course_only'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='quiz_search_vector_idx'),
+        ),
+        migrations.RunSQL(QUIZ_TRIGGER_SQL, QUIZ_TRIGGER_REVERSE_SQL),
+    ]
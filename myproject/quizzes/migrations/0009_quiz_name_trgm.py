@@ -0,0 +1,22 @@
+# Generated manually for trigram autocomplete of quizzes
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0008_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['name'], name='quiz_name_trgm_idx', opclasses=['gin_trgm_ops']
+            ),
+        ),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 
 
 class Quiz(models.Model):
@@ -16,13 +19,22 @@ class Quiz(models.Model):
       verbose_name="Только для курса",
       help_text="Тест существует только внутри курса и не отображается в базе знаний"
   )
+  updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+  # Заполняется триггерами БД (миграция 0008_search_vector): название — вес A, тексты вопросов — вес B
+  search_vector = SearchVectorField(null=True, editable=False)
 
   class Meta:
     verbose_name = "Тест" # Как будет отображаться в админ панели
     verbose_name_plural = "Тесты" # Отображаться в множественном числе
     ordering = ['name']
 
-    indexes = [models.Index(fields=['name'], name='name_idx')]
+    indexes = [
+        models.Index(fields=['name'], name='name_idx'),
+        GinIndex(fields=['search_vector'], name='quiz_search_vector_idx'),
+        GinIndex(fields=['name'], name='quiz_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        # name__icontains компилируется в UPPER(name) LIKE UPPER(...) — нужен индекс по выражению
+        GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='quiz_name_upper_trgm_idx'),
+    ]
 
   def __str__(self):
     return f"{self.name}" # Так будет отображаться в админ панели
@@ -0,0 +1,10 @@
+from myapp import cache as cache_tools
+from myapp.learning_state import CONTENT_NAMESPACE
+from knowledge_base.cache import KB_TREE_NAMESPACE
+from .models import Quiz, Question, Answer
+
+
+# Реестр инвалидации кэша: тесты входят в содержимое курсов и дерево базы знаний
+cache_tools.invalidates(Quiz, CONTENT_NAMESPACE, KB_TREE_NAMESPACE)
+cache_tools.invalidates(Question, CONTENT_NAMESPACE)
+cache_tools.invalidates(Answer, CONTENT_NAMESPACE)
@@ -180,3 +180,13 @@ class ChangeUserPasswordForm(forms.Form):
         self._user.set_password(self.cleaned_data['password1'])
         self._user.save()
         return self._user
+
+
+
+class UserImportForm(forms.Form):
+    """Загрузка CSV для массового создания пользователей."""
+    file = forms.FileField(
+        label='CSV-файл',
+        help_text='Колонки: username, name, email, groups, password. Несколько групп — через «;».',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}),
+    )
@@ -0,0 +1,32 @@
+"""
+Хэширование паролей в пуле процессов для массового импорта.
+Модуль не импортирует модели: дочерний процесс загружает его до django.setup().
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _hash(password):
+    from django.contrib.auth.hashers import make_password
+    return make_password(password or None)
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Хэширует пароли параллельно (PBKDF2 нагружает CPU, потоки не помогают из-за GIL).
+    Пустой пароль превращается в «непригодный» — вход по нему невозможен.
+    """
+    passwords = list(passwords)
+    if not passwords:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) == 1:
+        return [_hash(password) for password in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(_hash, passwords, chunksize=chunksize))
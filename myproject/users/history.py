@@ -0,0 +1,63 @@
+"""
+История тестов с курсорной (keyset) пагинацией: страница выбирается по индексу
+(user, -completed_at, -id) без COUNT(*) и OFFSET, курсор стабилен при появлении
+новых результатов.
+"""
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db.models import Q
+
+from myapp.models import QuizResult
+
+
+QUIZ_HISTORY_PAGE_SIZE = 4
+
+
+@dataclass
+class HistoryPage:
+    results: list
+    cursor: str
+    next_cursor: str
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+
+def _encode_cursor(result):
+    raw = f'{result.completed_at.isoformat()}|{result.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """(completed_at, id) из курсора или None, если курсор пустой или испорчен"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        completed_at, pk = raw.split('|')
+        return datetime.fromisoformat(completed_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def quiz_history_page(user, cursor=None, size=QUIZ_HISTORY_PAGE_SIZE):
+    """
+    Страница результатов тестов пользователя, от новых к старым.
+    Следующая страница начинается строго после последней строки текущей.
+    """
+    results = QuizResult.objects.filter(user=user).order_by('-completed_at', '-id')
+    position = _decode_cursor(cursor)
+    if position:
+        completed_at, pk = position
+        results = results.filter(Q(completed_at__lt=completed_at) | Q(completed_at=completed_at, id__lt=pk))
+    else:
+        cursor = ''
+
+    rows = list(results[:size + 1])
+    page = rows[:size]
+    next_cursor = _encode_cursor(page[-1]) if len(rows) > size else ''
+    return HistoryPage(results=page, cursor=cursor, next_cursor=next_cursor)
@@ -0,0 +1,173 @@
+"""
+Массовый импорт пользователей из CSV: пароли хэшируются в пуле процессов,
+пользователи, профили и членства в группах вставляются через bulk_create,
+курсы групп назначаются одним проходом.
+"""
+import csv
+from dataclasses import dataclass, field
+
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from courses.services import assign_group_courses_to_users
+from .hashing import hash_passwords
+from .models import Profile
+
+
+CSV_COLUMNS = ('username', 'name', 'email', 'groups', 'password')
+
+# Разделитель нескольких групп внутри ячейки
+GROUPS_SEPARATOR = ';'
+
+IMPORT_BATCH_SIZE = 1000
+
+
+@dataclass
+class ImportRow:
+    line: int
+    username: str
+    first_name: str
+    last_name: str
+    email: str
+    group_names: list
+    password: str
+
+
+@dataclass
+class ImportResult:
+    rows: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    created: int = 0
+    memberships: int = 0
+    assignments: int = 0
+
+
+def parse_users_csv(stream):
+    """
+    Разбирает CSV с колонками username, name, email, groups, password
+    (первая строка — заголовок). Группы перечисляются через «;».
+    Строки с ошибками не импортируются и попадают в result.errors.
+    """
+    result = ImportResult()
+    reader = csv.DictReader(stream)
+    seen = set()
+    try:
+        if 'username' not in (reader.fieldnames or []):
+            result.errors.append(f'В заголовке CSV нет колонки username (ожидаются: {", ".join(CSV_COLUMNS)})')
+            return result
+        for line, record in enumerate(reader, start=2):
+            _parse_record(result, seen, line, record)
+    except csv.Error as e:
+        # Испорченный файл не импортируется даже частично
+        result.rows = []
+        result.errors.append(f'Строка {reader.line_num}: некорректный CSV ({e})')
+        return result
+
+    _check_against_database(result)
+    return result
+
+
+def _field_errors(field_name, value):
+    """Ошибки валидаторов поля User (формат, max_length) — те же, что в формах"""
+    try:
+        User._meta.get_field(field_name).run_validators(value)
+    except ValidationError as e:
+        return e.messages
+    return []
+
+
+def _parse_record(result, seen, line, record):
+    username = (record.get('username') or '').strip()
+    email = (record.get('email') or '').strip()
+    if not username:
+        result.errors.append(f'Строка {line}: не указан username')
+        return
+    if username.lower() in seen:
+        result.errors.append(f'Строка {line}: username «{username}» повторяется в файле')
+        return
+    errors = _field_errors('username', username)
+    if errors:
+        result.errors.append(f'Строка {line}: некорректный username «{username}»: {" ".join(errors)}')
+        return
+    if email and _field_errors('email', email):
+        result.errors.append(f'Строка {line}: некорректный email «{email}»')
+        return
+    seen.add(username.lower())
+    first_name, _, last_name = (record.get('name') or '').strip().partition(' ')
+    result.rows.append(ImportRow(
+        line=line,
+        username=username,
+        first_name=first_name[:150],
+        last_name=last_name.strip()[:150],
+        email=email,
+        group_names=[name.strip() for name in (record.get('groups') or '').split(GROUPS_SEPARATOR) if name.strip()],
+        password=record.get('password') or '',
+    ))
+
+
+def _check_against_database(result):
+    """
+    Отсеивает существующие логины и неизвестные группы двумя запросами.
+    Логины сравниваются без учёта регистра, как и дубли внутри файла.
+    """
+    existing = set(
+        User.objects.annotate(username_lower=Lower('username'))
+        .filter(username_lower__in={row.username.lower() for row in result.rows})
+        .values_list('username_lower', flat=True)
+    )
+    known_groups = set(Group.objects.filter(
+        name__in={name for row in result.rows for name in row.group_names}
+    ).values_list('name', flat=True))
+
+    valid = []
+    for row in result.rows:
+        unknown = [name for name in row.group_names if name not in known_groups]
+        if row.username.lower() in existing:
+            result.errors.append(f'Строка {row.line}: пользователь «{row.username}» уже существует')
+        elif unknown:
+            result.errors.append(f'Строка {row.line}: неизвестные группы: {", ".join(unknown)}')
+        else:
+            valid.append(row)
+    result.rows = valid
+
+
+def import_users(result, workers=None):
+    """
+    Создаёт пользователей из разобранных строк. Сигналы post_save и m2m_changed
+    при bulk_create не отправляются, поэтому профили и назначения курсов
+    групп создаются здесь явно.
+    """
+    rows = result.rows
+    if not rows:
+        return result
+
+    # Хэширование — самая дорогая часть, выполняется до транзакции
+    passwords = hash_passwords([row.password for row in rows], workers=workers)
+    group_ids = dict(Group.objects.filter(
+        name__in={name for row in rows for name in row.group_names}
+    ).values_list('name', 'id'))
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(
+                username=row.username,
+                first_name=row.first_name,
+                last_name=row.last_name,
+                email=row.email,
+                password=password,
+            )
+            for row, password in zip(rows, passwords)
+        ], batch_size=IMPORT_BATCH_SIZE)
+        Profile.objects.bulk_create([Profile(user=user) for user in users], batch_size=IMPORT_BATCH_SIZE)
+        memberships = User.groups.through.objects.bulk_create([
+            User.groups.through(user_id=user.pk, group_id=group_ids[name])
+            for user, row in zip(users, rows)
+            for name in set(row.group_names)
+        ], batch_size=IMPORT_BATCH_SIZE)
+        result.assignments = assign_group_courses_to_users([user.pk for user in users])
+
+    result.created = len(users)
+    result.memberships = len(memberships)
+    return result
@@ -0,0 +1,18 @@
+from jobs.registry import job_handler
+
+from .models import Profile
+from .stats import REFRESH_JOB_NAME, STATS_BATCH_SIZE, refresh_learning_stats
+
+
+@job_handler(REFRESH_JOB_NAME)
+def refresh_stats_job(job):
+    """Пересчитывает статистику всех профилей, помеченных устаревшими, пачками"""
+    stale = Profile.objects.filter(stats_dirty=True)
+    job.set_progress(0, stale.count())
+    done = 0
+    while True:
+        batch = list(stale.select_related('user').order_by('id')[:STATS_BATCH_SIZE])
+        if not batch:
+            return {'refreshed': done}
+        done += refresh_learning_stats(batch)
+        job.set_progress(done)
@@ -0,0 +1,93 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User, update_last_login
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+
+from users.models import Profile
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _legacy_create_profile(sender, instance, created, **kwargs):
+    if created:
+        Profile.objects.create(user=instance)
+
+
+def _legacy_save_profile(sender, instance, **kwargs):
+    instance.profile.save()
+
+
+class Command(BaseCommand):
+    """
+    Сравнение затрат на профиль пользователя: прежние сигналы post_save
+    (создание профиля и его пересохранение на каждое сохранение User)
+    против ленивого создания. Все изменения откатываются.
+    """
+    help = 'Замеряет обновление last_login при входе и создание пользователей с сигналами профиля и без них'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Сколько пользователей создавать')
+        parser.add_argument('--logins', type=int, default=1000, help='Сколько входов имитировать')
+
+    def handle(self, *args, **options):
+        # Хэш один на всех: замеряются записи в БД, а не PBKDF2
+        password = make_password('benchmark')
+        for label, legacy in (('до (сигналы post_save)', True), ('после (ленивый профиль)', False)):
+            if legacy:
+                post_save.connect(_legacy_create_profile, sender=User, dispatch_uid='bench_create_profile')
+                post_save.connect(_legacy_save_profile, sender=User, dispatch_uid='bench_save_profile')
+            try:
+                results = self._run(options['users'], options['logins'], password)
+            finally:
+                post_save.disconnect(sender=User, dispatch_uid='bench_create_profile')
+                post_save.disconnect(sender=User, dispatch_uid='bench_save_profile')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for name, (count, seconds, queries) in results.items():
+                self.stdout.write(
+                    f'  {name}: {count} за {seconds:.3f} с '
+                    f'({count / seconds:.0f}/с), запросов: {queries} ({queries / count:.1f} на операцию)'
+                )
+
+    def _measure(self, count, func):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            func()
+            seconds = time.perf_counter() - started
+        return count, max(seconds, 1e-9), len(context.captured_queries)
+
+    def _run(self, users_count, logins_count, password):
+        results = {}
+        try:
+            with transaction.atomic():
+                def create_users():
+                    for index in range(users_count):
+                        User.objects.create(username=f'bench_user_{index}', password=password)
+
+                results['создание по одному'] = self._measure(users_count, create_users)
+
+                users = list(User.objects.filter(username__startswith='bench_user_'))
+
+                def logins():
+                    for index in range(logins_count):
+                        update_last_login(None, users[index % len(users)])
+
+                results['входы (last_login)'] = self._measure(logins_count, logins)
+
+                def bulk_create():
+                    created = User.objects.bulk_create([
+                        User(username=f'bench_bulk_{index}', password=password) for index in range(users_count)
+                    ])
+                    Profile.objects.bulk_create([Profile(user=user) for user in created])
+
+                results['bulk_create с профилями'] = self._measure(users_count, bulk_create)
+                raise _Rollback
+        except _Rollback:
+            pass
+        return results
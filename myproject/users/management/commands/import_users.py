@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.importing import import_users, parse_users_csv
+
+
+class Command(BaseCommand):
+    help = 'Импортирует пользователей из CSV (username, name, email, groups, password)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к CSV-файлу в UTF-8, первая строка — заголовок')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Число процессов для хэширования паролей (по умолчанию — число ядер)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только проверить файл и показать ошибки',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                result = parse_users_csv(stream)
+        except OSError as e:
+            raise CommandError(f'Не удалось прочитать файл: {e}')
+
+        for error in result.errors:
+            self.stderr.write(error)
+
+        if options['dry_run']:
+            self.stdout.write(f'К импорту: {len(result.rows)}, с ошибками: {len(result.errors)}')
+            return
+
+        import_users(result, workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {result.created}, членств в группах: {result.memberships}, '
+            f'назначений курсов: {result.assignments}, пропущено строк: {len(result.errors)}'
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from users.models import Profile
+from users.stats import STATS_BATCH_SIZE, refresh_learning_stats
+
+
+class Command(BaseCommand):
+    """
+    Пересчёт предрасчитанной статистики обучения. Изменения содержимого курсов
+    (новые уроки, тесты) не помечают профили устаревшими — для них команду
+    с --all удобно запускать по расписанию.
+    """
+    help = 'Пересчитывает опыт и уровень пользователей в профилях'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересчитать все профили, а не только помеченные устаревшими',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            Profile.objects.update(stats_dirty=True)
+
+        stale = Profile.objects.filter(stats_dirty=True).select_related('user').order_by('id')
+        refreshed = 0
+        while True:
+            batch = list(stale[:STATS_BATCH_SIZE])
+            if not batch:
+                break
+            refreshed += refresh_learning_stats(batch)
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано профилей: {refreshed}'))
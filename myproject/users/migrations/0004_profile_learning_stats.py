@@ -0,0 +1,73 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:00
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Greatest
+
+
+def fill_last_activity(apps, schema_editor):
+    """Последняя активность существующих пользователей — по прогрессу и результатам тестов"""
+    Profile = apps.get_model('users', 'Profile')
+    UserProgress = apps.get_model('myapp', 'UserProgress')
+    QuizResult = apps.get_model('myapp', 'QuizResult')
+
+    def latest(model, field):
+        return Subquery(
+            model.objects.filter(user_id=OuterRef('user_id')).order_by()
+            .values('user_id').annotate(latest=Max(field)).values('latest')
+        )
+
+    # GREATEST в PostgreSQL пропускает NULL: достаточно одного из источников
+    Profile.objects.update(last_activity=Greatest(
+        latest(UserProgress, 'completed_at'),
+        latest(QuizResult, 'completed_at'),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_profile_image'),
+        ('myapp', '0009_remove_useranswer_answer_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='exp',
+            field=models.PositiveIntegerField(default=0, verbose_name='Опыт'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='level',
+            field=models.PositiveIntegerField(default=1, verbose_name='Уровень'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='exp_progress',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Прогресс уровня, %'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последняя активность'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='stats_dirty',
+            field=models.BooleanField(default=True, verbose_name='Статистика устарела'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-exp'], name='profile_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-last_activity'], name='profile_last_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(condition=models.Q(('stats_dirty', True)), fields=['id'], name='profile_stats_dirty_idx'),
+        ),
+        migrations.RunPython(fill_last_activity, migrations.RunPython.noop),
+    ]
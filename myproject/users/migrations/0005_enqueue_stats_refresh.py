@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 18:00
+
+from django.db import migrations
+
+
+def enqueue_refresh(apps, schema_editor):
+    """
+    После 0004 все профили помечены устаревшими, но опыт и уровень равны нулю —
+    ставим пересчёт, чтобы сортировка списка пользователей стала верной.
+    """
+    Profile = apps.get_model('users', 'Profile')
+    Job = apps.get_model('jobs', 'Job')
+    if not Profile.objects.filter(stats_dirty=True).exists():
+        return
+    if Job.objects.filter(name='users.refresh_stats', status='queued').exists():
+        return
+    Job.objects.create(
+        name='users.refresh_stats',
+        description='Пересчёт статистики обучения пользователей',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_profile_learning_stats'),
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(enqueue_refresh, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,5 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from typing import Any
 
 from .utils import get_profile_image_path
 
@@ -14,17 +11,33 @@ class Profile(models.Model):
         user (User): Связь один-к-одному с моделью User.
         image (ImageField): Изображение профиля. По умолчанию используется 'profile_pics/default.jpg'.
         bio (TextField): Текстовое поле с информацией о пользователе.
+        exp, level, exp_progress: предрасчитанная статистика обучения для списка
+            пользователей (пересчитывается фоновой задачей, см. users/stats.py).
+        last_activity (DateTimeField): время последнего действия в обучении.
+        stats_dirty (BooleanField): статистика устарела и ждёт пересчёта.
 
     """
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     image = models.ImageField(default='profile_pics/default.jpg', upload_to=get_profile_image_path)
     bio = models.TextField(max_length=500, blank=True, null=True, verbose_name="О себе")
+    exp = models.PositiveIntegerField(default=0, verbose_name="Опыт")
+    level = models.PositiveIntegerField(default=1, verbose_name="Уровень")
+    exp_progress = models.PositiveSmallIntegerField(default=0, verbose_name="Прогресс уровня, %")
+    last_activity = models.DateTimeField(null=True, blank=True, verbose_name="Последняя активность")
+    stats_dirty = models.BooleanField(default=True, verbose_name="Статистика устарела")
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ['user']
+        indexes = [
+            # Сортировки списка пользователей
+            models.Index(fields=['-exp'], name='profile_exp_idx'),
+            models.Index(fields=['-last_activity'], name='profile_last_activity_idx'),
+            # Выборка профилей для фонового пересчёта
+            models.Index(fields=['id'], condition=models.Q(stats_dirty=True), name='profile_stats_dirty_idx'),
+        ]
 
     def __str__(self) -> str:
         """
@@ -35,39 +48,25 @@ class Profile(models.Model):
         """
                 
         return f'Учётная запись {self.user.username}'
-    
 
 
 
-@receiver(post_save, sender=User)
-def create_profile(sender: Any, instance: User, created: bool, **kwargs: Any) -> None:
+def get_profile(user: User) -> Profile:
     """
-    Сигнал для автоматического создания профиля при создании пользователя.
+    Профиль пользователя с созданием при первом обращении. Профиль больше
+    не создаётся и не пересохраняется сигналами post_save на каждое сохранение
+    User (вход, правка в админке); массовый импорт создаёт профили bulk_create.
 
     Args:
-        sender (Any): Модель, отправившая сигнал.
-        instance (User): Экземпляр модели User.
-        created (bool): Флаг, указывающий, был ли объект создан.
-        **kwargs (Any): Дополнительные аргументы.
-    """
-        
-    if created:
-        Profile.objects.create(user=instance)
-
-
-
+        user (User): Пользователь.
 
-@receiver(post_save, sender=User)
-def save_profile(sender: Any, instance: User, **kwargs: Any) -> None:
-    """
-    Сигнал для автоматического сохранения профиля при сохранении пользователя.
-    
-
-    Args:
-        sender (Any): Модель, отправившая сигнал.
-        instance (User): Экземпляр модели User.
-        **kwargs (Any): Дополнительные аргументы.
+    Returns:
+        Profile: Существующий или только что созданный профиль.
     """
 
-    profile = instance.profile
-    profile.save()
\ No newline at end of file
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        profile, _ = Profile.objects.get_or_create(user=user)
+        user.profile = profile
+        return profile
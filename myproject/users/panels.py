@@ -0,0 +1,62 @@
+"""
+Панели страниц профиля и пользователя: оболочка страницы отдаётся сразу,
+а курсы, опыт и история тестов загружаются отдельными параллельными запросами.
+Данные панелей кэшируются по версиям состояния обучения пользователя
+и содержимого курсов, по тем же версиям строится ETag ответа.
+"""
+import hashlib
+
+from myapp import cache as cache_tools
+from myapp.learning_state import CONTENT_NAMESPACE, get_learning_state_cached, user_namespace
+from .history import quiz_history_page
+from .stats import get_user_learning_stats, store_learning_stats
+
+
+IN_PROGRESS_PANEL = 'in_progress'
+FINISHED_PANEL = 'finished'
+QUIZ_HISTORY_PANEL = 'quiz_history'
+EXP_PANEL = 'exp'
+
+PANELS = (IN_PROGRESS_PANEL, FINISHED_PANEL, QUIZ_HISTORY_PANEL, EXP_PANEL)
+
+
+def get_cached_learning_stats(user):
+    """
+    Статистика обучения из кэша. При пересчёте она заодно сохраняется
+    в Profile — список пользователей показывает те же значения.
+    Изменения траекторий (личных, групповых, состава групп) сбрасывают
+    версию состояния обучения пользователя — см. courses.trajectories.
+    """
+    def build():
+        stats = get_user_learning_stats(user)
+        store_learning_stats(user, stats)
+        return stats
+
+    return get_learning_state_cached(user, 'learning_stats', build)
+
+
+def get_cached_quiz_history(user, cursor, size):
+    """Первая страница истории тестов из кэша; следующие страницы выбираются по индексу"""
+    if cursor:
+        return quiz_history_page(user, cursor, size)
+    return get_learning_state_cached(user, f'quiz_history:{size}', lambda: quiz_history_page(user, size=size))
+
+
+def panel_etag(request, panel, pk=None):
+    """
+    ETag панели: зритель, владелец данных, курсор и версии состояния обучения.
+    Одно обращение к кэшу, без запросов к БД.
+    """
+    if request.method not in ('GET', 'HEAD') or panel not in PANELS:
+        return None
+    user_id = pk or request.user.pk
+    versions = cache_tools.namespace_versions(
+        user_namespace(user_id), CONTENT_NAMESPACE, f'trajectory:user:{user_id}'
+    )
+    # Кэш недоступен — версии неизвестны, и ETag не отличил бы старые данные от новых
+    if None in versions.values():
+        return None
+    raw = '|'.join(map(str, (
+        request.user.pk, user_id, panel, request.GET.get('cursor', ''), *versions.values()
+    )))
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
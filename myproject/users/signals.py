@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+
+from myapp.models import QuizResult, UserCourse, UserProgress
+from .stats import mark_stats_stale
+
+
+def _mark_user_stats_stale(sender, instance, **kwargs):
+    """Прогресс, результаты тестов и назначения меняют опыт и уровень пользователя"""
+    mark_stats_stale(instance.user_id)
+
+
+for model in (UserProgress, UserCourse, QuizResult):
+    post_save.connect(_mark_user_stats_stale, sender=model, dispatch_uid=f'user_stats_{model.__name__}_save')
+    post_delete.connect(_mark_user_stats_stale, sender=model, dispatch_uid=f'user_stats_{model.__name__}_delete')
@@ -0,0 +1,67 @@
+// --- Ленивые панели страниц профиля ---
+// Оболочка страницы приходит сразу, каждая панель [data-panel-url] загружается
+// отдельным запросом, все запросы уходят параллельно.
+// data-panel-format="json" — панель обновляет значения [data-stat] оболочки,
+// data-panel-query — панель с пагинацией, курсор хранится в адресе страницы.
+(() => {
+    function applyStats(data) {
+        Object.entries(data).forEach(([name, value]) => {
+            document.querySelectorAll(`[data-stat="${name}"]`).forEach((el) => {
+                el.textContent = value;
+            });
+            document.querySelectorAll(`[data-stat-width="${name}"]`).forEach((el) => {
+                el.style.width = `${value}%`;
+            });
+        });
+    }
+
+    async function loadPanel(panel, query = '') {
+        try {
+            const response = await fetch(panel.dataset.panelUrl + query, {
+                headers: {'X-Requested-With': 'XMLHttpRequest'},
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            if (panel.dataset.panelFormat === 'json') {
+                applyStats(await response.json());
+            } else {
+                panel.innerHTML = await response.text();
+            }
+        } catch (error) {
+            console.error('Ошибка загрузки панели:', error);
+            if (panel.dataset.panelFormat !== 'json') {
+                panel.innerHTML = `
+                    <div class="alert alert-danger mt-3">
+                        Ошибка загрузки данных. Попробуйте обновить страницу.
+                    </div>
+                `;
+            }
+        }
+    }
+
+    function loadPanels(selector, query) {
+        document.querySelectorAll(selector).forEach((panel) => loadPanel(panel, query));
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('[data-panel-url]').forEach((panel) => {
+            loadPanel(panel, 'panelQuery' in panel.dataset ? window.location.search : '');
+        });
+
+        // Пагинация внутри панели: курсор непрозрачен, строка запроса ссылки передаётся как есть
+        document.addEventListener('click', (e) => {
+            const link = e.target.closest('[data-panel-query] .page-link');
+            if (!link) return;
+
+            e.preventDefault();
+            const query = new URL(link.href).search;
+            loadPanel(link.closest('[data-panel-query]'), query);
+            history.pushState(null, null, query || window.location.pathname);
+        });
+
+        window.addEventListener('popstate', () => {
+            loadPanels('[data-panel-query]', window.location.search);
+        });
+    });
+})();
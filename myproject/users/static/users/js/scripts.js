@@ -38,70 +38,7 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // --- Пагинация с AJAX ---
-    if (quizzesSection) {
-        quizzesSection.addEventListener('click', async (e) => {
-            const target = e.target.closest('.page-link');
-            if (!target) return;
-            
-            e.preventDefault();
-            
-            // Активируем блок если скрыт
-            if (!isQuizzesVisible) {
-                isQuizzesVisible = true;
-                quizzesSection.style.display = 'block';
-                if (toggleQuizzesBtn) {
-                    toggleQuizzesBtn.textContent = 'Скрыть тесты';
-                    localStorage.setItem('quizzesVisible', true);
-                }
-            }
-
-            const url = new URL(target.href);
-            const page = url.searchParams.get('page');
-            
-            try {
-                const response = await fetch(`?page=${page}`, {
-                    headers: {'X-Requested-With': 'XMLHttpRequest'}
-                });
-                const html = await response.text();
-                
-                document.getElementById('quiz-history-content').innerHTML = html;
-                history.pushState(null, null, `?page=${page}`);
-            } catch (error) {
-                console.error('Ошибка загрузки:', error);
-                document.getElementById('quiz-history-content').innerHTML = `
-                    <div class="alert alert-danger mt-3">
-                        Ошибка загрузки данных. Попробуйте обновить страницу.
-                    </div>
-                `;
-            }
-        });
-    }
-
-    // --- Обработка истории браузера ---
-    window.addEventListener('popstate', async () => {
-        const urlParams = new URLSearchParams(window.location.search);
-        const page = urlParams.get('page') || 1;
-        
-        try {
-            const response = await fetch(`?page=${page}`, {
-                headers: {'X-Requested-With': 'XMLHttpRequest'}
-            });
-            const html = await response.text();
-            
-            if (quizzesSection) {
-                document.getElementById('quiz-history-content').innerHTML = html;
-                quizzesSection.style.display = 'block';
-                isQuizzesVisible = true;
-                if (toggleQuizzesBtn) {
-                    toggleQuizzesBtn.textContent = 'Скрыть тесты';
-                    localStorage.setItem('quizzesVisible', true);
-                }
-            }
-        } catch (error) {
-            console.error('Ошибка загрузки:', error);
-        }
-    });
+    // Загрузка и пагинация истории тестов — в panels.js
 
     // --- Переключение режимов редактирования профиля ---
     const editProfileBtn = document.getElementById('edit-profile-btn');
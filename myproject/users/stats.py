@@ -0,0 +1,147 @@
+"""
+Статистика обучения пользователей: расчёт «на лету» для страниц профиля
+и предрасчитанные значения в Profile для списка пользователей.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from courses.trajectories import get_trajectory_lessons
+from jobs.models import Job
+from myapp.models import UserCourse, UserProgress, QuizResult
+from .models import Profile
+
+
+# Сколько профилей пересчитывается за один проход фоновой задачи
+STATS_BATCH_SIZE = 200
+
+REFRESH_JOB_NAME = 'users.refresh_stats'
+
+
+def get_user_learning_stats(target_user):
+    """Собирает статистику обучения пользователя: курсы, опыт и уровень."""
+    started_courses = UserCourse.objects.filter(user=target_user).select_related('course')
+    unfinished_courses = []
+    finished_courses = []
+    exp = 0
+    level = 1
+
+    for user_course in started_courses:
+        course = user_course.course
+        lesson_ids = get_trajectory_lessons(target_user, course).values_list('id', flat=True)
+        completed_lessons = UserProgress.objects.filter(
+            user=target_user,
+            course=course,
+            completed=True,
+            lesson_id__in=lesson_ids
+        ).count()
+        total_lessons = lesson_ids.count()
+
+        course_quizzes = course.quizzes.all()
+        total_quizzes = course_quizzes.count()
+        completed_quizzes = sum(
+            1 for q in course_quizzes
+            if QuizResult.objects.filter(user=target_user, quiz_title=q.name, passed=True).exists()
+        )
+        total_items = total_lessons + total_quizzes
+        completed_items = completed_lessons + completed_quizzes
+        percent = int((completed_items / total_items) * 100) if total_items > 0 else 0
+
+        course_data = {
+            'course': course,
+            'completed': completed_lessons,
+            'total': total_lessons,
+            'completed_quizzes': completed_quizzes,
+            'total_quizzes': total_quizzes,
+            'percent': percent,
+        }
+        if course.final_quiz:
+            course_data['quiz_passed'] = QuizResult.objects.filter(
+                user=target_user,
+                quiz_title=course.final_quiz.name,
+                passed=True
+            ).exists()
+        else:
+            course_data['quiz_passed'] = True
+
+        all_done = completed_lessons >= total_lessons and completed_quizzes >= total_quizzes
+        is_course_completed = all_done and course_data.get('quiz_passed', True)
+
+        if is_course_completed:
+            if user_course.can_receive_exp():
+                finished_courses.append(course_data)
+                exp += user_course.exp_reward()
+            else:
+                unfinished_courses.append(course_data)
+                exp += 15
+        else:
+            unfinished_courses.append(course_data)
+            exp += 15
+
+    while exp >= level * 100:
+        level += 1
+    progress = ((exp - ((level - 1) * 100)) / 100) * 100
+    progress = min(progress, 100)
+
+    return {
+        'unfinished_courses': unfinished_courses,
+        'finished_courses': finished_courses,
+        'exp': exp,
+        'level': level,
+        'progress': int(progress),
+    }
+
+
+def refresh_learning_stats(profiles):
+    """
+    Пересчитывает и сохраняет опыт, уровень и прогресс для набора профилей
+    одним bulk_update. Возвращает количество обновлённых профилей.
+
+    Пометка stats_dirty снимается до расчёта: mark_stats_stale, пришедший
+    во время расчёта, снова поднимет её, и изменение не потеряется.
+    """
+    profiles = list(profiles)
+    Profile.objects.filter(pk__in=[profile.pk for profile in profiles]).update(stats_dirty=False)
+    for profile in profiles:
+        stats = get_user_learning_stats(profile.user)
+        profile.exp = stats['exp']
+        profile.level = stats['level']
+        profile.exp_progress = stats['progress']
+    Profile.objects.bulk_update(profiles, ['exp', 'level', 'exp_progress'])
+    return len(profiles)
+
+
+def store_learning_stats(user, stats):
+    """
+    Сохраняет уже посчитанную статистику (например, на странице пользователя).
+    Пометку stats_dirty не снимает: статистика могла устареть, пока считалась.
+    """
+    Profile.objects.filter(user=user).update(
+        exp=stats['exp'], level=stats['level'], exp_progress=stats['progress']
+    )
+
+
+def _schedule_refresh():
+    # Одна задача в очереди обслуживает все помеченные профили
+    if not Job.objects.filter(name=REFRESH_JOB_NAME, status=Job.Status.QUEUED).exists():
+        from jobs.registry import enqueue
+        enqueue(REFRESH_JOB_NAME, description='Пересчёт статистики обучения пользователей')
+
+
+def mark_stats_stale(*user_ids, activity=True):
+    """
+    Помечает статистику пользователей устаревшей одним UPDATE и ставит
+    фоновый пересчёт. activity=True также обновляет время последней активности.
+    """
+    if not user_ids:
+        return
+    fields = {'stats_dirty': True}
+    if activity:
+        fields['last_activity'] = timezone.now()
+    updated = Profile.objects.filter(user_id__in=user_ids).update(**fields)
+    if updated < len(set(user_ids)):
+        # Профили создаются лениво — у части пользователей их ещё нет
+        Profile.objects.bulk_create(
+            [Profile(user_id=user_id, **fields) for user_id in set(user_ids)],
+            ignore_conflicts=True,
+        )
+    transaction.on_commit(_schedule_refresh)
@@ -1,3 +1,62 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+
+from myapp.models import QuizResult
+from .history import quiz_history_page
+
+
+class QuizHistoryPageTest(TestCase):
+    """Курсорная пагинация истории тестов: без пропусков и повторов на границах страниц"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('learner', password='password')
+        cls.other = User.objects.create_user('other', password='password')
+
+    def _result(self, completed_at, user=None):
+        result = QuizResult.objects.create(
+            user=user or self.user, quiz_title='Тест', score=1, total_questions=1, percent=100.0
+        )
+        # completed_at заполняется auto_now_add — задаём время отдельным UPDATE
+        QuizResult.objects.filter(pk=result.pk).update(completed_at=completed_at)
+        return result.pk
+
+    def _all_pages(self, size):
+        pages, cursor = [], None
+        while True:
+            page = quiz_history_page(self.user, cursor, size=size)
+            pages.append([result.pk for result in page.results])
+            if not page.next_cursor:
+                return pages
+            cursor = page.next_cursor
+
+    def test_rows_with_same_completed_at_on_page_boundary(self):
+        now = timezone.now()
+        newest = self._result(now)
+        # Две строки с одинаковым временем: первая страница заканчивается между ними
+        tied = sorted([self._result(now - timedelta(minutes=1)) for _ in range(2)], reverse=True)
+        oldest = self._result(now - timedelta(minutes=2))
+        self._result(now, user=self.other)
+
+        pages = self._all_pages(size=2)
+
+        self.assertEqual(pages, [[newest, tied[0]], [tied[1], oldest]])
+
+    def test_all_rows_share_completed_at(self):
+        now = timezone.now()
+        ids = sorted([self._result(now) for _ in range(5)], reverse=True)
+
+        pages = self._all_pages(size=2)
+
+        self.assertEqual(pages, [ids[0:2], ids[2:4], ids[4:]])
+
+    def test_first_page_and_invalid_cursor(self):
+        self._result(timezone.now())
 
-# Create your tests here.
+        first = quiz_history_page(self.user, size=2)
+        self.assertTrue(first.is_first)
+        self.assertEqual(first.next_cursor, '')
+        self.assertEqual(quiz_history_page(self.user, 'испорчен', size=2).results, first.results)
@@ -7,12 +7,15 @@ app_name = 'users'
 
 urlpatterns = [
     path('profile/', user_views.profile, name='profile'),
+    path('profile/panels/<str:panel>/', user_views.profile_panel, name='profile_panel'),
     path('login/', user_views.CustomLoginView.as_view(), name='login'),
     path('logout/', auth_views.LogoutView.as_view(template_name='users/logout.html'), name='logout'),
     path('user_management/', user_views.UserManagementView.as_view(), name='user_management'),
     path('user_management/register/', user_views.RegisterUserView.as_view(), name='register'),
+    path('user_management/import/', user_views.ImportUsersView.as_view(), name='import_users'),
     path('user_management/create_group/', user_views.CreateGroupView.as_view(), name='create_group'),
     path('user_management/<int:pk>/', user_views.user_detail, name='user_detail'),
+    path('user_management/<int:pk>/panels/<str:panel>/', user_views.user_panel, name='user_panel'),
     path('user_management/<int:pk>/edit/', user_views.user_edit, name='user_edit'),
     path('user_management/<int:pk>/change_password/', user_views.user_change_password, name='user_change_password'),
     path('user_management/<int:pk>/delete/', user_views.user_delete, name='user_delete'),
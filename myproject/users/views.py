@@ -1,26 +1,75 @@
+import io
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponse
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
 from django.contrib.auth import login as auth_login
 from django.contrib.auth.models import User
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
-from django.views.generic import FormView, TemplateView, CreateView
+from django.views.generic import FormView, ListView, CreateView
+from django.db.models import Exists, F, OuterRef, Q
 from django.urls import reverse_lazy
-from django.views.decorators.http import require_POST
-
-from myapp.models import UserCourse, UserProgress, QuizResult
-from courses.models import UserLessonTrajectory
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+
+from myapp.models import QuizResult
+from .history import QUIZ_HISTORY_PAGE_SIZE
+from .importing import import_users, parse_users_csv
+from .models import get_profile
+from .panels import (
+    EXP_PANEL,
+    FINISHED_PANEL,
+    IN_PROGRESS_PANEL,
+    QUIZ_HISTORY_PANEL,
+    get_cached_learning_stats,
+    get_cached_quiz_history,
+    panel_etag,
+)
 from .forms import (
     ChangeUserPasswordForm, 
     UserUpdateForm, 
     ProfileUpdateForm, 
     UserRegistrationForm, 
     AdminUserEditForm, 
-    GroupCreationForm
+    GroupCreationForm,
+    UserImportForm,
 )
+
+
+USERS_PAGE_SIZE = 50
+
+# Результатов тестов на странице пользователя в управлении пользователями
+USER_HISTORY_PAGE_SIZE = 10
+
+# Импорт из CSV через браузер: пароли хэшируются внутри запроса,
+# поэтому число строк и процессов ограничено (без ограничений — import_users)
+WEB_IMPORT_MAX_ROWS = 50
+WEB_IMPORT_WORKERS = 2
+
+# Шаблоны HTML-панелей страниц (панель опыта отдаётся в JSON)
+PROFILE_PANEL_TEMPLATES = {
+    IN_PROGRESS_PANEL: 'users/includes/_profile_in_progress.html',
+    FINISHED_PANEL: 'users/includes/_profile_finished.html',
+    QUIZ_HISTORY_PANEL: 'users/includes/_quiz_history.html',
+}
+USER_PANEL_TEMPLATES = {
+    IN_PROGRESS_PANEL: 'users/includes/_user_in_progress.html',
+    FINISHED_PANEL: 'users/includes/_user_finished.html',
+    QUIZ_HISTORY_PANEL: 'users/includes/_user_quiz_history.html',
+}
+
+# Допустимые сортировки списка пользователей: параметр ?sort= → поля order_by
+USER_SORTS = {
+    'username': ['username'],
+    '-exp': [F('profile__exp').desc(nulls_last=True), 'username'],
+    'exp': [F('profile__exp').asc(nulls_first=True), 'username'],
+    '-level': [F('profile__level').desc(nulls_last=True), F('profile__exp').desc(nulls_last=True), 'username'],
+    'level': [F('profile__level').asc(nulls_first=True), F('profile__exp').asc(nulls_first=True), 'username'],
+    '-last_activity': [F('profile__last_activity').desc(nulls_last=True), 'username'],
+    'last_activity': [F('profile__last_activity').asc(nulls_first=True), 'username'],
+}
  
 
 
@@ -28,134 +77,17 @@ from .forms import (
 @login_required
 def profile(request: HttpRequest) -> HttpResponse:
     """
-    Отображает страницу профиля пользователя, а также его прогресс
-    по начатым курсам.
+    Отображает страницу профиля пользователя: оболочку с формами
+    редактирования. Прогресс по курсам, опыт и история тестов
+    загружаются отдельными панелями (см. profile_panel).
 
     Args:
         request (HttpRequest): Объект запроса.
 
     Returns:
         HttpResponse: Ответ с отрендеренным шаблоном профиля.
-        Шаблон включает формы для редактирования профиля и список курсов с прогрессом.
     """
-    user = request.user
-    started_courses = UserCourse.objects.filter(user=user).select_related('course')
-    unfinished_courses = []
-    finished_courses = []
-    exp = 0
-    level = 1
-    quiz_results = QuizResult.objects.filter(user=request.user).order_by('-completed_at')
-    # Пагинация для истории тестов
-    paginator = Paginator(quiz_results, 4)  # 4 элементов на странице
-    page_number = request.GET.get('page', 1)
-
-    try:
-        page_obj = paginator.page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
-
-        # Проверка на AJAX-запрос
-    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        return render(request, 'users/includes/_quiz_history.html', {'page_obj': page_obj})
-
-    all_lessons_completed = False
-    percent = 0 
-
-    for user_course in started_courses:
-        course = user_course.course
-        
-        # Получаем траекторию для подсчета уроков
-        trajectory = UserLessonTrajectory.objects.filter(user=request.user, course=course).first()
-        
-        # Подсчет завершенных уроков
-        if trajectory:
-            lesson_ids = trajectory.lessons.values_list('id', flat=True)
-            completed_lessons = UserProgress.objects.filter(
-                user=user,
-                course=course,
-                completed=True,
-                lesson_id__in=lesson_ids
-            ).count()
-            total_lessons = trajectory.lessons.count()
-        else:
-            lesson_ids = course.lessons.values_list('id', flat=True)
-            completed_lessons = UserProgress.objects.filter(
-                user=user,
-                course=course,
-                completed=True,
-                lesson_id__in=lesson_ids
-            ).count()
-            total_lessons = course.lessons.count()
-
-        # Подсчет пройденных тестов курса
-        course_quizzes = course.quizzes.all()
-        total_quizzes = course_quizzes.count()
-        completed_quizzes = 0
-        
-        for quiz in course_quizzes:
-            quiz_passed = QuizResult.objects.filter(
-                user=request.user,
-                quiz_title=quiz.name,
-                passed=True
-            ).exists()
-            if quiz_passed:
-                completed_quizzes += 1
-
-        # Расчет прогресса с учетом уроков и тестов
-        total_items = total_lessons + total_quizzes
-        completed_items = completed_lessons + completed_quizzes
-        percent = int((completed_items / total_items) * 100) if total_items > 0 else 0
-
-        course_data = {
-            'course': course,
-            'completed': completed_lessons,
-            'total': total_lessons,
-            'completed_quizzes': completed_quizzes,
-            'total_quizzes': total_quizzes,
-            'percent': percent
-        }
-
-        # Проверка финального теста
-        if course.final_quiz:
-            quiz_passed = QuizResult.objects.filter(
-                user=request.user,
-                quiz_title=course.final_quiz.name,
-                passed=True
-            ).exists()
-            course_data['quiz_passed'] = quiz_passed
-
-        # Курс считается завершенным только если все уроки, все тесты и финальный тест (если есть) пройдены
-        all_items_completed = (completed_lessons >= total_lessons and 
-                              completed_quizzes >= total_quizzes)
-        final_quiz_passed = course_data.get('quiz_passed', True) if course.final_quiz else True
-        is_course_completed = all_items_completed and final_quiz_passed
-
-        if is_course_completed:
-            user_course_obj = UserCourse.objects.get(user=user, course=course)
-            if user_course_obj.can_receive_exp():
-                finished_courses.append(course_data)
-                exp += user_course_obj.exp_reward()
-            else:
-                unfinished_courses.append(course_data)
-                exp += 15
-        else:
-            unfinished_courses.append(course_data)
-            exp += 15
-
-        # Обновляем флаг завершения всех уроков
-        all_lessons_completed = (percent == 100) or all_lessons_completed
-
-    # Функция для расчета уровня и прогресса
-    def count_exp(exp, level):
-        while exp >= level * 100:
-            level += 1
-        progress = ((exp - ((level - 1) * 100)) / 100) * 100
-        return level, min(progress, 100)
-
-    level, progress = count_exp(exp, level)
-
+    user_profile = get_profile(request.user)
     if request.method == 'POST':
         # Создаем копию POST данных и гарантируем, что username всегда установлен
         post_data = request.POST.copy()
@@ -163,7 +95,7 @@ def profile(request: HttpRequest) -> HttpResponse:
             post_data['username'] = request.user.username
         
         user_form = UserUpdateForm(post_data, instance=request.user)
-        profile_form = ProfileUpdateForm(request.POST, request.FILES, instance=request.user.profile)
+        profile_form = ProfileUpdateForm(request.POST, request.FILES, instance=user_profile)
         if user_form.is_valid() and profile_form.is_valid():
             user_form.save()
             profile_form.save()
@@ -171,7 +103,7 @@ def profile(request: HttpRequest) -> HttpResponse:
             return redirect('profile')
     else:
         user_form = UserUpdateForm(instance=request.user)
-        profile_form = ProfileUpdateForm(instance=request.user.profile)
+        profile_form = ProfileUpdateForm(instance=user_profile)
 
     # Показывать форму редактирования, если есть ошибки валидации
     show_edit_form = request.method == 'POST' and (user_form.errors or profile_form.errors)
@@ -179,14 +111,7 @@ def profile(request: HttpRequest) -> HttpResponse:
     return render(request, 'users/profile.html', {
         'user_form': user_form,
         'profile_form': profile_form,
-        'unfinished_courses': unfinished_courses,
-        'finished_courses': finished_courses,
-        'exp': exp,
-        'progress': int(progress),
-        'level': level,
-        'quiz_results': quiz_results,
-        'page_obj': page_obj,
-        'all_lessons_completed': all_lessons_completed,
+        'profile': user_profile,
         'show_edit_form': show_edit_form,
     })
 
@@ -220,110 +145,59 @@ def quiz_report(request, quiz_id):
 
 
 
-def _get_user_learning_stats(target_user):
-    """Собирает статистику обучения пользователя: курсы, опыт, уровень, тесты."""
-    started_courses = UserCourse.objects.filter(user=target_user).select_related('course')
-    unfinished_courses = []
-    finished_courses = []
-    exp = 0
-    level = 1
-
-    for user_course in started_courses:
-        course = user_course.course
-        trajectory = UserLessonTrajectory.objects.filter(user=target_user, course=course).first()
-
-        if trajectory:
-            lesson_ids = trajectory.lessons.values_list('id', flat=True)
-            completed_lessons = UserProgress.objects.filter(
-                user=target_user,
-                course=course,
-                completed=True,
-                lesson_id__in=lesson_ids
-            ).count()
-            total_lessons = trajectory.lessons.count()
-        else:
-            lesson_ids = course.lessons.values_list('id', flat=True)
-            completed_lessons = UserProgress.objects.filter(
-                user=target_user,
-                course=course,
-                completed=True,
-                lesson_id__in=lesson_ids
-            ).count()
-            total_lessons = course.lessons.count()
-
-        course_quizzes = course.quizzes.all()
-        total_quizzes = course_quizzes.count()
-        completed_quizzes = sum(
-            1 for q in course_quizzes
-            if QuizResult.objects.filter(user=target_user, quiz_title=q.name, passed=True).exists()
-        )
-        total_items = total_lessons + total_quizzes
-        completed_items = completed_lessons + completed_quizzes
-        percent = int((completed_items / total_items) * 100) if total_items > 0 else 0
-
-        course_data = {
-            'course': course,
-            'completed': completed_lessons,
-            'total': total_lessons,
-            'completed_quizzes': completed_quizzes,
-            'total_quizzes': total_quizzes,
-            'percent': percent,
-        }
-        if course.final_quiz:
-            course_data['quiz_passed'] = QuizResult.objects.filter(
-                user=target_user,
-                quiz_title=course.final_quiz.name,
-                passed=True
-            ).exists()
-        else:
-            course_data['quiz_passed'] = True
-
-        all_done = completed_lessons >= total_lessons and completed_quizzes >= total_quizzes
-        is_course_completed = all_done and course_data.get('quiz_passed', True)
-
-        if is_course_completed:
-            if user_course.can_receive_exp():
-                finished_courses.append(course_data)
-                exp += user_course.exp_reward()
-            else:
-                unfinished_courses.append(course_data)
-                exp += 15
-        else:
-            unfinished_courses.append(course_data)
-            exp += 15
-
-    while exp >= level * 100:
-        level += 1
-    progress = ((exp - ((level - 1) * 100)) / 100) * 100
-    progress = min(progress, 100)
-
-    quiz_results = QuizResult.objects.filter(user=target_user).order_by('-completed_at')[:10]
-    return {
-        'unfinished_courses': unfinished_courses,
-        'finished_courses': finished_courses,
-        'exp': exp,
-        'level': level,
-        'progress': int(progress),
-        'quiz_results': quiz_results,
-    }
-
-
-
-
 @login_required
 def user_detail(request: HttpRequest, pk: int) -> HttpResponse:
     """Детальный просмотр пользователя и статистики обучения (только для staff)."""
     if not request.user.is_staff:
         return redirect('home')
     profile_user = get_object_or_404(User, pk=pk)
-    stats = _get_user_learning_stats(profile_user)
+    # Оболочка страницы: курсы, опыт и история тестов загружаются панелями (см. user_panel)
     context = {
         'profile_user': profile_user,
-        **stats,
+        'profile': get_profile(profile_user),
     }
     return render(request, 'users/user_detail.html', context)
 
 
+def _render_panel(request, target_user, panel, templates, history_size):
+    """Ответ панели: опыт — JSON для обновления оболочки, остальное — HTML-фрагменты"""
+    if panel == EXP_PANEL:
+        stats = get_cached_learning_stats(target_user)
+        return JsonResponse({
+            'success': True,
+            'exp': stats['exp'],
+            'level': stats['level'],
+            'progress': stats['progress'],
+        })
+    if panel not in templates:
+        raise Http404
+    context = {'profile_user': target_user}
+    if panel == QUIZ_HISTORY_PANEL:
+        context['history'] = get_cached_quiz_history(target_user, request.GET.get('cursor'), history_size)
+    else:
+        stats = get_cached_learning_stats(target_user)
+        context['courses'] = stats['unfinished_courses' if panel == IN_PROGRESS_PANEL else 'finished_courses']
+    return render(request, templates[panel], context)
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=panel_etag)
+def profile_panel(request: HttpRequest, panel: str) -> HttpResponse:
+    """Панель страницы профиля текущего пользователя."""
+    return _render_panel(request, request.user, panel, PROFILE_PANEL_TEMPLATES, QUIZ_HISTORY_PAGE_SIZE)
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=panel_etag)
+def user_panel(request: HttpRequest, pk: int, panel: str) -> HttpResponse:
+    """Панель страницы пользователя в управлении пользователями (только для staff)."""
+    target_user = get_object_or_404(User, pk=pk)
+    return _render_panel(request, target_user, panel, USER_PANEL_TEMPLATES, USER_HISTORY_PAGE_SIZE)
+
+
 
 
 @login_required
@@ -387,22 +261,45 @@ def user_delete(request: HttpRequest, pk: int) -> HttpResponse:
     return redirect('users:user_management')
 
 
-class UserManagementView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+class UserManagementView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+    """
+    Список пользователей с поиском и сортировкой. Опыт, уровень и последняя
+    активность читаются из предрасчитанных полей профиля (см. users/stats.py),
+    поэтому стоимость страницы не зависит от числа пользователей.
+    """
     template_name = 'users/user_management.html'
+    context_object_name = 'users'
+    paginate_by = USERS_PAGE_SIZE
 
     def test_func(self):
         """Проверка прав доступа - только для администраторов"""
         return self.request.user.is_staff
 
+    def get_sort(self):
+        sort = self.request.GET.get('sort', 'username')
+        return sort if sort in USER_SORTS else 'username'
+
+    def get_queryset(self):
+        users = User.objects.select_related('profile').prefetch_related('groups')
+        query = self.request.GET.get('q', '').strip()[:100]
+        for term in query.split()[:5]:
+            users = users.filter(
+                Q(username__icontains=term) | Q(first_name__icontains=term)
+                | Q(last_name__icontains=term) | Q(email__icontains=term)
+                # Exists вместо JOIN по группам: без дублей и DISTINCT
+                | Exists(User.groups.through.objects.filter(user_id=OuterRef('pk'), group__name__icontains=term))
+            )
+        return users.order_by(*USER_SORTS[self.get_sort()])
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        users = list(User.objects.prefetch_related('groups').all())
-        for u in users:
-            stats = _get_user_learning_stats(u)
-            u.exp = stats['exp']
-            u.exp_level = stats['level']
-            u.exp_progress = stats['progress']
-        context['users'] = users
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context.update({
+            'query': self.request.GET.get('q', '').strip(),
+            'sort': self.get_sort(),
+            'querystring': params.urlencode(),
+        })
         return context
 
 
@@ -428,6 +325,43 @@ class RegisterUserView(LoginRequiredMixin, UserPassesTestMixin, FormView):
         return super().form_valid(form)
 
 
+class ImportUsersView(LoginRequiredMixin, UserPassesTestMixin, FormView):
+    """Массовое создание пользователей из CSV (только для staff)."""
+    template_name = 'users/import_users.html'
+    form_class = UserImportForm
+    success_url = reverse_lazy('users:user_management')
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def form_valid(self, form):
+        try:
+            stream = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            result = parse_users_csv(stream)
+        except UnicodeDecodeError:
+            form.add_error('file', 'Файл должен быть в кодировке UTF-8')
+            return self.form_invalid(form)
+
+        # Хэширование паролей идёт внутри запроса — большие файлы только через команду
+        if len(result.rows) > WEB_IMPORT_MAX_ROWS:
+            form.add_error('file', (
+                f'В файле {len(result.rows)} пользователей, через браузер можно импортировать '
+                f'не больше {WEB_IMPORT_MAX_ROWS}. Разделите файл или используйте '
+                f'команду manage.py import_users.'
+            ))
+            return self.form_invalid(form)
+
+        import_users(result, workers=WEB_IMPORT_WORKERS)
+        if result.created:
+            messages.success(
+                self.request,
+                f'Создано пользователей: {result.created}, назначено курсов: {result.assignments}.'
+            )
+        if result.errors:
+            return self.render_to_response(self.get_context_data(form=form, import_errors=result.errors))
+        return super().form_valid(form)
+
+
 class CustomLoginView(LoginView):
     template_name = "users/login.html"
 